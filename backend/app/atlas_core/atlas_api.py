@@ -4,8 +4,11 @@ from __future__ import annotations
 import os
 from typing import Any, Dict, Optional
 
+import json
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv, find_dotenv
 
@@ -13,6 +16,7 @@ from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv(), override=False)
 
 from atlas_core.atlas_service import run_query as router_run_query
+from atlas_core.atlas_service import fetch_page, stream_rows, close_cursor
 
 # Try to import multi_rag helpers (used only in augment branch / fallback)
 try:
@@ -63,6 +67,9 @@ class QueryReq(BaseModel):
     augment: bool = False
     session: Optional[str] = None
     preview: bool = False
+    page_size: Optional[int] = None   # set to get a cursor + first page instead of every row
+    profile: bool = False             # per-step wall/CPU/memory/index hits in meta.lineage[*].profile
+    approximate: bool = False         # aggregate/distinct may sample/sketch (bounds in <col>_lo/_hi)
 
 
 class ChatReq(BaseModel):
@@ -72,6 +79,7 @@ class ChatReq(BaseModel):
     augment: bool = True          # default to True so you get nice NL answers
     k: int = 4
     mode: Optional[str] = None    # let router default if None
+    page_size: Optional[int] = None
 
 
 # --- Health ---
@@ -86,7 +94,8 @@ def health() -> Dict[str, Any]:
 @app.post("/query")
 def query(req: QueryReq) -> Dict[str, Any]:
     try:
-        resp = router_run_query(req.q.strip(), k=req.k, mode=req.mode)
+        resp = router_run_query(req.q.strip(), k=req.k, mode=req.mode, page_size=req.page_size,
+                                profile=req.profile, approximate=req.approximate)
 
         # --- LLM augmentation (always safe; never breaks response) ---
         if getattr(req, "augment", False):
@@ -96,6 +105,7 @@ def query(req: QueryReq) -> Dict[str, Any]:
             rows = resp.get("rows") or []
             meta = resp.get("meta", {}) or {}
             lineage = (meta.get("lineage") or [])[:]
+            total_rows = (meta.get("page") or {}).get("total", len(rows))
             cols: list[str] = []
             if rows:
                 # union of keys across rows to avoid hiding columns
@@ -141,8 +151,8 @@ def query(req: QueryReq) -> Dict[str, Any]:
                                 + " |"
                             )
                         more = (
-                            f"\n\n(Showing first {min(k, len(rows))} of {len(rows)} rows.)"
-                            if len(rows) > k
+                            f"\n\n(Showing first {min(k, len(rows))} of {total_rows} rows.)"
+                            if total_rows > min(k, len(rows))
                             else ""
                         )
                         return "\n".join([head, sep, *body]) + more
@@ -178,8 +188,10 @@ def query(req: QueryReq) -> Dict[str, Any]:
                         max_tokens=900,
                     )
                     answer_text = (resp_llm.choices[0].message.content or "").strip()
-                    meta["approximate"] = False
-                    meta.setdefault("badges", []).append("EXACT_STRUCTURED")
+                    # executor estimates (approximate aggregate/distinct) keep their APPROXIMATE badge
+                    if not meta.get("approximate"):
+                        meta["approximate"] = False
+                        meta.setdefault("badges", []).append("EXACT_STRUCTURED")
                     meta["augment_debug"] = {
                         "context_rows": len(rows),
                         "columns_in_context": cols[:10],
@@ -241,6 +253,7 @@ async def chat_api(req: ChatReq) -> Dict[str, Any]:
         augment=req.augment,
         session=req.session,
         preview=req.preview,
+        page_size=req.page_size,
     )
 
     resp = query(q_req)  # type: ignore[arg-type]
@@ -248,11 +261,12 @@ async def chat_api(req: ChatReq) -> Dict[str, Any]:
     meta = resp.get("meta") or {}
     rows = resp.get("rows") or []
     answer = resp.get("answer")
+    total = (meta.get("page") or {}).get("total", len(rows))
 
     if not answer:
         if rows:
             answer = (
-                f"Found {len(rows)} matching rows. "
+                f"Found {total} matching rows. "
                 "Enable augment=True for a natural language summary."
             )
         else:
@@ -272,8 +286,8 @@ async def chat_api(req: ChatReq) -> Dict[str, Any]:
                     + " |"
                 )
             more = (
-                f"\n\n(Showing first {min(10, len(rows))} of {len(rows)} rows.)"
-                if len(rows) > 10
+                f"\n\n(Showing first {min(10, len(rows))} of {total} rows.)"
+                if total > 10
                 else ""
             )
             ctx_preview = "\n".join([head, sep, *body]) + more
@@ -286,3 +300,28 @@ async def chat_api(req: ChatReq) -> Dict[str, Any]:
         "rows": rows,
         "meta": meta,
     }
+
+
+# --- Cursor pagination / streaming over server-side result sets ---
+
+@app.get("/query/page/{cursor}")
+def query_page(cursor: str, offset: int = 0, page_size: Optional[int] = None) -> Dict[str, Any]:
+    page = fetch_page(cursor, offset, page_size)
+    if page is None:
+        raise HTTPException(status_code=404, detail="cursor expired or unknown")
+    return page
+
+
+@app.get("/query/stream/{cursor}")
+def query_stream(cursor: str, offset: int = 0) -> StreamingResponse:
+    """NDJSON: one row per line, converted chunk by chunk from the columnar result."""
+    rows = stream_rows(cursor, offset)
+    if rows is None:
+        raise HTTPException(status_code=404, detail="cursor expired or unknown")
+    return StreamingResponse((json.dumps(r, default=str) + "\n" for r in rows),
+                             media_type="application/x-ndjson")
+
+
+@app.delete("/query/cursor/{cursor}")
+def query_close(cursor: str) -> Dict[str, Any]:
+    return {"closed": close_cursor(cursor)}
@@ -0,0 +1,294 @@
+# atlas_approx.py
+# Opt-in approximate aggregate / distinct (step params {"approximate": true | {...}}, or
+# run_query(approximate=True) for every aggregate/distinct step of the plan)
+# - method "sample" (default): stratified row sample, one stratum per group. Group sizes are exact;
+#   count/sum/mean are scaled from the sample with normal-approximation bounds (<col>_lo/<col>_hi);
+#   nunique uses one HyperLogLog per group over all rows
+# - method "sketch": count/size per group from a count-min sketch over all rows; the groups reported
+#   are those seen in a uniform row sample, so rare groups can be missing
+# - distinct: distinct rows of a uniform sample + HyperLogLog estimate of the full distinct count
+# - Inputs under min_rows (ATLAS_APPROX_MIN_ROWS, default 20000) and aggs without an estimator
+#   (min/max/median/...) run exact; lineage["approximate"] says which happened
+# - Any approximated step sets meta["approximate"] and the APPROXIMATE badge
+# - Chunked (out-of-core) runs stay exact: their aggregate is already a streaming fold
+
+from __future__ import annotations
+from statistics import NormalDist
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import copy, math, os
+
+import numpy as np
+import pandas as pd
+
+_DEFAULTS = {"method": "sample", "rate": 0.1, "confidence": 0.95, "min_per_group": 30,
+             "seed": 0, "hll_p": 12, "cm_width": 4096, "cm_depth": 4}
+_SAMPLED_AGGS = {"count", "size", "sum", "mean", "nunique"}
+_SKETCH_AGGS = {"count", "size"}
+_MAX_SAMPLE_FRACTION = 0.5         # above this the sample saves nothing: run exact
+_GROUPED_HLL_BYTES = 64 << 20      # registers for per-group HLLs (p shrinks to fit)
+_U64 = np.uint64
+
+
+class _Unsupported(Exception):
+    """No estimator for this step's shape: maybe_approximate runs it exact instead."""
+
+
+def approx_settings(params: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Merged settings when the step asks for approximation, else None."""
+    a = (params or {}).get("approximate")
+    if not a:
+        return None
+    cfg = dict(_DEFAULTS, min_rows=int(os.getenv("ATLAS_APPROX_MIN_ROWS", "20000")))
+    if isinstance(a, dict):
+        cfg.update(a)
+    return cfg
+
+def approximate_plan(plan: Any) -> Any:
+    """Copy of the plan with every aggregate/distinct step marked approximate (request-level opt-in)."""
+    out = copy.copy(plan)
+    steps = []
+    for s in getattr(plan, "steps", None) or []:
+        if s.op in ("aggregate", "distinct") and not (s.params or {}).get("approximate"):
+            s = type(s)(s.op, s.source, {**(s.params or {}), "approximate": True})
+        steps.append(s)
+    out.steps = steps
+    return out
+
+def _z(confidence: float) -> float:
+    return NormalDist().inv_cdf(0.5 + float(confidence) / 2)
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """64-bit hash per row (same values -> same hash across frames); columns hashed uncategorized."""
+    h = np.zeros(len(df), dtype=_U64)
+    for i in range(df.shape[1]):
+        hc = pd.util.hash_array(df.iloc[:, i].to_numpy(), categorize=False)
+        h = hc if i == 0 else (h * _U64(0x100000001B3)) ^ hc
+    return h
+
+
+# ---------- HyperLogLog ----------
+def _clz64(x: np.ndarray) -> np.ndarray:
+    """Leading zero bits of each uint64, from the float exponent of its top 53 bits (capped at 53)."""
+    _, e = np.frexp((x >> _U64(11)).astype(np.float64))
+    return (53 - e).astype(np.uint8)
+
+def _hll_estimate(reg: np.ndarray) -> np.ndarray:
+    """Cardinality per register row (reg: (..., m) uint8), with the small-range correction."""
+    m = reg.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m) if m >= 128 else {16: 0.673, 32: 0.697, 64: 0.709}[m]
+    est = alpha * m * m / np.exp2(-reg.astype(np.float64)).sum(axis=-1)
+    zeros = (reg == 0).sum(axis=-1)
+    small = (est <= 2.5 * m) & (zeros > 0)
+    return np.where(small, m * np.log(m / np.maximum(zeros, 1)), est)
+
+
+class HyperLogLog:
+    """Distinct-count sketch over 64-bit hashes; relative standard error 1.04/sqrt(2^p)."""
+    def __init__(self, p: int = 12, groups: int = 1):
+        self.p, self.m = int(p), 1 << int(p)
+        self.reg = np.zeros((groups, self.m), dtype=np.uint8)
+
+    def add(self, hashes: np.ndarray, group: Optional[np.ndarray] = None) -> "HyperLogLog":
+        bucket = (hashes >> _U64(64 - self.p)).astype(np.intp)
+        rank = np.minimum(_clz64(hashes << _U64(self.p)), 64 - self.p) + 1
+        gid = np.zeros(len(hashes), dtype=np.intp) if group is None else group
+        np.maximum.at(self.reg, (gid, bucket), rank.astype(np.uint8))
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.reg, other.reg, out=self.reg)
+        return self
+
+    @property
+    def rel_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def estimate(self) -> np.ndarray:
+        return _hll_estimate(self.reg)
+
+
+# ---------- count-min ----------
+class CountMinSketch:
+    """
+    Frequency sketch over 64-bit hashes. Estimates never undercount; with probability
+    1 - e^-depth an estimate exceeds the true count by at most (e / width) * total.
+    """
+    def __init__(self, width: int = 4096, depth: int = 4, seed: int = 0):
+        self.width, self.depth = int(width), int(depth)
+        rng = np.random.default_rng([seed, self.width, self.depth])
+        self._a = rng.integers(1, 1 << 62, size=self.depth, dtype=np.uint64) | _U64(1)
+        self._b = rng.integers(0, 1 << 62, size=self.depth, dtype=np.uint64)
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.total = 0
+
+    def _cols(self, hashes: np.ndarray, d: int) -> np.ndarray:
+        return ((hashes * self._a[d] + self._b[d]) >> _U64(32)) % _U64(self.width)
+
+    def add(self, hashes: np.ndarray) -> "CountMinSketch":
+        for d in range(self.depth):
+            self.table[d] += np.bincount(self._cols(hashes, d).astype(np.intp), minlength=self.width)
+        self.total += len(hashes)
+        return self
+
+    def estimate(self, hashes: np.ndarray) -> np.ndarray:
+        return np.min([self.table[d][self._cols(hashes, d).astype(np.intp)] for d in range(self.depth)], axis=0)
+
+    @property
+    def error_bound(self) -> float:
+        return math.e / self.width * self.total
+
+    @property
+    def confidence(self) -> float:
+        return 1 - math.exp(-self.depth)
+
+
+def maybe_approximate(fn: Callable[..., Tuple[Any, Dict[str, Any]]], df: pd.DataFrame,
+                      cfg: Dict[str, Any], *args: Any) -> Tuple[Any, Dict[str, Any]]:
+    """fn's (result, stats), or (None, {"exact": reason}) when the step should run exact instead."""
+    if len(df) < int(cfg["min_rows"]):
+        return None, {"exact": f"input below {cfg['min_rows']} rows"}
+    try:
+        return fn(df, cfg, *args)
+    except _Unsupported as e:
+        return None, {"exact": str(e)}
+
+
+# ---------- aggregate ----------
+def _group_codes(df: pd.DataFrame, by: List[str]) -> Tuple[np.ndarray, pd.DataFrame]:
+    """Group id per row (in sorted key order, like groupby) + one key row per group."""
+    if not by:
+        return np.zeros(len(df), dtype=np.intp), pd.DataFrame(index=range(1))
+    codes = df.groupby(by, dropna=False, observed=True, sort=True).ngroup().to_numpy(dtype=np.intp)
+    first = np.empty(codes.max() + 1 if len(codes) else 0, dtype=np.intp)
+    first[codes[::-1]] = np.arange(len(codes) - 1, -1, -1)      # last write wins: first row per group
+    return codes, df[by].iloc[first].reset_index(drop=True)
+
+def _sample_mask(rng: np.random.Generator, codes: np.ndarray, sizes: np.ndarray, cfg: Dict[str, Any]) -> np.ndarray:
+    """Poisson sample per stratum: expected max(min_per_group, rate * N_h) rows, capped at N_h."""
+    want = np.maximum(np.ceil(sizes * float(cfg["rate"])), int(cfg["min_per_group"]))
+    prob = np.minimum(1.0, want / np.maximum(sizes, 1))
+    return rng.random(len(codes)) < prob[codes]
+
+def _numeric(s: pd.Series) -> np.ndarray:
+    return pd.to_numeric(s, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+def _sampled_aggregate(df, by, metrics, cfg):
+    codes, keys = _group_codes(df, by)
+    G = len(keys)
+    sizes = np.bincount(codes, minlength=G).astype(np.float64)
+    rng = np.random.default_rng(int(cfg["seed"]))
+    take = _sample_mask(rng, codes, sizes, cfg)
+    if take.sum() > _MAX_SAMPLE_FRACTION * len(df):
+        raise _Unsupported(f"groups too small to sample ({G} groups over {len(df)} rows)")
+    rows = np.flatnonzero(take)
+    cs = codes[rows]
+    m = np.bincount(cs, minlength=G).astype(np.float64)
+    fpc = np.clip(1 - m / np.maximum(sizes, 1), 0, 1)        # finite population correction
+    z = _z(cfg["confidence"])
+    stats: Dict[str, Any] = {"method": "stratified_sample", "rate": cfg["rate"], "confidence": cfg["confidence"],
+                             "input_rows": len(df), "sampled_rows": len(rows), "groups": G}
+
+    def _mean_var(x, w=None):
+        n = np.bincount(cs, weights=w, minlength=G) if w is not None else m
+        s1 = np.bincount(cs, weights=x, minlength=G)
+        s2 = np.bincount(cs, weights=x * x, minlength=G)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = s1 / n
+            var = np.where(n > 1, (s2 - n * mean * mean) / (n - 1), 0.0)
+        return n, mean, np.maximum(var, 0.0)
+
+    out = keys.copy()
+    for col, agg in dict(metrics).items():
+        agg = str(agg).lower()
+        if agg == "size":
+            est, half = sizes, np.zeros(G)
+        elif agg == "nunique":
+            hll = HyperLogLog(_grouped_p(int(cfg["hll_p"]), G), groups=G)
+            vals = df[col]
+            ok = vals.notna().to_numpy()
+            hll.add(row_hashes(vals[ok].to_frame()), codes[ok])
+            est = np.rint(hll.estimate())
+            half = est * z * hll.rel_error
+            stats["hll_p"] = hll.p
+        elif agg == "count":
+            nn = df[col].iloc[rows].notna().to_numpy().astype(np.float64)
+            _, p, var = _mean_var(nn)
+            est = sizes * p
+            with np.errstate(invalid="ignore", divide="ignore"):
+                half = sizes * z * np.sqrt(var * fpc / m)
+        else:   # sum / mean over the numeric view; nulls count as 0 in sum and are skipped by mean
+            x = _numeric(df[col].iloc[rows])
+            if agg == "sum":
+                _, mu, var = _mean_var(np.nan_to_num(x))
+                est = sizes * mu
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    half = sizes * z * np.sqrt(var * fpc / m)
+            else:
+                ok = ~np.isnan(x)
+                n, mu, var = _mean_var(np.where(ok, x, 0.0), ok.astype(np.float64))
+                est = mu
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    half = z * np.sqrt(var * np.clip(1 - n / np.maximum(sizes, 1), 0, 1) / n)
+        if agg in ("count", "size", "nunique"):
+            est = np.rint(est)
+        out[col] = est
+        out[f"{col}_lo"] = est - np.nan_to_num(half)
+        out[f"{col}_hi"] = est + np.nan_to_num(half)
+    return out, stats
+
+def _grouped_p(p: int, groups: int) -> int:
+    while p > 4 and groups * (1 << p) > _GROUPED_HLL_BYTES:
+        p -= 1
+    return p
+
+def _sketch_aggregate(df, by, metrics, cfg):
+    if not by:
+        raise _Unsupported("sketch method needs group-by columns")
+    rng = np.random.default_rng(int(cfg["seed"]))
+    h = row_hashes(df[by])
+    cms = CountMinSketch(int(cfg["cm_width"]), int(cfg["cm_depth"]), int(cfg["seed"])).add(h)
+    take = rng.random(len(df)) < float(cfg["rate"])
+    seen = pd.DataFrame({"h": h[take], "row": np.flatnonzero(take)}).drop_duplicates("h")
+    keys = df[by].iloc[seen["row"].to_numpy()].reset_index(drop=True)
+    est = cms.estimate(seen["h"].to_numpy(dtype=_U64)).astype(np.float64)
+    out = keys.copy()
+    for col, agg in dict(metrics).items():
+        # count of a column counts its non-null rows; the sketch counts rows, so bounds widen by nulls
+        out[col] = est
+        out[f"{col}_lo"] = np.maximum(est - cms.error_bound, 0)
+        out[f"{col}_hi"] = est
+    out = out.sort_values(by, kind="stable", ignore_index=True)
+    return out, {"method": "count_min", "rate": cfg["rate"], "confidence": round(cms.confidence, 4),
+                 "input_rows": len(df), "sampled_rows": int(take.sum()), "groups": len(out),
+                 "cm_width": cms.width, "cm_depth": cms.depth, "error_bound": round(cms.error_bound, 2)}
+
+def approx_aggregate(df: pd.DataFrame, cfg: Dict[str, Any], by: List[str],
+                     metrics: List[Tuple[str, str]]) -> Tuple[Tuple[pd.DataFrame, Dict[str, Any]], Dict[str, Any]]:
+    """
+    ((frame, step meta), lineage stats). Each metric column holds the estimate; <col>_lo / <col>_hi bound
+    it at cfg["confidence"]. Raises _Unsupported for aggs without an estimator.
+    """
+    aggs = {str(a).lower() for (_, a) in metrics}
+    method = str(cfg.get("method") or "sample").lower()
+    allowed = _SKETCH_AGGS if method == "sketch" else _SAMPLED_AGGS
+    if not aggs <= allowed:
+        raise _Unsupported(f"no {method} estimator for {sorted(aggs - allowed)}")
+    fn = _sketch_aggregate if method == "sketch" else _sampled_aggregate
+    out, stats = fn(df, by, metrics, cfg)
+    return (out, {"op": "aggregate", "by": by, "metrics": metrics, "input_n": len(df), "out_n": len(out)}), stats
+
+
+# ---------- distinct ----------
+def approx_distinct(df: pd.DataFrame, cfg: Dict[str, Any],
+                    cols: Optional[List[str]]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Distinct rows of a uniform sample + an HLL estimate (and bounds) of the full distinct count."""
+    keys = df[cols] if cols else df
+    hll = HyperLogLog(int(cfg["hll_p"])).add(row_hashes(keys))
+    est = float(hll.estimate()[0])
+    half = est * _z(cfg["confidence"]) * hll.rel_error
+    take = np.random.default_rng(int(cfg["seed"])).random(len(df)) < float(cfg["rate"])
+    out = df[take].drop_duplicates(subset=cols or None)
+    return out, {"method": "hll_sample", "rate": cfg["rate"], "confidence": cfg["confidence"],
+                 "input_rows": len(df), "sampled_rows": int(take.sum()), "hll_p": hll.p,
+                 "distinct_est": int(round(est)), "distinct_lo": int(max(len(out), est - half)),
+                 "distinct_hi": int(round(est + half))}
@@ -0,0 +1,194 @@
+# atlas_budget.py
+# Per-query memory budget for PlanExecutor._run_frame
+# - Each step's output is charged against ATLAS_QUERY_BUDGET_MB (default 1024; 0 = unlimited). Bytes are
+#   the frame's own buffers, as memory_usage(deep=False): numeric data plus 8-byte references for text
+#   (the strings themselves stay shared with the source table)
+# - Producers check before they materialize: a join sizes its output from row pairs / key counts first
+#   (and never builds rows past MAX_ROWS_STEP); derive checks after each new column
+# - Over budget with ATLAS_SPILL=1 (default): fixed-width columns move to a temp columnar spill (one raw
+#   file per column under ATLAS_SPILL_DIR) and are read back memory-mapped, so they stop counting;
+#   producers too big for memory write row blocks straight into the spill. If what stays resident
+#   still doesn't fit, or spilling is off, BudgetExceeded stops the query at that step
+# - Lineage: each step gets "memory": {"bytes", "peak", "budget"} (+ "spilled"); meta["memory"] sums up
+
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional
+import os, shutil, tempfile
+
+import numpy as np
+import pandas as pd
+
+
+class BudgetExceeded(RuntimeError):
+    """A step's output doesn't fit the query's memory budget (and can't be spilled)."""
+
+
+def query_budget_bytes() -> int:
+    return int(float(os.getenv("ATLAS_QUERY_BUDGET_MB", "1024")) * (1 << 20))
+
+def spill_enabled() -> bool:
+    return os.getenv("ATLAS_SPILL", "1") != "0"
+
+
+def _fixed_width(dtype: Any) -> bool:
+    return isinstance(dtype, np.dtype) and dtype.kind in "biufcmM"
+
+def _mapped(arr: Any) -> bool:
+    while arr is not None:
+        if isinstance(arr, np.memmap):
+            return True
+        arr = getattr(arr, "base", None)
+    return False
+
+def frame_bytes(df: Optional[pd.DataFrame], mapped: bool = False) -> int:
+    """Resident bytes of df's buffers; mapped=True leaves out memory-mapped (spilled) columns."""
+    if df is None:
+        return 0
+    if not mapped:
+        return int(df.memory_usage(deep=False, index=True).sum())
+    total = int(df.index.memory_usage(deep=False))
+    for j in range(df.shape[1]):
+        s = df.iloc[:, j]
+        if not (_fixed_width(s.dtype) and _mapped(s.to_numpy(copy=False))):
+            total += int(s.memory_usage(index=False, deep=False))
+    return total
+
+def row_bytes(df: Optional[pd.DataFrame]) -> float:
+    return frame_bytes(df) / len(df) if df is not None and len(df) else 0.0
+
+
+class ColumnarSpill:
+    """
+    Append-only columnar spill of one intermediate: each fixed-width column is a raw file that
+    frame() maps back read-only; other columns (text, categorical, nullable) stay in memory.
+    """
+    def __init__(self, root: str, tag: str):
+        self.root, self.tag = root, tag
+        self.n = 0
+        self.nbytes = 0
+        self._cols: Optional[List[List[Any]]] = None   # [name, dtype, file path or None, sink]
+
+    def append(self, df: pd.DataFrame) -> None:
+        if self._cols is None:
+            self._cols = []
+            for j, (name, dtype) in enumerate(zip(df.columns, df.dtypes)):
+                path = os.path.join(self.root, f"{self.tag}_{j}.bin") if _fixed_width(dtype) else None
+                self._cols.append([name, dtype, path, open(path, "wb") if path else []])
+        for j, (_, dtype, path, sink) in enumerate(self._cols):
+            s = df.iloc[:, j]
+            if path:
+                arr = np.ascontiguousarray(s.to_numpy(dtype=dtype))
+                arr.tofile(sink)
+                self.nbytes += arr.nbytes
+            else:
+                sink.append(s.reset_index(drop=True))
+        self.n += len(df)
+
+    def frame(self, index: Optional[pd.Index] = None) -> pd.DataFrame:
+        parts = []
+        for (_, dtype, path, sink) in self._cols or []:
+            if path:
+                sink.close()
+                # plain ndarray view: still file-backed, but arithmetic on it doesn't return memmaps
+                arr = np.memmap(path, dtype=dtype, mode="r", shape=(self.n,)).view(np.ndarray) if self.n else np.empty(0, dtype)
+                parts.append(pd.Series(arr, copy=False))
+            else:
+                parts.append(pd.concat(sink, ignore_index=True) if len(sink) > 1 else sink[0])
+        out = pd.concat(parts, axis=1) if parts else pd.DataFrame(index=pd.RangeIndex(self.n))
+        out.columns = [c[0] for c in self._cols or []]
+        if index is not None:
+            out.index = index
+        return out
+
+
+class QueryBudget:
+    """Byte budget for one query's intermediates; usage per step ends up in lineage."""
+    def __init__(self, limit: int, spill: bool = True, spill_dir: Optional[str] = None):
+        self.limit = max(0, int(limit))
+        self.spill = spill
+        self.spill_dir = spill_dir
+        self.peak = 0
+        self.spilled_bytes = 0
+        self.exceeded: Optional[int] = None
+        self.steps: Dict[int, Dict[str, Any]] = {}
+        self._root: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "QueryBudget":
+        return cls(query_budget_bytes(), spill_enabled(), os.getenv("ATLAS_SPILL_DIR") or None)
+
+    def _note(self, step: int, nbytes: int, **extra: Any) -> None:
+        self.peak = max(self.peak, nbytes)
+        entry = self.steps.setdefault(step, {})
+        entry.update(bytes=int(nbytes), peak=int(self.peak), budget=self.limit, **extra)
+
+    def _fail(self, step: int, nbytes: int, what: str, why: Optional[str] = None) -> BudgetExceeded:
+        self.exceeded = step
+        self._note(step, nbytes)
+        why = why or ("even after spilling" if self.spill else "and spilling is off (ATLAS_SPILL=0)")
+        return BudgetExceeded(f"memory budget exceeded: {what} needs ~{nbytes} bytes of {self.limit} {why}")
+
+    def _spill(self, step: int) -> ColumnarSpill:
+        if self._root is None:
+            self._root = tempfile.mkdtemp(prefix="atlas_spill_", dir=self.spill_dir)
+        return ColumnarSpill(self._root, f"s{step}_{len(self.steps.get(step, {}).get('spilled', []))}")
+
+    def fit(self, step: int, df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """Charge df as step's output; spills it when over budget, raises BudgetExceeded if it still doesn't fit."""
+        if df is None:
+            return df
+        nbytes = frame_bytes(df, mapped=self._root is not None)
+        if not self.limit or nbytes <= self.limit:
+            self._note(step, nbytes)
+            return df
+        if not self.spill:
+            raise self._fail(step, nbytes, f"step {step} output")
+        sp = self._spill(step)
+        sp.append(df)
+        return self._settle(step, sp, df.index)
+
+    def produce(self, step: int, n: int, per_row: float,
+                rows: Callable[[int, int], pd.DataFrame], sliced: bool = True) -> pd.DataFrame:
+        """
+        Build an n-row output from rows(lo, hi) slices. Sized up front (n * per_row): in one piece when
+        it fits, else in row blocks of a quarter budget written straight into a spill. Producers that
+        can't build slices on their own (sliced=False) stop here instead of materializing to spill.
+        """
+        est = int(n * per_row)
+        if not self.limit or est <= self.limit:
+            out = rows(0, n)
+            self._note(step, frame_bytes(out))
+            return out
+        if not self.spill or not sliced:
+            why = None if sliced else "and it can't be built in blocks"
+            raise self._fail(step, est, f"step {step} output ({n} rows)", why)
+        block = max(1, int(self.limit // 4 // max(per_row, 1.0)))
+        sp = self._spill(step)
+        for lo in range(0, n, block):
+            sp.append(rows(lo, min(n, lo + block)))
+        return self._settle(step, sp, None)
+
+    def _settle(self, step: int, sp: ColumnarSpill, index: Optional[pd.Index]) -> pd.DataFrame:
+        out = sp.frame(index)
+        self.spilled_bytes += sp.nbytes
+        nbytes = frame_bytes(out, mapped=True)
+        spilled = self.steps.setdefault(step, {}).setdefault("spilled", [])
+        spilled.append({"rows": sp.n, "bytes": sp.nbytes})
+        if nbytes > self.limit:
+            raise self._fail(step, nbytes, f"step {step} output")
+        self._note(step, nbytes)
+        return out
+
+    def summary(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"budget": self.limit, "peak": int(self.peak)}
+        if self.spilled_bytes:
+            out["spilled_bytes"] = int(self.spilled_bytes)
+        if self.exceeded is not None:
+            out["exceeded_step"] = self.exceeded
+        return out
+
+    def close(self) -> None:
+        """Remove spill files (mapped columns of a returned frame stay readable on POSIX)."""
+        if self._root is not None:
+            shutil.rmtree(self._root, ignore_errors=True)
+            self._root = None
@@ -0,0 +1,304 @@
+# atlas_chunked.py
+# Out-of-core execution: stream a plan's source CSV in chunks instead of loading the whole file
+# - Used when the source file is larger than the memory budget and not already loaded (ATLAS_CHUNKED=auto),
+#   for every chunkable plan (=1), or never (=0)
+# - Each chunk is typed like a TypedTable (no secondary indexes) and filtered with PlanExecutor._apply_filters;
+#   ordered compares use whole-file date/numeric modes from a narrow pre-pass over the compared columns
+# - filter (+ derive) results fold into a bounded state at the first reducing step:
+#     aggregate      -> mergeable partials (atlas_rollups.Rollup: counts, sums, min/max per group)
+#     distinct       -> running drop_duplicates
+#     topk/sort+limit-> k-row partial selection per chunk (numeric and text orders both kept)
+#   the remaining steps run in memory on the reduced frame
+# - The filter's limit (and MAX_ROWS_STEP) still applies in file order; reading stops once it is met
+# - Only shapes it can't fold fall back to the in-memory run; step errors land in lineage like any other run
+# - Env: ATLAS_CHUNKED (auto|1|0), ATLAS_MEMORY_BUDGET_MB (default 1024), ATLAS_CHUNK_ROWS (override)
+
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import os, time
+
+import numpy as np
+import pandas as pd
+
+try:
+    from atlas_core.atlas_rollups import Rollup, RollupDef
+    from atlas_core.atlas_result_cache import frame_nbytes
+except ImportError:  # local package relative import
+    from .atlas_rollups import Rollup, RollupDef
+    from .atlas_result_cache import frame_nbytes
+
+_REDUCERS = ("aggregate", "distinct", "topk", "sort")
+_ORDERED_OPS = {"gt", ">", "ge", ">=", "lt", "<", "le", "<="}
+_MIN_CHUNK_ROWS, _MAX_CHUNK_ROWS = 1_000, 1_000_000
+
+
+def memory_budget_bytes() -> int:
+    return int(float(os.getenv("ATLAS_MEMORY_BUDGET_MB", "1024")) * (1 << 20))
+
+def chunked_setting() -> str:
+    return os.getenv("ATLAS_CHUNKED", "auto").strip().lower()
+
+
+def chunk_spec(plan: Any, registry: Any) -> Optional[Dict[str, Any]]:
+    """
+    {"source", "path", "prefix", "reducer"} when the plan should run chunked, else None.
+    prefix = number of leading steps (filter + derives) streamed per chunk; reducer = the step after them
+    that folds chunk results (None when there is none: the filtered rows are simply collected).
+    """
+    mode = chunked_setting()
+    steps = list(getattr(plan, "steps", None) or [])
+    if mode in ("0", "off", "false") or not steps or steps[0].op not in ("filter", "vector"):
+        return None
+    adapter = registry.tables.get(steps[0].source)
+    path = getattr(adapter, "path", None)
+    if not path or not os.path.exists(path):
+        return None
+    if mode not in ("1", "on", "true"):
+        if getattr(adapter, "_table", None) is not None or os.path.getsize(path) <= memory_budget_bytes():
+            return None
+    n = 1
+    while n < len(steps) and steps[n].op == "derive":
+        n += 1
+    reducer = None
+    if n < len(steps) and steps[n].op in _REDUCERS:
+        if steps[n].op != "sort" or (steps[n].params or {}).get("limit"):
+            reducer = steps[n].op
+    return {"source": steps[0].source, "path": path, "prefix": n, "reducer": reducer}
+
+
+def _chunk_rows(path: str, budget: int) -> int:
+    env = int(os.getenv("ATLAS_CHUNK_ROWS", "0") or 0)
+    if env > 0:
+        return env
+    sample = pd.read_csv(path, nrows=2000)
+    per_row = max(1.0, frame_nbytes(sample) / max(1, len(sample))) * 3   # typed side columns + filter copies
+    return int(min(_MAX_CHUNK_ROWS, max(_MIN_CHUNK_ROWS, budget // 4 / per_row)))
+
+
+class _Unsupported(Exception):
+    """A plan shape the chunked path can't fold: run_chunked falls back to the in-memory run."""
+
+
+class ChunkedRun:
+    """One chunked execution of a plan prefix against PlanExecutor `ex` (helpers come from module `ape`)."""
+    def __init__(self, ex: Any, ape: Any, plan: Any, spec: Dict[str, Any]):
+        self.ex, self.ape, self.plan, self.spec = ex, ape, plan, spec
+        self.steps = list(plan.steps)[:ape.MAX_STEPS]
+        self.source = spec["source"]
+        self.budget = memory_budget_bytes()
+        self.chunk_rows = _chunk_rows(spec["path"], self.budget)
+        self.stats = {"budget_bytes": self.budget, "chunk_rows": self.chunk_rows, "chunks": 0,
+                      "rows_scanned": 0, "rows_kept": 0, "peak_bytes_est": 0,
+                      "reducer": spec["reducer"], "stopped_early": False}
+        self.stop_at: Optional[int] = None   # a reducer that only needs the first n filtered rows
+        self.at: Optional[int] = None        # step being streamed (lineage entry for an error)
+
+    # ---- whole-file compare modes for ordered predicates ----
+    def _mode_flags(self, where: List[Dict[str, Any]]) -> Dict[Tuple[str, str], bool]:
+        header = pd.read_csv(self.spec["path"], nrows=0)
+        canon = list(self.ape._canonical_headers(self.source, header).columns)
+        cr = self.ape.column_resolver(self.source, canon)
+        want = set()
+        for f in where:
+            if str(f.get("op") or "eq").lower() not in _ORDERED_OPS:
+                continue
+            val = f.get("value")
+            for raw in (f.get("col"), val.get("colref") if isinstance(val, dict) else None):
+                if raw:
+                    want.add(cr.col(raw))
+        want &= set(canon)
+        if not want:
+            return {}
+        usecols = [r for r, c in zip(header.columns, canon) if c in want]
+        flags = {(k, c): False for c in want for k in ("dt", "num")}
+        for chunk in pd.read_csv(self.spec["path"], usecols=usecols, chunksize=self.chunk_rows):
+            t = self.ape.TypedTable(self.source, chunk, indexed=False)
+            for (k, c) in flags:
+                if not flags[(k, c)] and c in t.df.columns:
+                    flags[(k, c)] = t.has_datetime(c) if k == "dt" else t.has_numeric(c)
+            if all(flags.values()):
+                break
+        return flags
+
+    # ---- per-chunk filter + derives ----
+    def _chunk_frames(self):
+        first = self.steps[0]
+        where = first.params.get("where") or []
+        select = first.params.get("select")
+        limit = first.params.get("limit")
+        quota = min(int(limit), self.ape.MAX_ROWS_STEP) if limit else self.ape.MAX_ROWS_STEP
+        flags = self._mode_flags(where)
+        derive_plan = _SubPlan(self.plan, self.steps[:self.spec["prefix"]])
+        for chunk in pd.read_csv(self.spec["path"], chunksize=self.chunk_rows):
+            self.at = 1
+            self.stats["chunks"] += 1
+            self.stats["rows_scanned"] += len(chunk)
+            chunk_bytes = frame_nbytes(chunk)
+            t = self.ape.TypedTable(self.source, chunk, indexed=False)
+            t._any.update(flags)
+            out = self.ex._apply_filters(t.df, where, self.source, table=t)
+            if select:
+                sel = self.ape.column_resolver(self.source, out.columns).cols(select)
+                missing = [c for c in sel if c not in out.columns]
+                if missing:
+                    raise ValueError(f"select columns missing after normalize: {missing}")
+                out = out[sel]
+            out = out.head(quota - self.stats["rows_kept"])
+            self.stats["rows_kept"] += len(out)
+            if self.spec["prefix"] > 1 and len(out):
+                out, meta = self.ex._run_frame(derive_plan, time.time(),
+                                               seed={"frame": out, "source": self.source, "start": 2})
+                bad = next((l for l in meta["lineage"] if l.get("error")), None)
+                if bad:
+                    self.at = bad["step"]
+                    raise RuntimeError(bad["error"])
+            yield out, chunk_bytes
+            if self.stats["rows_kept"] >= min(quota, self.stop_at or quota):
+                self.stats["stopped_early"] = True
+                break
+
+    def _track(self, chunk_bytes: int, state: Any) -> None:
+        """Peak estimate: raw chunk + its typed/filtered copies + the reducer state held across chunks."""
+        held = frame_nbytes(state) if isinstance(state, pd.DataFrame) else 0
+        self.stats["peak_bytes_est"] = max(self.stats["peak_bytes_est"], chunk_bytes * 3 + held)
+
+    # ---- reducers ----
+    def _order_key(self, frame: pd.DataFrame) -> Tuple[str, bool]:
+        """Resolve the sort/topk column + direction exactly like the in-memory step (from its lineage)."""
+        step = self.steps[self.spec["prefix"]]
+        _, meta = self.ex._run_frame(_SubPlan(self.plan, self.steps[:self.spec["prefix"] + 1]), time.time(),
+                                     seed={"frame": frame.head(1), "source": self.source,
+                                           "start": self.spec["prefix"] + 1})
+        last = meta["lineage"][-1]
+        if last.get("error"):
+            raise RuntimeError(last["error"])
+        if not last.get("by_resolved"):
+            raise _Unsupported(f"{step.op} without a resolvable column")
+        return last["by_resolved"], bool(last["ascending_resolved"])
+
+    def _keep_ordered(self, frame: pd.DataFrame, col: str, asc: bool, k: int) -> pd.DataFrame:
+        """Rows that can still be in the first k under either the numeric or the text ordering."""
+        num = pd.to_numeric(frame[col], errors="coerce")
+        keep = self.ape._take_topk(frame, num, k, asc).index.to_numpy()
+        try:
+            text = frame.sort_values(by=col, ascending=asc, kind="mergesort").head(k).index.to_numpy()
+            keep = np.union1d(keep, text)          # global row ids, file order
+        except TypeError:                          # mixed values: the step will order numerically
+            keep = np.sort(keep)
+        return frame.loc[keep]
+
+    def _prefix_lineage(self, t1: float) -> List[Dict[str, Any]]:
+        """Lineage entries for the streamed filter + derive steps."""
+        lineage: List[Dict[str, Any]] = [{
+            "step": 1, "op": self.steps[0].op, "source": self.source, "params": self.steps[0].params,
+            "rows_after_step": self.stats["rows_kept"], "elapsed_ms": round((time.time()-t1)*1000, 2),
+            "chunked": {k: self.stats[k] for k in ("chunks", "rows_scanned", "stopped_early")}}]
+        lineage += [{"step": i + 1, "op": "derive", "source": self.source, "params": self.steps[i].params,
+                     "rows_after_step": self.stats["rows_kept"], "chunked": True} for i in range(1, self.spec["prefix"])]
+        return lineage
+
+    def run(self, t0: float, profile: Any = None) -> Tuple[Optional[pd.DataFrame], Dict[str, Any]]:
+        reducer, n = self.spec["reducer"], self.spec["prefix"]
+        t1 = time.time()
+        state: Optional[pd.DataFrame] = None
+        rollup: Optional[Rollup] = None
+        agg_cols: Tuple[List[str], List[Tuple[str, str]]] = ([], [])
+        order: Optional[Tuple[str, bool, int]] = None
+        self.at = 1
+        for out, chunk_bytes in self._chunk_frames():
+            if reducer:
+                self.at = n + 1
+            if reducer == "aggregate":
+                if not len(out):
+                    continue
+                if rollup is None:
+                    p = self.steps[n].params
+                    cr = self.ape.column_resolver(self.source, out.columns)
+                    by, metrics = cr.cols(p.get("by", [])), cr.metrics(p.get("metrics", []))
+                    aggs = {c: a for (c, a) in metrics}
+                    missing = [c for c in [*by, *aggs] if c not in out.columns]
+                    if missing:
+                        raise ValueError(f"aggregate columns missing after normalize: {missing}")
+                    rollup = Rollup(RollupDef(self.source, tuple(by), tuple(c for c in aggs if c not in by)), out)
+                    if not rollup.serves(by, aggs):
+                        raise _Unsupported(f"aggregate {sorted(set(aggs.values()))} by {by} has no mergeable state")
+                    agg_cols = (by, metrics)
+                else:
+                    rollup.fold(out[list(rollup.dtypes)])
+                self._track(chunk_bytes, rollup.parts)
+            elif reducer in ("topk", "sort"):
+                p = self.steps[n].params
+                k = int(p.get("k", 10)) if reducer == "topk" else int(p["limit"])
+                state = out if state is None else pd.concat([state, out])
+                if reducer == "topk" and not p.get("by"):
+                    self.stop_at = k                   # plain head(k): the first k rows are the answer
+                elif len(state):
+                    if order is None:
+                        order = (*self._order_key(state), k)
+                    state = self._keep_ordered(state, *order)
+                self._track(chunk_bytes, state)
+            elif reducer == "distinct":
+                cols = self.steps[n].params.get("cols")
+                subset = self.ape.column_resolver(self.source, out.columns).cols(cols) if cols else None
+                state = out if state is None else pd.concat([state, out])
+                state = state.drop_duplicates(subset=subset)
+                self._track(chunk_bytes, state)
+            else:
+                state = out if state is None else pd.concat([state, out])
+                self._track(chunk_bytes, state)
+
+        lineage = self._prefix_lineage(t1)
+        start = n + 1
+        if reducer == "aggregate":
+            by, metrics = agg_cols
+            frame = rollup.answer(rollup.parts, by, {c: a for (c, a) in metrics}) if rollup is not None else pd.DataFrame()
+            lineage.append({"step": n + 1, "op": "aggregate", "source": self.source, "params": self.steps[n].params,
+                            "rows_after_step": len(frame), "chunked": {"groups": len(rollup.parts) if rollup else 0}})
+            start = n + 2
+        else:
+            frame = state if state is not None else pd.DataFrame()
+        self.at = None
+        frame, meta = self.ex._run_frame(self.plan, t0, seed={"frame": frame, "source": self.source,
+                                                              "lineage": lineage, "start": start},
+                                     profile=profile)
+        meta["chunked"] = dict(self.stats)
+        return frame, meta
+
+    def failed(self, t0: float, err: Exception) -> Tuple[None, Dict[str, Any]]:
+        """Meta for a step that raised mid-stream: its lineage entry carries the error, later steps don't run."""
+        s = self.steps[self.at - 1]
+        lineage = [l for l in self._prefix_lineage(t0) if l["step"] < self.at]
+        lineage.append({"step": self.at, "op": s.op, "source": self.source, "params": s.params, "error": str(err),
+                        "elapsed_ms": round((time.time()-t0)*1000, 2)})
+        _, meta = self.ex._run_frame(self.plan, t0, seed={"frame": None, "source": self.source,
+                                                          "lineage": lineage, "start": len(self.steps) + 1})
+        meta["chunked"] = dict(self.stats)
+        return None, meta
+
+
+class _SubPlan:
+    """Plan view over a subset of steps (same intent/rationale)."""
+    def __init__(self, plan: Any, steps: List[Any]):
+        self.intent = getattr(plan, "intent", None)
+        self.rationale = getattr(plan, "rationale", None)
+        self.steps = steps
+
+
+def run_chunked(ex: Any, plan: Any, spec: Dict[str, Any], t0: float,
+                profile: Any = None) -> Tuple[Optional[pd.DataFrame], Dict[str, Any]]:
+    """Chunked execution; a shape it can't fold falls back to the in-memory run, a failing step is reported."""
+    try:
+        from atlas_core import atlas_plan_executor as ape
+    except ImportError:  # local package relative import
+        from . import atlas_plan_executor as ape
+    run = ChunkedRun(ex, ape, plan, spec)
+    try:
+        return run.run(t0, profile)
+    except _Unsupported as e:
+        frame, meta = ex._run_frame(plan, t0, profile=profile)
+        meta["chunked"] = {"fallback": f"{type(e).__name__}: {e}"}
+        return frame, meta
+    except Exception as e:
+        if run.at is None:    # not a step's failure (the in-memory tail reports its own)
+            raise
+        return run.failed(t0, e)
@@ -0,0 +1,107 @@
+# atlas_dag.py
+# DAG view of a Plan + a shared thread pool for its independent branches
+# - Steps form a chain (each consumes the previous frame); a join's right-side fetch (load the right
+#   table, apply right_filters) depends on nothing in the plan, so it is a branch of its own
+# - PlanExecutor submits every branch when the plan starts and joins it at its step, so the fetch
+#   overlaps the left filter and whatever runs before the join (pandas releases the GIL in much of it)
+# - Env: ATLAS_PARALLEL=0 runs branches inline at their step (plain step-by-step execution),
+#   ATLAS_PARALLEL_WORKERS (default 4) sizes the pool
+# - A chain that stops before a join (error, budget) cancels that join's fetch if it hasn't started;
+#   meta["dag"] marks it "skipped"
+
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import os, threading, time
+
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def parallel_enabled() -> bool:
+    return os.getenv("ATLAS_PARALLEL", "1") != "0"
+
+def _workers() -> int:
+    return max(1, int(os.getenv("ATLAS_PARALLEL_WORKERS", "4") or 4))
+
+def branch_pool() -> ThreadPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix="atlas-branch")
+        return _POOL
+
+
+def plan_dag(plan: Any) -> List[Dict[str, Any]]:
+    """
+    Nodes {"id", "step", "op", "deps"}: "s<i>" for step i, "s<i>.right" for the right-side fetch of a
+    join at step i. A node whose deps are empty can start as soon as the plan does.
+    """
+    nodes: List[Dict[str, Any]] = []
+    for i, s in enumerate(getattr(plan, "steps", None) or [], start=1):
+        deps = [f"s{i-1}"] if i > 1 else []
+        if s.op == "join":
+            nodes.append({"id": f"s{i}.right", "step": i, "op": "fetch",
+                          "source": (s.params or {}).get("right_source"), "deps": []})
+            deps.append(f"s{i}.right")
+        nodes.append({"id": f"s{i}", "step": i, "op": s.op, "deps": deps})
+    return nodes
+
+
+class Branches:
+    """Futures for a plan's independent fetch nodes, timed relative to the plan start."""
+    def __init__(self, t0: float):
+        self.t0 = t0
+        self._futs: Dict[int, Future] = {}
+        self._fns: Dict[int, Callable[[], Any]] = {}
+        self._timing: Dict[int, Dict[str, Any]] = {}
+        self._joined: set = set()
+        self._closed = False
+        self._n = 0
+
+    def _timed(self, step: int, fn: Callable[[], Any]) -> Any:
+        if self._closed and step not in self._joined:
+            return None                  # dequeued after cancel(): nobody will read it
+        t1 = time.time()
+        try:
+            return fn()
+        finally:
+            self._timing[step] = {"start_ms": round((t1 - self.t0) * 1000, 2),
+                                  "end_ms": round((time.time() - self.t0) * 1000, 2),
+                                  "thread": threading.current_thread().name}
+
+    def submit(self, step: int, fn: Callable[[], Any]) -> None:
+        self._n += 1
+        if parallel_enabled():
+            self._futs[step] = branch_pool().submit(self._timed, step, fn)
+        else:
+            self._fns[step] = fn
+
+    def result(self, step: int) -> Any:
+        """The branch's value (its exception re-raised here), waiting for it if still running."""
+        self._joined.add(step)
+        if step in self._futs:
+            return self._futs[step].result()
+        return self._timed(step, self._fns.pop(step))
+
+    def cancel(self) -> List[int]:
+        """Drop branches the chain never joined; returns their steps. Ones already running finish unread."""
+        self._closed = True
+        skipped = sorted((set(self._futs) | set(self._fns)) - self._joined)
+        for step in skipped:
+            if step in self._futs:
+                self._futs[step].cancel()
+        self._fns.clear()
+        return skipped
+
+    def timing(self, step: int, joined_at: float) -> Dict[str, Any]:
+        """Branch window + how much of it ran while the main chain was busy (overlap_ms)."""
+        t = dict(self._timing.get(step) or {})
+        if t:
+            at = round((joined_at - self.t0) * 1000, 2)
+            t["overlap_ms"] = round(max(0.0, min(t["end_ms"], at) - t["start_ms"]), 2)
+            t["parallel"] = step in self._futs
+        return t
+
+    def __len__(self) -> int:
+        return self._n
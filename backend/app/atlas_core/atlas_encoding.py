@@ -0,0 +1,75 @@
+# atlas_encoding.py
+# Dictionary encoding for low-cardinality text columns of a TypedTable
+# - Chosen per column from load-time stats: distinct values <= DICT_MAX_CARD and <= DICT_MAX_RATIO * rows
+# - int32 codes (one per row) + one representative row per distinct value (plus one for nulls)
+# - Row-wise predicates (eq/ne/in/contains) run once per distinct value and map back through the codes
+# - Text display values are interned: equal strings share one object, output values are unchanged
+# - ATLAS_DICT_ENCODING=0 disables
+
+from __future__ import annotations
+from typing import Callable, Optional
+import os
+
+import numpy as np
+import pandas as pd
+
+DICT_MAX_CARD = 1 << 16
+DICT_MAX_RATIO = 0.5
+
+
+def dict_encoding_enabled() -> bool:
+    return os.getenv("ATLAS_DICT_ENCODING", "1") != "0"
+
+
+class DictColumn:
+    """
+    codes[i] indexes `values` (a row-subset of the column, dtype kept); nulls share the slot after
+    the last distinct value, so a lookup table computed over `values` covers every row.
+    """
+    def __init__(self, col: str, series: pd.Series, codes: np.ndarray, k: int):
+        self.col = col
+        has_na = bool((codes < 0).any())
+        uniq, first = np.unique(codes, return_index=True)      # first occurrence per code, codes sorted
+        reps = first[uniq >= 0]
+        if has_na:
+            reps = np.append(reps, first[0])
+        self.codes = np.where(codes < 0, k, codes).astype(np.int32)
+        self.values = series.iloc[reps].reset_index(drop=True)
+        self.cardinality = k
+
+    @classmethod
+    def build(cls, col: str, series: pd.Series) -> Optional["DictColumn"]:
+        """Encode when the column's stats say it pays off; None otherwise."""
+        n = len(series)
+        if not n or pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+            return None
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        k = len(uniques)
+        if k > DICT_MAX_CARD or k > DICT_MAX_RATIO * n:
+            return None
+        return cls(col, series, codes, k)
+
+    def lookup(self, fn: Callable[[pd.Series], pd.Series]) -> np.ndarray:
+        """fn applied to the distinct values, as a bool lookup table (nulls in the result -> False)."""
+        res = fn(self.values)
+        return pd.Series(res).fillna(False).to_numpy(dtype=bool)
+
+    def mask(self, fn: Callable[[pd.Series], pd.Series], pos: Optional[np.ndarray] = None) -> np.ndarray:
+        codes = self.codes if pos is None else self.codes[pos]
+        return self.lookup(fn)[codes]
+
+    def decode(self, fn: Callable[[pd.Series], pd.Series], index: pd.Index) -> pd.Series:
+        """Full-length column of fn(value) per row, e.g. the casefolded view."""
+        res = pd.Series(fn(self.values))
+        return pd.Series(res.to_numpy(dtype=object)[self.codes], index=index, dtype=res.dtype)
+
+    def interned(self, series: pd.Series) -> pd.Series:
+        """series with equal strings sharing one object (categoricals are already encoded)."""
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series
+        vals = np.asarray(self.values, dtype=object)[self.codes]
+        return pd.Series(vals, index=series.index, dtype=series.dtype, name=series.name)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes + self.values.memory_usage(deep=True, index=False))
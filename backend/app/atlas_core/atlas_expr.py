@@ -0,0 +1,420 @@
+# atlas_expr.py
+# Small compiled expression engine for the executor's `derive` op
+# - Grammar: + - * / with parentheses, numbers, 'strings', null/true/false, column names,
+#            comparisons (< <= > >= == != =), and/or/not, function calls
+# - Functions: coalesce(a, b, ...), nullif(a, v), if(cond, then, else), abs(x), round(x[, n]),
+#              date(x), today()
+# - Column-at-a-time over NumPy arrays; nulls propagate (NaN/NaT) unless coalesce'd
+# - Dates: date - date = days (float); date ± number = date shifted by that many days;
+#          a date compared with a 'YYYY-MM-DD' string parses the string
+# - compile_expr() memoizes parsed expressions, so a plan parses each expression once
+
+from __future__ import annotations
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import re
+
+import numpy as np
+import pandas as pd
+
+
+class ExprError(ValueError):
+    pass
+
+
+# ---------- Column typing ----------
+# `table` (optional): a TypedTable whose rows s indexes (s.index = table row ids). Its parsed
+# date/numeric views stand in for re-parsing s, and the kind is decided on the whole column, as the
+# executor's filters do.
+def column_kind(s: pd.Series, table: Any = None) -> str:
+    """'num' | 'dt' | 'bool' | 'str' — numeric wins over dates, as in the executor's filters."""
+    dt = s.dtype
+    if pd.api.types.is_bool_dtype(dt):
+        return "bool"
+    if pd.api.types.is_numeric_dtype(dt):
+        return "num"
+    if pd.api.types.is_datetime64_any_dtype(dt):
+        return "dt"
+    if table is not None:
+        return "num" if table.has_numeric(s.name) else ("dt" if table.has_datetime(s.name) else "str")
+    if pd.to_numeric(s, errors="coerce").notna().any():
+        return "num"
+    if pd.to_datetime(s, errors="coerce").notna().any():
+        return "dt"
+    return "str"
+
+def column_values(s: pd.Series, kind: Optional[str] = None, table: Any = None) -> np.ndarray:
+    """Typed NumPy view of a column: float64 (NaN), datetime64[ns] (NaT), bool, or object str (None)."""
+    kind = kind or column_kind(s, table)
+    if kind == "num":
+        if pd.api.types.is_integer_dtype(s.dtype) and not s.hasnans:
+            return s.to_numpy(dtype=np.int64)        # ints stay ints through + - * (like pandas)
+        if table is not None and not pd.api.types.is_numeric_dtype(s.dtype):
+            return table.as_numeric(s.name).to_numpy(dtype=np.float64, na_value=np.nan)[s.index.to_numpy()]
+        return pd.to_numeric(s, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    if kind == "dt":
+        if table is not None and not pd.api.types.is_datetime64_any_dtype(s.dtype):
+            return table.as_datetime(s.name).to_numpy(dtype="datetime64[ns]")[s.index.to_numpy()]
+        return pd.to_datetime(s, errors="coerce").to_numpy(dtype="datetime64[ns]")
+    if kind == "bool":
+        return s.fillna(False).to_numpy(dtype=bool)
+    return s.astype(object).where(s.notna(), None).to_numpy(dtype=object)
+
+
+# ---------- Tokenizer ----------
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+      (?P<num>\d+\.\d*|\.\d+|\d+)
+    | (?P<str>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    | (?P<id>[A-Za-z_][A-Za-z0-9_]*)
+    | (?P<op><=|>=|==|!=|<>|[-+*/(),<>=])
+    )""", re.VERBOSE)
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    out, pos, text = [], 0, text.strip()
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if not m or m.end() == pos:
+            raise ExprError(f"unexpected character at {pos} in {text!r}")
+        kind = m.lastgroup
+        out.append((kind, m.group(kind)))
+        pos = m.end()
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+    return out
+
+
+# ---------- Parser (recursive descent -> tuple AST) ----------
+_KEYWORDS = {"and", "or", "not", "null", "true", "false"}
+_CMP_OPS = {"<", "<=", ">", ">=", "==", "=", "!=", "<>"}
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.toks = _tokenize(text)
+        self.i = 0
+
+    def peek(self) -> Tuple[Optional[str], Optional[str]]:
+        return self.toks[self.i] if self.i < len(self.toks) else (None, None)
+
+    def take(self, val: Optional[str] = None) -> Tuple[str, str]:
+        tok = self.peek()
+        if tok[0] is None or (val is not None and tok[1].lower() != val):
+            raise ExprError(f"expected {val or 'token'} in {self.text!r}")
+        self.i += 1
+        return tok
+
+    def parse(self):
+        node = self.or_()
+        if self.i != len(self.toks):
+            raise ExprError(f"unexpected {self.peek()[1]!r} in {self.text!r}")
+        return node
+
+    def or_(self):
+        node = self.and_()
+        while self.peek()[0] == "id" and self.peek()[1].lower() == "or":
+            self.take(); node = ("or", node, self.and_())
+        return node
+
+    def and_(self):
+        node = self.not_()
+        while self.peek()[0] == "id" and self.peek()[1].lower() == "and":
+            self.take(); node = ("and", node, self.not_())
+        return node
+
+    def not_(self):
+        if self.peek()[0] == "id" and self.peek()[1].lower() == "not":
+            self.take(); return ("not", self.not_())
+        return self.cmp()
+
+    def cmp(self):
+        node = self.add()
+        if self.peek()[0] == "op" and self.peek()[1] in _CMP_OPS:
+            op = self.take()[1]
+            op = {"=": "==", "<>": "!="}.get(op, op)
+            node = ("cmp", op, node, self.add())
+        return node
+
+    def add(self):
+        node = self.mul()
+        while self.peek()[0] == "op" and self.peek()[1] in "+-":
+            op = self.take()[1]; node = ("bin", op, node, self.mul())
+        return node
+
+    def mul(self):
+        node = self.unary()
+        while self.peek()[0] == "op" and self.peek()[1] in "*/":
+            op = self.take()[1]; node = ("bin", op, node, self.unary())
+        return node
+
+    def unary(self):
+        if self.peek() == ("op", "-"):
+            self.take(); return ("neg", self.unary())
+        if self.peek() == ("op", "+"):
+            self.take(); return self.unary()
+        return self.atom()
+
+    def atom(self):
+        kind, val = self.peek()
+        if kind == "num":
+            self.take(); return ("lit", float(val) if "." in val else int(val))
+        if kind == "str":
+            self.take(); return ("lit", re.sub(r"\\(.)", r"\1", val[1:-1]))
+        if kind == "op" and val == "(":
+            self.take(); node = self.or_(); self.take(")"); return node
+        if kind == "id":
+            self.take()
+            low = val.lower()
+            if self.peek() == ("op", "("):
+                self.take()
+                args = []
+                if self.peek() != ("op", ")"):
+                    args.append(self.or_())
+                    while self.peek() == ("op", ","):
+                        self.take(); args.append(self.or_())
+                self.take(")")
+                return ("call", low, args)
+            if low in _KEYWORDS:
+                return ("lit", {"null": None, "true": True, "false": False}[low])
+            return ("col", val)
+        raise ExprError(f"unexpected {val!r} in {self.text!r}")
+
+
+# ---------- Evaluation helpers ----------
+_DAY_NS = np.timedelta64(1, "D")
+
+def _kind(v: Any) -> str:
+    if v is None:
+        return "null"
+    if isinstance(v, np.ndarray):
+        k = v.dtype.kind
+        return {"f": "num", "i": "num", "u": "num", "M": "dt", "b": "bool"}.get(k, "str")
+    if isinstance(v, (bool, np.bool_)):
+        return "bool"
+    if isinstance(v, (int, float, np.integer, np.floating)):
+        return "num"
+    if isinstance(v, np.datetime64):
+        return "dt"
+    return "str"
+
+def _isnull(v: Any) -> Any:
+    k = _kind(v)
+    if k == "null":
+        return True
+    if k == "num":
+        return np.isnan(v)
+    if k == "dt":
+        return np.isnat(v)
+    if k == "bool":
+        return np.zeros(v.shape, dtype=bool) if isinstance(v, np.ndarray) else False
+    return pd.isna(v)
+
+def _as_num(v: Any) -> Any:
+    k = _kind(v)
+    if k == "null":
+        return np.nan
+    if k == "num":
+        return v
+    if k == "bool":
+        return v.astype(np.float64) if isinstance(v, np.ndarray) else float(v)
+    raise ExprError(f"expected a number, got {k}")
+
+def _as_date(v: Any) -> Any:
+    k = _kind(v)
+    if k == "null":
+        return np.datetime64("NaT", "ns")
+    if k == "dt":
+        return v
+    if k == "str":
+        if isinstance(v, np.ndarray):
+            return pd.to_datetime(pd.Series(v), errors="coerce").to_numpy(dtype="datetime64[ns]")
+        ts = pd.to_datetime(v, errors="coerce")
+        return np.datetime64("NaT", "ns") if pd.isna(ts) else ts.to_datetime64()
+    raise ExprError(f"expected a date, got {k}")
+
+def _days(v: Any) -> Any:
+    """Number of days -> timedelta64[ns] (NaN -> NaT)."""
+    if isinstance(v, np.ndarray):
+        return pd.to_timedelta(v, unit="D").to_numpy(dtype="timedelta64[ns]")
+    return np.timedelta64("NaT", "ns") if v is None or np.isnan(v) else pd.to_timedelta(v, unit="D").to_timedelta64()
+
+def _bool(v: Any) -> Any:
+    """Truth value with nulls as False."""
+    k = _kind(v)
+    if k == "bool":
+        return v
+    if k == "null":
+        return False
+    if k == "num":
+        return (v != 0) & ~np.isnan(v)
+    raise ExprError(f"expected a condition, got {k}")
+
+def _arith(op: str, a: Any, b: Any) -> Any:
+    ka, kb = _kind(a), _kind(b)
+    if ka == "dt" or kb == "dt":
+        if op == "-" and ka == "dt" and kb in ("dt", "str"):
+            with np.errstate(invalid="ignore"):
+                return (a - _as_date(b)) / _DAY_NS           # date difference in days
+        if op in "+-" and ka == "dt" and kb in ("num", "null"):
+            return a + _days(_as_num(b)) if op == "+" else a - _days(_as_num(b))
+        if op == "+" and kb == "dt" and ka in ("num", "null"):
+            return b + _days(_as_num(a))
+        raise ExprError(f"unsupported date arithmetic: {ka} {op} {kb}")
+    a, b = _as_num(a), _as_num(b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if op == "+": return a + b
+        if op == "-": return a - b
+        if op == "*": return a * b
+        out = np.divide(a, b)
+        return np.where(np.asarray(b) == 0, np.nan, out) if isinstance(out, np.ndarray) else (np.nan if b == 0 else out)
+
+_CMP = {"<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+        "==": np.equal, "!=": np.not_equal}
+
+def _compare(op: str, a: Any, b: Any) -> Any:
+    ka, kb = _kind(a), _kind(b)
+    if "null" in (ka, kb):
+        return False if op != "!=" else True
+    if ka == "dt" or kb == "dt":
+        a, b = _as_date(a), _as_date(b)
+    elif ka in ("num", "bool") or kb in ("num", "bool"):
+        if ka == "str":
+            a = pd.to_numeric(pd.Series(a) if isinstance(a, np.ndarray) else a, errors="coerce")
+            a = a.to_numpy(dtype=np.float64, na_value=np.nan) if isinstance(a, pd.Series) else float(a)
+        if kb == "str":
+            b = pd.to_numeric(pd.Series(b) if isinstance(b, np.ndarray) else b, errors="coerce")
+            b = b.to_numpy(dtype=np.float64, na_value=np.nan) if isinstance(b, pd.Series) else float(b)
+        a, b = _as_num(a), _as_num(b)
+    else:
+        # text: case-insensitive, like the executor's eq filters
+        fold = lambda v: pd.Series(v, dtype=object).str.casefold().to_numpy(dtype=object) \
+            if isinstance(v, np.ndarray) else str(v).casefold()
+        a, b = fold(a), fold(b)
+        nulls = _isnull(a) | _isnull(b)
+        with np.errstate(invalid="ignore"):
+            res = _CMP[op](np.where(nulls, "", a), np.where(nulls, "", b)) if isinstance(nulls, np.ndarray) \
+                else _CMP[op](a, b)
+        return (res & ~nulls) if op != "!=" else (res | nulls)
+    nulls = _isnull(a) | _isnull(b)
+    with np.errstate(invalid="ignore"):
+        res = _CMP[op](a, b)
+    return (res & ~nulls) if op != "!=" else (res | nulls)
+
+def _coalesce(*vals: Any) -> Any:
+    if not vals:
+        raise ExprError("coalesce() needs at least one argument")
+    kinds = {_kind(v) for v in vals} - {"null"}
+    if "dt" in kinds:
+        vals = tuple(_as_date(v) for v in vals)
+    elif "num" in kinds:
+        vals = tuple(_as_num(v) if _kind(v) in ("num", "bool", "null") else v for v in vals)
+    out = vals[0]
+    for v in vals[1:]:
+        nulls = _isnull(out)
+        if not np.any(nulls):
+            break
+        out = np.where(nulls, v, out) if isinstance(nulls, np.ndarray) else v
+    return out
+
+def _nullif(a: Any, v: Any) -> Any:
+    hit = _compare("==", a, v)
+    if _kind(a) == "dt":
+        return np.where(hit, np.datetime64("NaT", "ns"), a)
+    if _kind(a) == "str":
+        return np.where(hit, None, a)
+    a = _as_num(a)
+    return np.where(hit, np.nan, a) if isinstance(a, np.ndarray) or isinstance(hit, np.ndarray) else (np.nan if hit else a)
+
+def _if(c: Any, a: Any, b: Any) -> Any:
+    ka, kb = _kind(a), _kind(b)
+    if "dt" in (ka, kb):
+        a, b = _as_date(a), _as_date(b)
+    elif ka in ("num", "null") and kb in ("num", "null"):
+        a, b = _as_num(a), _as_num(b)
+    return np.where(_bool(c), a, b)
+
+def _round(x: Any, n: Any = 0) -> Any:
+    return np.round(_as_num(x), int(_as_num(n)))
+
+_FUNCS: Dict[str, Tuple[Callable[..., Any], int, int]] = {   # name -> (fn, min args, max args)
+    "coalesce": (_coalesce, 1, 64),
+    "nullif":   (_nullif, 2, 2),
+    "if":       (_if, 3, 3),
+    "abs":      (lambda x: np.abs(_as_num(x)), 1, 1),
+    "round":    (_round, 1, 2),
+    "date":     (_as_date, 1, 1),
+    "today":    (lambda: pd.Timestamp.today().normalize().to_datetime64(), 0, 0),
+}
+
+
+# ---------- Compilation ----------
+Resolver = Callable[[str], np.ndarray]
+
+def _compile(node) -> Callable[[Resolver], Any]:
+    tag = node[0]
+    if tag == "lit":
+        v = node[1]
+        return lambda r: v
+    if tag == "col":
+        name = node[1]
+        return lambda r: r(name)
+    if tag == "neg":
+        f = _compile(node[1])
+        return lambda r: -_as_num(f(r))
+    if tag == "not":
+        f = _compile(node[1])
+        return lambda r: ~np.asarray(_bool(f(r)))
+    if tag in ("and", "or"):
+        fa, fb = _compile(node[1]), _compile(node[2])
+        if tag == "and":
+            return lambda r: np.logical_and(_bool(fa(r)), _bool(fb(r)))
+        return lambda r: np.logical_or(_bool(fa(r)), _bool(fb(r)))
+    if tag == "bin":
+        op, fa, fb = node[1], _compile(node[2]), _compile(node[3])
+        return lambda r: _arith(op, fa(r), fb(r))
+    if tag == "cmp":
+        op, fa, fb = node[1], _compile(node[2]), _compile(node[3])
+        return lambda r: _compare(op, fa(r), fb(r))
+    if tag == "call":
+        name, args = node[1], node[2]
+        if name not in _FUNCS:
+            raise ExprError(f"unknown function {name}()")
+        fn, lo, hi = _FUNCS[name]
+        if not lo <= len(args) <= hi:
+            raise ExprError(f"{name}() takes {lo}..{hi} arguments, got {len(args)}")
+        fargs = [_compile(a) for a in args]
+        return lambda r: fn(*[f(r) for f in fargs])
+    raise ExprError(f"bad node {tag}")
+
+def _columns(node, out: List[str]) -> List[str]:
+    if node[0] == "col":
+        if node[1] not in out:
+            out.append(node[1])
+    elif node[0] == "call":
+        for a in node[2]:
+            _columns(a, out)
+    else:
+        for child in node[1:]:
+            if isinstance(child, tuple):
+                _columns(child, out)
+    return out
+
+
+class CompiledExpr:
+    """A parsed expression: .columns lists referenced names; .evaluate(resolver, n) -> length-n array."""
+    def __init__(self, text: str):
+        self.text = text
+        ast = _Parser(text).parse()
+        self.columns: Tuple[str, ...] = tuple(_columns(ast, []))
+        self._fn = _compile(ast)
+
+    def evaluate(self, resolve: Resolver, n: int) -> np.ndarray:
+        v = self._fn(resolve)
+        if not isinstance(v, np.ndarray) or v.ndim == 0:
+            v = np.full(n, None if v is None else v, dtype=object if (v is None or isinstance(v, str)) else None)
+        return v
+
+
+@lru_cache(maxsize=512)
+def compile_expr(text: str) -> CompiledExpr:
+    return CompiledExpr(text)
@@ -0,0 +1,226 @@
+# atlas_indexes.py
+# In-memory secondary indexes built once per loaded source (see TypedTable)
+# - HashIndex: value -> row positions for eq / in point lookups on key columns
+# - SortedIndex: pre-typed sorted keys for gt/ge/lt/le via binary search; results as row bitmaps
+# - JoinIndex: equi-join row-id pairs between two tables on shared keys; joins become gathers
+# - TrigramIndex: trigram postings over a text column's distinct values; `contains` verifies candidates only
+# Row positions are 0-based offsets into the table's frame. HashIndex returns them sorted
+# so callers can .iloc[] them without disturbing the original row order.
+
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+# High-value key columns that get a hash index when present in a source
+HASH_INDEX_COLS = ("po_number", "so_number", "lpn_number", "serial_number", "item", "organization_id")
+
+# Source pairs that share join keys; their JoinIndex is built once and reused by the join op
+JOIN_INDEX_PAIRS = (
+    ("ONHAND", ("organization_id", "item"), "PO", ("organization_id", "item")),
+    ("SO", ("delivery_number",), "LPN", ("delivery_number",)),
+    ("LPN", ("lpn_number",), "LPN_SERIALS", ("lpn_number",)),
+)
+
+# Free-text columns `contains` filters hit most; a TrigramIndex is built on first use
+TRIGRAM_INDEX_COLS = ("po_status", "vendor_name", "customer_or_site_name", "Context_Summary")
+
+_EMPTY = np.empty(0, dtype=np.int64)
+_REGEX_META = frozenset(".^$*+?{}[]\\|()")
+
+
+class HashIndex:
+    """
+    Value -> row positions for one column, matching PlanExecutor._eq_mask semantics:
+      • text columns are keyed by their casefolded string
+      • numeric columns are keyed by value; `in` (string semantics) uses a lazy str(value) view
+    """
+    def __init__(self, col: str, values: pd.Series, numeric: bool):
+        self.col = col
+        self.numeric = numeric
+        keys = values.reset_index(drop=True)
+        self._pos: Dict[Any, np.ndarray] = keys.groupby(keys.to_numpy(), sort=False).indices
+        self._str_pos: Optional[Dict[str, np.ndarray]] = None
+        self.n_keys = len(self._pos)
+
+    def lookup_eq(self, v: Any) -> Optional[np.ndarray]:
+        """Positions equal to v, or None when the value can't be answered from the index."""
+        if self.numeric:
+            vnum = pd.to_numeric(v, errors="coerce")
+            if pd.isna(vnum):
+                return None        # _eq_mask falls back to a string compare here
+            return self._pos.get(vnum, _EMPTY)
+        return self._pos.get(str(v).casefold(), _EMPTY)
+
+    def lookup_in(self, vals: Iterable[Any]) -> np.ndarray:
+        """Positions whose casefolded string form is in vals (the `in` op compares as text)."""
+        if self.numeric:
+            if self._str_pos is None:
+                self._str_pos = {str(k).casefold(): p for k, p in self._pos.items()}
+            table = self._str_pos
+        else:
+            table = self._pos
+        hits = [table[k] for k in {str(v).casefold() for v in vals} if k in table]
+        if not hits:
+            return _EMPTY
+        return np.unique(np.concatenate(hits)) if len(hits) > 1 else hits[0]
+
+
+class SortedIndex:
+    """
+    Sorted, pre-typed keys of one column (datetime64 or float) for range predicates.
+    Nulls (NaT/NaN) are left out: they never satisfy an ordered comparison.
+    """
+    _SIDES = {"gt": ("right", 1), "ge": ("left", 1), "lt": ("left", -1), "le": ("right", -1)}
+
+    def __init__(self, col: str, values: pd.Series, kind: str):
+        self.col = col
+        self.kind = kind                   # "dt" | "num" — which typed view the keys came from
+        self.n_rows = len(values)
+        arr = values.to_numpy()
+        valid = np.flatnonzero(~pd.isna(arr))
+        order = np.argsort(arr[valid], kind="stable")
+        self.order = valid[order]          # row positions in key order
+        self.keys = arr[self.order]
+
+    def _probe(self, b: Any) -> Any:
+        if self.kind == "dt":
+            return pd.Timestamp(b).to_datetime64()   # keeps ns precision (np.datetime64(ts) would not)
+        return float(b)
+
+    def positions(self, op: str, b: Any) -> np.ndarray:
+        """Row positions satisfying <col> <op> b (op in gt/ge/lt/le), in key order."""
+        side, direction = self._SIDES[op]
+        cut = np.searchsorted(self.keys, self._probe(b), side=side)
+        return self.order[cut:] if direction > 0 else self.order[:cut]
+
+    def bitmap(self, op: str, b: Any) -> np.ndarray:
+        bits = np.zeros(self.n_rows, dtype=bool)
+        bits[self.positions(op, b)] = True
+        return bits
+
+
+def join_keys_compatible(left: pd.Series, right: pd.Series) -> bool:
+    """merge() refuses numeric-vs-text keys; the index only serves pairs merge would accept."""
+    num = pd.api.types.is_numeric_dtype
+    return num(left.dtype) == num(right.dtype)
+
+
+class JoinIndex:
+    """
+    Equi-join of two whole tables on key columns, kept as row-id ranges:
+    left row i matches right rows order[lo[i]:hi[i]] (right table order).
+    Null keys match each other, as in DataFrame.merge.
+    """
+    def __init__(self, left: pd.DataFrame, left_keys: Sequence[str],
+                 right: pd.DataFrame, right_keys: Sequence[str]):
+        self.left_keys, self.right_keys = tuple(left_keys), tuple(right_keys)
+        self.n_left, self.n_right = len(left), len(right)
+        lcode = np.zeros(self.n_left, dtype=np.int64)
+        rcode = np.zeros(self.n_right, dtype=np.int64)
+        for lk, rk in zip(self.left_keys, self.right_keys):
+            both = pd.concat([left[lk], right[rk]], ignore_index=True)
+            codes, uniq = pd.factorize(both, use_na_sentinel=False)
+            # fold this key into the running code, then re-densify so codes never overflow
+            combined = np.concatenate([lcode, rcode]) * max(len(uniq), 1) + codes
+            dense, _ = pd.factorize(combined)
+            lcode, rcode = dense[:self.n_left].astype(np.int64), dense[self.n_left:].astype(np.int64)
+        self.order = np.argsort(rcode, kind="stable")
+        rsorted = rcode[self.order]
+        self.lo = np.searchsorted(rsorted, lcode, side="left")
+        self.hi = np.searchsorted(rsorted, lcode, side="right")
+        self.n_pairs = int((self.hi - self.lo).sum())
+
+    def gather(self, left_pos: np.ndarray, right_keep: Optional[np.ndarray] = None,
+               how: str = "inner") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row pairs for joining left rows `left_pos` (in that order) with the right table.
+        Returns (i, r): i indexes into left_pos, r is a right-table row id (-1 = no match, how="left").
+        right_keep optionally restricts matches to a boolean mask of surviving right rows.
+        """
+        lo, hi = self.lo[left_pos], self.hi[left_pos]
+        cnt = hi - lo
+        total = int(cnt.sum())
+        i = np.repeat(np.arange(len(left_pos), dtype=np.int64), cnt)
+        starts = np.repeat(lo - (np.cumsum(cnt) - cnt), cnt)
+        r = self.order[starts + np.arange(total, dtype=np.int64)] if total else _EMPTY
+        if right_keep is not None and total:
+            keep = right_keep[r]
+            i, r = i[keep], r[keep]
+        if how == "left":
+            matched = np.zeros(len(left_pos), dtype=bool)
+            matched[i] = True
+            miss = np.flatnonzero(~matched)
+            if len(miss):
+                i = np.concatenate([i, miss])
+                r = np.concatenate([r, np.full(len(miss), -1, dtype=np.int64)])
+                o = np.argsort(i, kind="stable")
+                i, r = i[o], r[o]
+        return i, r
+
+
+def _trigram_ids(text: str) -> List[int]:
+    b = text.encode("ascii")
+    return sorted({(b[j] << 16) | (b[j + 1] << 8) | b[j + 2] for j in range(len(b) - 2)})
+
+class TrigramIndex:
+    """
+    Trigram postings over the distinct str-cast values of one column, for the `contains` op
+    (str.contains(pattern, case=False), a regex):
+      • a literal ASCII pattern of 3+ chars narrows to the values holding all of its lowercased
+        trigrams; only those are tested with the exact str.contains call
+      • values with non-ASCII characters are always candidates (regex IGNORECASE folds a few of
+        them onto ASCII letters, lower() doesn't)
+      • anything else (short or regex patterns) returns None and the caller scans
+    Postings are one sorted (trigram, value id) array, built vectorized over the joined text.
+    """
+    def __init__(self, col: str, series: pd.Series):
+        self.col = col
+        text = series.astype(str)
+        codes, uniq = pd.factorize(text, use_na_sentinel=True)
+        self.codes = codes.astype(np.int32)          # -1: null, never matches (na=False)
+        self.values = pd.Series(uniq, dtype=text.dtype)
+        k = len(self.values)
+        low = self.values.str.lower()
+        plain = (low.map(str.isascii) & ~low.str.contains("\0", regex=False)).to_numpy(dtype=bool)
+        self.always = np.flatnonzero(~plain).astype(np.int32)
+        ids = np.flatnonzero(plain)
+        self._tri = self._own = _EMPTY
+        if len(ids):
+            # "\0"-separated ASCII buffer -> one 24-bit id per position, owner value id per position
+            b = np.frombuffer(("\0".join(low.iloc[ids]) + "\0").encode("ascii"), dtype=np.uint8).astype(np.int64)
+            owner = np.repeat(ids, low.iloc[ids].str.len().to_numpy() + 1)[:-2]
+            tri = (b[:-2] << 16) | (b[1:-1] << 8) | b[2:]
+            ok = (b[:-2] != 0) & (b[1:-1] != 0) & (b[2:] != 0)
+            key = np.sort(tri[ok] * k + owner[ok])     # by trigram, then value id
+            key = key[np.concatenate(([True], key[1:] != key[:-1]))]
+            self._tri, self._own = key // k, (key % k).astype(np.int32)
+
+    def _posting(self, g: int) -> np.ndarray:
+        lo, hi = np.searchsorted(self._tri, [g, g + 1])
+        return self._own[lo:hi]
+
+    def candidates(self, pattern: Any) -> Optional[np.ndarray]:
+        """Sorted distinct-value ids that may contain pattern; None when the index can't narrow it."""
+        p = str(pattern)
+        if len(p) < 3 or not p.isascii() or any(ch in _REGEX_META for ch in p):
+            return None
+        posts = sorted((self._posting(g) for g in _trigram_ids(p.lower())), key=len)
+        cand = posts[0]
+        for post in posts[1:]:
+            if not len(cand):
+                break
+            cand = np.intersect1d(cand, post, assume_unique=True)
+        return np.union1d(cand, self.always)
+
+    def mask(self, pattern: Any, pos: Optional[np.ndarray] = None) -> Optional[Tuple[np.ndarray, int]]:
+        """(row mask over pos or all rows, candidate value count), or None to fall back to a scan."""
+        cand = self.candidates(pattern)
+        if cand is None:
+            return None
+        lut = np.zeros(len(self.values) + 1, dtype=bool)   # last slot: nulls (code -1)
+        if len(cand):
+            hit = self.values.iloc[cand].str.contains(str(pattern), case=False, na=False)
+            lut[cand] = hit.to_numpy(dtype=bool)
+        codes = self.codes if pos is None else self.codes[pos]
+        return lut[codes], int(len(cand))
@@ -5,15 +5,83 @@
 # - Column normalization (aliases + case-insensitive + semantic)
 # - Canonicalization for ONHAND (map header variants -> onhand_qty, available_qty)
 # - Robust, type-aware filtering in PlanExecutor (so "101" == 101)
+# - DataFrame carried between steps; records materialized once at the end
+# - TypedTable: each source canonicalized/typed once at load (dates, qty, status, casefold)
+# - CSVs load through the columnar snapshot cache (atlas_snapshot.py)
+# - Hash indexes on key columns answer eq/in filters (atlas_indexes.py); lineage notes index use
+# - Sorted range indexes on date/qty columns answer gt/ge/lt/le filters by binary search
+# - Join right side: right_filters pushed through _apply_filters, projected to keys + used columns
+# - topk / sort-with-limit on numeric keys use partial selection (argpartition + stable ties)
+# - Plan-level result cache keyed by plan hash + source data versions (atlas_result_cache.py)
+# - derive: compiled vectorized expressions (atlas_expr.py): parens, constants, coalesce, if, date diffs
+# - Join index per source pair (atlas_indexes.JoinIndex): filter -> join becomes a gather of row-id pairs
+# - Sources reload when their CSV changes; materialized rollups (atlas_rollups.py) fold appended rows
+#   and answer matching aggregates from pre-grouped partials
+# - Low-cardinality text columns are dictionary-encoded at load (atlas_encoding.py); eq/ne/in/contains
+#   run once per distinct value instead of per row
+# - contains on free-text columns goes through a trigram index (candidates, then exact verify)
+# - Sources larger than the memory budget stream in chunks (atlas_chunked.py); meta["chunked"] reports it
+# - run_batch: plans filtering the same source share one predicate scan (atlas_batch.py)
+# - Join right-side fetches are independent DAG branches (atlas_dag.py): they run on a thread pool
+#   from the start of the plan; join lineage reports the fetch window and its overlap
+# - Per-request profiling hooks (atlas_profile.py): run(plan, profile=True) adds wall/CPU/memory,
+#   bytes out and index/cache hits to each lineage entry
+# - Opt-in approximate aggregate/distinct (atlas_approx.py): stratified samples, HyperLogLog and
+#   count-min estimates with bounds; sets meta["approximate"] and the APPROXIMATE badge
+# - Per-source adapter in csv_path.json: {"path": ..., "adapter": "sqlite"|"duckdb"} mirrors the table
+#   into an embedded SQL engine (atlas_sql.py); plans over it push their filter/join/aggregate/sort/
+#   topk/distinct prefix down as one query and report it in meta["sql"]
+# - Column names resolve through a ColumnResolver compiled once per (source, schema): aliases, casing
+#   and semantic candidates are one dict lookup for every step
+# - Per-query memory budget (atlas_budget.py): joins are sized before they build rows and stop at
+#   MAX_ROWS_STEP; step outputs over ATLAS_QUERY_BUDGET_MB spill to a temp columnar file or stop the
+#   query; lineage[i]["memory"] and meta["memory"] report usage
+# - Limit pushdown: a filter with no later sort/topk/aggregate/distinct scans growing row blocks and
+#   stops once its limit is met (ATLAS_LIMIT_PUSHDOWN=0 disables); lineage reports "limit_scan"
 
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, Any, List, Optional, Tuple, Protocol
-import os, time, json, re
+from functools import lru_cache
+from typing import Callable, Dict, Any, List, Optional, Tuple, Protocol
+import os, time, json, re, threading
 # Some blocks use _re; make it an alias to the stdlib 're'
 _re = re
+import numpy as np
 import pandas as pd
 
+try:
+    from atlas_core.atlas_snapshot import load_csv as _load_csv_snapshot
+    from atlas_core.atlas_indexes import HashIndex, SortedIndex, HASH_INDEX_COLS
+    from atlas_core.atlas_indexes import JoinIndex, JOIN_INDEX_PAIRS, join_keys_compatible
+    from atlas_core.atlas_indexes import TrigramIndex, TRIGRAM_INDEX_COLS
+    from atlas_core.atlas_rollups import RollupStore, rollups_enabled
+    from atlas_core.atlas_encoding import DictColumn, dict_encoding_enabled
+    from atlas_core.atlas_chunked import chunk_spec, run_chunked
+    from atlas_core.atlas_batch import SharedScan, shared_scans
+    from atlas_core.atlas_dag import Branches, plan_dag
+    from atlas_core.atlas_profile import ProfileHook, resolve_profiler
+    from atlas_core.atlas_approx import approx_aggregate, approx_distinct, approx_settings, maybe_approximate
+    from atlas_core.atlas_sql import SQL_ADAPTERS, SqlMirror, csv_entry, filter_rows, make_engine, run_sql, sql_enabled, sql_spec
+    from atlas_core.atlas_result_cache import ResultCache, plan_cache_key, plan_sources, result_cache_enabled
+    from atlas_core.atlas_expr import compile_expr, column_kind, column_values
+    from atlas_core.atlas_budget import BudgetExceeded, QueryBudget, row_bytes
+except ImportError:  # local package relative import
+    from .atlas_snapshot import load_csv as _load_csv_snapshot
+    from .atlas_indexes import HashIndex, SortedIndex, HASH_INDEX_COLS
+    from .atlas_indexes import JoinIndex, JOIN_INDEX_PAIRS, join_keys_compatible
+    from .atlas_indexes import TrigramIndex, TRIGRAM_INDEX_COLS
+    from .atlas_rollups import RollupStore, rollups_enabled
+    from .atlas_encoding import DictColumn, dict_encoding_enabled
+    from .atlas_chunked import chunk_spec, run_chunked
+    from .atlas_batch import SharedScan, shared_scans
+    from .atlas_dag import Branches, plan_dag
+    from .atlas_profile import ProfileHook, resolve_profiler
+    from .atlas_approx import approx_aggregate, approx_distinct, approx_settings, maybe_approximate
+    from .atlas_sql import SQL_ADAPTERS, SqlMirror, csv_entry, filter_rows, make_engine, run_sql, sql_enabled, sql_spec
+    from .atlas_result_cache import ResultCache, plan_cache_key, plan_sources, result_cache_enabled
+    from .atlas_expr import compile_expr, column_kind, column_values
+    from .atlas_budget import BudgetExceeded, QueryBudget, row_bytes
+
 def _now() -> float:
     return time.time()
 
@@ -44,9 +112,11 @@ ALLOWED_SOURCES = {"PO","IR","ONHAND","SO","LPN","LPN_SERIAL","LPN_SERIALS","LPN
 ALLOWED_OPS     = {"filter","vector","aggregate","join","sort","topk","distinct", "derive"}
 
 # Debug-friendly: executor-side clear (noop today)
+_RESULT_CACHE = ResultCache.from_env()
+
 def clear_executor_caches():
-    # If you ever add per-source DF caches, clear them here.
-    return
+    # Loaded tables stay (they are keyed by file content); computed results are flushed.
+    _RESULT_CACHE.clear()
 
 
 # ---------- CSV registry / aliases ----------
@@ -63,13 +133,13 @@ def _load_csv_map() -> Dict[str, str]:
             data["LPN_SERIAL"] = data["LPN_SERIALS"]
 
         return {
-            "PO": data.get("PO"),
-            "IR": data.get("IR"),
-            "SO": data.get("SO"),
-            "ONHAND": data.get("ONHAND"),
-            "LPN": data.get("LPN"),
-            "LPN_SERIAL": data.get("LPN_SERIAL"),
-            "LPN_SERIALS_AGG": data.get("LPN_SERIALS_AGG"),
+            "PO": csv_entry(data.get("PO"))[0],
+            "IR": csv_entry(data.get("IR"))[0],
+            "SO": csv_entry(data.get("SO"))[0],
+            "ONHAND": csv_entry(data.get("ONHAND"))[0],
+            "LPN": csv_entry(data.get("LPN"))[0],
+            "LPN_SERIAL": csv_entry(data.get("LPN_SERIAL"))[0],
+            "LPN_SERIALS_AGG": csv_entry(data.get("LPN_SERIALS_AGG"))[0],
         }
     # Fallback filenames (relative to ATLAS_DATA_DIR if set)
     return {
@@ -176,113 +246,407 @@ COLUMN_ALIASES: Dict[str, Dict[str, str]] = {
     },
 }
 
-# ---------------- Column helpers ----------------
-def _lower_set(cols): 
-    return {str(c).lower() for c in cols}
-
-def _resolve_col_name(df_cols, desired):
-    low = str(desired).lower()
-    for c in df_cols:
-        if str(c).lower() == low:
-            return c
-    return None
+# Semantic fallbacks: when a (aliased) column isn't in the frame, the first candidate that is.
+# Per source: (lowercased names that trigger the list, candidates in preference order).
+SEMANTIC_CANDIDATES: Dict[str, List[Tuple[Tuple[str, ...], List[str]]]] = {
+    "ONHAND": [
+        (("onhand_qty", "onhand"),
+         ["onhand_qty","on_hand_qty","on_hand","onhand",
+          "qty_on_hand","onhandquantity","on_hand_quantity",
+          "total_onhand_qty","total_on_hand","total_on_hand_qty"]),
+        (("available_qty", "available"),
+         ["available_qty","available_quantity","available",
+          "qty_available","availableqty","total_available_qty","total_available"]),
+        (("organization_id","site","org","org_id"),
+         ["organization_id","org_id","site","site_code","org","site_id"]),
+        (("item","sku","item_id"),
+         ["item","sku","item_id","item number","item_number"]),
+        (("reserved_qty", "reserved", "reservedqty", "reserved qty", "reserved quantity"),
+         ["reserved_qty", "reservedquantity", "reserved qty", "reserved", "reserved-qty"]),
+    ],
+}
 
-def _map_col(source: str, col: str) -> str:
-    return COLUMN_ALIASES.get(source, {}).get(str(col).lower(), col)
+# ---------------- Column helpers ----------------
+_SQUASH_RE = re.compile(r"[\s\-_]+")
 
 def _semantic_candidates(source: Optional[str], desired: str) -> List[str]:
-    s = (source or "").upper()
     d = str(desired).lower()
-    if s == "ONHAND":
-        if d in ("onhand_qty", "onhand"):
-            return [
-                "onhand_qty","on_hand_qty","on_hand","onhand",
-                "qty_on_hand","onhandquantity","on_hand_quantity",
-                "total_onhand_qty","total_on_hand","total_on_hand_qty"
-            ]
-        if d in ("available_qty", "available"):
-            return [
-                "available_qty","available_quantity","available",
-                "qty_available","availableqty","total_available_qty","total_available"
-            ]
-        if d in ("organization_id","site","org","org_id"):
-            return ["organization_id","org_id","site","site_code","org","site_id"]
-        if d in ("item","sku","item_id"):
-            return ["item","sku","item_id","item number","item_number"]
-        if d in ("reserved_qty", "reserved", "reservedqty", "reserved qty", "reserved quantity"):
-            return ["reserved_qty", "reservedquantity", "reserved qty", "reserved", "reserved-qty"]
-
+    for triggers, cands in SEMANTIC_CANDIDATES.get((source or "").upper(), []):
+        if d in triggers:
+            return cands
     return []
 
-def _try_semantic(df_cols, candidates: List[str]) -> Optional[str]:
-    low = {str(c).lower(): c for c in df_cols}
-    for cand in candidates or []:
-        if cand.lower() in low:
-            return low[cand.lower()]
-    return None
-
-def _fuzzy_semantic(df_cols, tokens: List[str]) -> Optional[str]:
-    cols = [str(c) for c in df_cols]
-    for c in cols:
-        lc = c.lower()
-        if all(t in lc for t in tokens):
-            return c
-    return None
-
-def _normalize_cols_for_source(source: Optional[str], df_cols, cols: List[str]) -> List[str]:
-    src = source or "ALL"
-    out = []
-    df_low = _lower_set(df_cols)
-    for c in (cols or []):
-        aliased = _map_col(src, c) if src in COLUMN_ALIASES else c
-        if str(aliased) in df_cols or str(aliased).lower() in df_low:
-            ci = _resolve_col_name(df_cols, aliased) or aliased
-            out.append(ci); continue
-        sem = _try_semantic(df_cols, _semantic_candidates(src, aliased))
-        out.append(sem if sem is not None else aliased)
-    return out
-
-def _normalize_metrics_for_source(source: Optional[str], df_cols, metrics: List[tuple]) -> List[tuple]:
-    fixed = []
-    for (col, agg) in metrics or []:
-        col2 = _normalize_cols_for_source(source, df_cols, [col])[0]
-        fixed.append((col2, agg))
-    return fixed
+class ColumnResolver:
+    """
+    One source's column names compiled once per schema (see column_resolver): every alias, casing
+    and semantic candidate maps to its physical column in a single dict lookup. Resolution order is
+    COLUMN_ALIASES, then case-insensitive match (first column wins), then SEMANTIC_CANDIDATES;
+    names that resolve to nothing come back aliased, as callers report them as missing.
+    """
+    __slots__ = ("source", "columns", "_alias", "_map")
+
+    def __init__(self, source: str, columns: Tuple[Any, ...]):
+        self.source, self.columns = source, columns
+        self._alias = COLUMN_ALIASES.get(source, {})
+        fold: Dict[str, Any] = {}
+        for c in columns:
+            fold.setdefault(str(c).lower(), c)
+        triggers = [t for (ts, _) in SEMANTIC_CANDIDATES.get(source.upper(), []) for t in ts]
+        self._map: Dict[str, Any] = {}
+        for key in (*fold, *self._alias, *triggers):
+            target = str(self._alias.get(key, key)).lower()
+            hit = fold.get(target)
+            if hit is None:
+                hit = next((fold[c.lower()] for c in _semantic_candidates(source, target) if c.lower() in fold), None)
+            if hit is not None:
+                self._map[key] = hit
+
+    def find(self, name: Any) -> Optional[Any]:
+        """Physical column for name, or None."""
+        return self._map.get(str(name).lower())
+
+    def col(self, name: Any) -> Any:
+        key = str(name).lower()
+        hit = self._map.get(key)
+        return hit if hit is not None else self._alias.get(key, name)
+
+    def cols(self, names: Optional[List[Any]]) -> List[Any]:
+        return [self.col(n) for n in (names or [])]
+
+    def metrics(self, metrics: Optional[List[tuple]]) -> List[tuple]:
+        return [(self.col(c), agg) for (c, agg) in (metrics or [])]
+
+    def sort_col(self, name: Any) -> Any:
+        """col(), also accepting spaced/dashed spellings of alias keys ("on-hand" -> onhand)."""
+        key = str(name).lower()
+        if key not in self._alias:
+            squashed = _SQUASH_RE.sub("", key)
+            if squashed in self._alias:
+                return self.col(self._alias[squashed])
+        return self.col(name)
+
+    def containing(self, *tokens: str) -> Optional[Any]:
+        """First column whose lowercased name contains every token."""
+        return next((c for c in self.columns if all(t in str(c).lower() for t in tokens)), None)
+
+@lru_cache(maxsize=1024)
+def _compile_resolver(source: str, columns: Tuple[Any, ...]) -> ColumnResolver:
+    return ColumnResolver(source, columns)
+
+def column_resolver(source: Optional[str], df_cols) -> ColumnResolver:
+    """The memoized ColumnResolver for (source, column names); frames over one schema share it."""
+    return _compile_resolver(source or "ALL", tuple(df_cols.tolist() if isinstance(df_cols, pd.Index) else df_cols))
 
 def _canonicalize_df(source: Optional[str], df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str,str]]:
     src = (source or "").upper()
     if src != "ONHAND" or df.empty:
         return df, {}
     renames: Dict[str, str] = {}
-    oh = _try_semantic(df.columns, _semantic_candidates("ONHAND", "onhand_qty")) or \
-         _fuzzy_semantic(df.columns, ["on","hand"]) or _fuzzy_semantic(df.columns, ["onhand"])
+    cr = column_resolver("ONHAND", df.columns)
+    oh = cr.find("onhand_qty") or cr.containing("on", "hand") or cr.containing("onhand")
     if oh and oh != "onhand_qty": renames[oh] = "onhand_qty"
-    av = _try_semantic(df.columns, _semantic_candidates("ONHAND", "available_qty")) or \
-         _fuzzy_semantic(df.columns, ["avail"]) or _fuzzy_semantic(df.columns, ["available"])
+    av = cr.find("available_qty") or cr.containing("avail") or cr.containing("available")
     if av and av != "available_qty": renames[av] = "available_qty"
     if renames: df = df.rename(columns=renames)
     return df, renames
 
+# ---------- Projection pushdown ----------
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+def _columns_used_after(steps: List[Any], start: int) -> Optional[List[str]]:
+    """
+    Column names referenced by steps[start:] up to the first step that closes the schema
+    (aggregate, or a filter that starts a new input). None when the final rows keep every column.
+    """
+    used: List[str] = []
+    for s in steps[start:]:
+        p = getattr(s, "params", None) or {}
+        if s.op in ("filter", "vector"):
+            return used
+        if s.op == "aggregate":
+            return used + list(p.get("by") or []) + [c for (c, _) in (p.get("metrics") or [])]
+        if s.op == "derive":
+            for e in p.get("expressions") or []:
+                used += _IDENT_RE.findall(e.get("expr") or "")
+        elif s.op in ("sort", "topk"):
+            by = p.get("by") or p.get("sort_by") or []
+            used += [by] if isinstance(by, str) else list(by)
+        elif s.op == "distinct":
+            used += list(p.get("cols") or [])
+        elif s.op == "join":
+            used += [l for (l, _) in (p.get("on_pairs") or [])]
+    return None
+
+def _right_keep(right_cols: List[str], right_keys: List[str], wanted: Optional[set],
+                explicit: bool, left_cols: List[str]) -> List[str]:
+    """
+    Right-side columns a join carries: keys plus `wanted` (normalized names; None keeps all). An explicit
+    right_select is taken as is; an inferred projection also keeps names shared with the left, so merge
+    suffixes (_x/_y) don't shift under the rest of the plan.
+    """
+    if wanted is None:
+        return list(right_cols)
+    return [c for c in right_cols if c in right_keys or c in wanted or (not explicit and c in left_cols)]
+
+_LIMIT_BLIND_OPS = {"sort", "topk", "aggregate", "distinct"}   # consume every row they are given
+
+def _limit_pushable(steps: List[Any], start: int) -> bool:
+    """
+    True when the filter at steps[start-1] can stop scanning at its limit: no later step orders,
+    groups or dedups. Those plans treat the limit as a safety cap and want every matching row, so a
+    block scan there would rarely stop early.
+    """
+    if os.getenv("ATLAS_LIMIT_PUSHDOWN", "1") == "0":
+        return False
+    return not any(s.op in _LIMIT_BLIND_OPS for s in steps[start:])
+
+def _limit_blocks(n: int, first: int):
+    """Row ranges [lo, hi) covering n rows, doubling from `first` so a scan that runs to the end stays cheap."""
+    lo, size = 0, first
+    while lo < n:
+        yield lo, min(n, lo + size)
+        lo, size = lo + size, size * 2
+
+# ---------- Top-k selection ----------
+def _topk_positions(key: pd.Series, k: int, ascending: bool) -> Optional[np.ndarray]:
+    """
+    Row positions of sort_values(key, ascending, kind="mergesort").head(k) via partial selection:
+    O(n) argpartition for the cut, then a stable sort of the ~k candidates only.
+    Returns None when a full sort is just as cheap (k covers the non-null rows).
+    """
+    n = len(key)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if key.dtype.kind == "i" and not key.hasnans:
+        vals = key.to_numpy(dtype=np.int64)
+        if not ascending:
+            vals = -vals.astype(np.float64) if vals.min() == np.iinfo(np.int64).min else -vals
+    else:
+        vals = key.to_numpy(dtype=np.float64, na_value=np.nan)
+        if not ascending:
+            vals = -vals
+    valid = np.flatnonzero(~np.isnan(vals)) if vals.dtype.kind == "f" else None
+    n_valid = n if valid is None else len(valid)
+    if k >= n_valid:
+        return None                                  # NaN rows would be needed too (they sort last)
+    v = vals if valid is None else vals[valid]
+    cut = np.partition(v, k - 1)[k - 1]
+    cand = np.flatnonzero(v <= cut)                  # everything before the cut + all ties with it
+    cand = cand[np.argsort(v[cand], kind="stable")][:k]   # positions ascending -> ties keep row order
+    return cand if valid is None else valid[cand]
+
+def _take_topk(df: pd.DataFrame, key: pd.Series, k: int, ascending: bool) -> pd.DataFrame:
+    """Same rows, same order as df.assign(__k__=key).sort_values("__k__", kind="mergesort").head(k)."""
+    pos = _topk_positions(key, k, ascending)
+    if pos is None:
+        return df.assign(__k__=key).sort_values(by="__k__", ascending=ascending, kind="mergesort") \
+                 .drop(columns="__k__").head(k)
+    return df.iloc[pos]
+
+# ---------- Typed table store ----------
+_RANGE_OPS = {"gt": "gt", ">": "gt", "ge": "ge", ">=": "ge", "lt": "lt", "<": "lt", "le": "le", "<=": "le"}
+_DATE_COL_RE     = re.compile(r"_date$", re.IGNORECASE)
+_QTY_COL_RE      = re.compile(r"(_qty|_quantity|^quantity|_count)$", re.IGNORECASE)
+_CATEGORY_COL_RE = re.compile(r"(_status|^status)$", re.IGNORECASE)
+_LEGACY_DERIVE_RE = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_]*)\s*([+\-*/])\s*([A-Za-z_][A-Za-z0-9_]*)\s*$")
+_COMPACT_MIN_ROWS = 4096   # below this, narrowing mid-filter costs more than it saves
+_ROW_ID_KEEPING = {"sort", "derive", "distinct"}   # output index stays a subset of the input's
+_FOLD_MAX_AVG_LEN = 40   # free-text columns (Context_Summary, ...) are folded lazily
+
+def _canonical_headers(source: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Rename physical headers to their COLUMN_ALIASES canon (never clobbering an existing column)."""
+    alias = COLUMN_ALIASES.get(source, {})
+    cols = set(map(str, df.columns))
+    renames: Dict[str, str] = {}
+    for c in df.columns:
+        canon = alias.get(str(c).lower())
+        if canon and canon != c and canon not in cols and canon not in renames.values():
+            renames[c] = canon
+    if renames: df = df.rename(columns=renames)
+    df, _ = _canonicalize_df(source, df)
+    return df
+
+class TypedTable:
+    """
+    A source table prepared once at load time:
+      • canonical column names (COLUMN_ALIASES + ONHAND canonicalization)
+      • numeric quantity columns, categorical status columns
+      • parsed-date and casefolded side columns, index-aligned with df
+      • dictionary codes for low-cardinality text columns (replace their casefolded copy)
+    Side columns keep df's display values untouched, so rows returned to callers don't change shape.
+    """
+    def __init__(self, source: str, raw: pd.DataFrame, indexed: bool = True):
+        t0 = time.time()
+        self.source = source
+        self.indexed = indexed   # False for streamed chunks: no hash/range/trigram indexes
+        df = _canonical_headers(source, raw)
+
+        for c in df.columns:
+            name = str(c)
+            if _QTY_COL_RE.search(name) and not pd.api.types.is_numeric_dtype(df[c].dtype):
+                num = pd.to_numeric(df[c], errors="coerce")
+                if num.notna().sum() == df[c].notna().sum():   # only when lossless
+                    df[c] = num
+            elif _CATEGORY_COL_RE.search(name) and not pd.api.types.is_numeric_dtype(df[c].dtype):
+                df[c] = df[c].astype("category")
+
+        df.name = source
+        self.df = df
+        self._dates:   Dict[str, pd.Series] = {}
+        self._numbers: Dict[str, pd.Series] = {}
+        self._folded:  Dict[str, pd.Series] = {}
+        self._any:     Dict[Tuple[str, str], bool] = {}
+        self.dicts:    Dict[str, DictColumn] = {}
+        self._trigrams: Dict[str, Optional[TrigramIndex]] = {}
+        encode = dict_encoding_enabled()
+
+        for c in df.columns:
+            name = str(c)
+            if _DATE_COL_RE.search(name):
+                self.as_datetime(c)
+            elif _QTY_COL_RE.search(name):
+                self.as_numeric(c)
+            elif encode and (enc := DictColumn.build(c, df[c])) is not None:
+                self.dicts[c] = enc
+                df[c] = enc.interned(df[c])
+            elif not pd.api.types.is_numeric_dtype(df[c].dtype):
+                avg = df[c].dropna().astype(str).str.len().mean() if len(df) else 0
+                if not avg or avg <= _FOLD_MAX_AVG_LEN:
+                    self.casefolded(c)
+
+        # hash indexes on key columns: eq/in become dictionary lookups
+        self.hash_indexes: Dict[str, HashIndex] = {}
+        for c in (HASH_INDEX_COLS if indexed else ()):
+            if c in df.columns:
+                numeric = pd.api.types.is_numeric_dtype(df[c].dtype)
+                self.hash_indexes[c] = HashIndex(c, df[c] if numeric else self.casefolded(c), numeric)
+
+        # sorted range indexes on date + quantity columns, keyed by the typed view
+        # _apply_filters would compare in (date first, then numeric)
+        self._sorted: Dict[Tuple[str, str], SortedIndex] = {}
+        for c in (df.columns if indexed else ()):
+            name = str(c)
+            if _DATE_COL_RE.search(name) or _QTY_COL_RE.search(name):
+                kind = "dt" if self.has_datetime(c) else ("num" if self.has_numeric(c) else None)
+                if kind:
+                    self.sorted_index(kind, c)
+        self.load_ms = _elapsed_ms(t0)
+
+    def covers(self, df: pd.DataFrame) -> bool:
+        """True when df is (a row subset of) this table, so side columns can be aligned by index."""
+        return df is self.df
+
+    def as_datetime(self, col: str) -> pd.Series:
+        s = self._dates.get(col)
+        if s is None:
+            s = self._dates[col] = pd.to_datetime(self.df[col], errors="coerce")
+        return s
+
+    def as_numeric(self, col: str) -> pd.Series:
+        s = self._numbers.get(col)
+        if s is None:
+            s = self._numbers[col] = pd.to_numeric(self.df[col], errors="coerce")
+        return s
+
+    def has_datetime(self, col: str) -> bool:
+        key = ("dt", col)
+        if key not in self._any:
+            self._any[key] = bool(self.as_datetime(col).notna().any())
+        return self._any[key]
+
+    def has_numeric(self, col: str) -> bool:
+        key = ("num", col)
+        if key not in self._any:
+            self._any[key] = bool(self.as_numeric(col).notna().any())
+        return self._any[key]
+
+    def sorted_index(self, kind: str, col: str) -> SortedIndex:
+        """Range index over the "dt" (as_datetime) or "num" (as_numeric) view of col."""
+        key = (kind, col)
+        idx = self._sorted.get(key)
+        if idx is None:
+            values = self.as_datetime(col) if kind == "dt" else self.as_numeric(col)
+            idx = self._sorted[key] = SortedIndex(col, values, kind)
+        return idx
+
+    def trigram_index(self, col: str) -> Optional[TrigramIndex]:
+        """TrigramIndex for a TRIGRAM_INDEX_COLS column, built on first use (None for dict-encoded ones)."""
+        if not self.indexed or col not in TRIGRAM_INDEX_COLS or col in self.dicts or col not in self.df.columns \
+                or os.getenv("ATLAS_TRIGRAM_INDEX", "1") == "0":
+            return None
+        if col not in self._trigrams:
+            self._trigrams[col] = TrigramIndex(col, self.df[col])
+        return self._trigrams[col]
+
+    def casefolded(self, col: str) -> pd.Series:
+        s = self._folded.get(col)
+        if s is None:
+            enc = self.dicts.get(col)
+            if enc is not None:   # decoded on demand, not kept: the codes are the stored form
+                return enc.decode(lambda v: v.astype(str).str.casefold(), self.df.index)
+            s = self._folded[col] = self.df[col].astype(str).str.casefold()
+        return s
+
+    def describe(self) -> Dict[str, Any]:
+        return {"source": self.source, "rows": len(self.df), "load_ms": self.load_ms,
+                "date_cols": sorted(self._dates), "folded_cols": sorted(self._folded),
+                "hash_indexes": sorted(self.hash_indexes),
+                "dict_cols": {c: d.cardinality for c, d in self.dicts.items()},
+                "trigram_indexes": sorted(c for c, t in self._trigrams.items() if t is not None),
+                "range_indexes": sorted(f"{c}:{k}" for (k, c) in self._sorted),
+                "category_cols": [str(c) for c in self.df.columns if isinstance(self.df[c].dtype, pd.CategoricalDtype)]}
+
 # ---------- Real CSV Adapter ----------
 class PandasCsvAdapter:
-    """Lazy CSV reader; exposes get_df() and simple filter/vector stubs when needed."""
+    """Lazy CSV reader; loads once into a TypedTable and exposes get_df()/get_table() plus simple filter/vector stubs."""
     def __init__(self, source: str, path: str | None = None):
         self.source = source
         self.path   = path or _csv_path(source)
         self._df: Optional[pd.DataFrame] = None
+        self._table: Optional[TypedTable] = None
+        self._version: Optional[str] = None
+        self.load_info: Dict[str, Any] = {}
+        self._load_lock = threading.Lock()   # branch threads may ask for the same table at once
 
     def _ensure_loaded(self):
         if self._df is not None and len(self._df.index) > 0:
             return
-        self._df = pd.read_csv(self.path)
-        self._df.name = self.source
+        with self._load_lock:
+            if self._df is not None and len(self._df.index) > 0:
+                return
+            self._version = self.data_version()   # stamped before reading: a concurrent write reloads next time
+            raw, self.load_info = _load_csv_snapshot(self.path)
+            self._table = TypedTable(self.source, raw)
+            self._df = self._table.df
+
+    def data_version(self) -> str:
+        """Cheap change stamp for result caching: path + size + mtime of the CSV."""
+        try:
+            st = os.stat(self.path)
+            return f"{os.path.abspath(self.path)}:{st.st_size}:{st.st_mtime_ns}"
+        except OSError:
+            return f"{self.path}:missing"
+
+    def refresh(self) -> Optional[Tuple[TypedTable, TypedTable]]:
+        """Reload if the CSV changed since it was loaded; returns (old, new) tables when it did."""
+        if self._table is None or self.data_version() == self._version:
+            return None
+        old = self._table
+        self._df = None
+        self._ensure_loaded()
+        return old, self._table
 
     def get_df(self) -> pd.DataFrame:
         self._ensure_loaded()
         return self._df
 
+    def get_table(self) -> TypedTable:
+        self._ensure_loaded()
+        return self._table
+
     # Adapter-level filter is simple; executor will do robust filtering
-    def filter(self, params: Dict[str, Any]) -> ExecResult:
+    def filter_df(self, params: Dict[str, Any]) -> pd.DataFrame:
+        """Columnar variant of filter(); the executor chains frames and only emits records at the end."""
         self._ensure_loaded()
         df = self._df
         sel = params.get("select")
@@ -291,6 +655,10 @@ class PandasCsvAdapter:
             keep = [c for c in sel if c in df.columns]
             if keep: df = df[keep]
         if limit: df = df.head(int(limit))
+        return df
+
+    def filter(self, params: Dict[str, Any]) -> ExecResult:
+        df = self.filter_df(params)
         return ExecResult(rows=df.to_dict("records"),
                           meta={"op":"filter","source":self.source,"n":len(df)})
 
@@ -298,37 +666,161 @@ class PandasCsvAdapter:
         # not used here; mirror filter
         return self.filter(params)
 
+class SqlCsvAdapter(PandasCsvAdapter):
+    """
+    PandasCsvAdapter whose TypedTable is also mirrored into an embedded SQL engine (atlas_sql.py).
+    The executor pushes plan prefixes down to it; filter()/vector() run where/select/limit as SQL.
+    """
+    def __init__(self, source: str, path: str | None = None, engine: Any = None):
+        super().__init__(source, path)
+        self.engine = engine or make_engine("sqlite")
+        self._mirror: Optional[SqlMirror] = None
+        self._mirror_lock = threading.Lock()
+
+    def mirror(self) -> SqlMirror:
+        """The engine-side copy of the current table, (re)built on first use after a load or reload."""
+        table = self.get_table()
+        with self._mirror_lock:
+            if self._mirror is None or self._mirror.table is not table:
+                if self._mirror is not None:
+                    self._mirror.drop()
+                self._mirror = SqlMirror(self.engine, self.source, table)
+            return self._mirror
+
+    def refresh(self) -> Optional[Tuple[TypedTable, TypedTable]]:
+        changed = super().refresh()
+        if changed is not None:
+            with self._mirror_lock:
+                if self._mirror is not None:
+                    self._mirror.drop()
+                self._mirror = None
+        return changed
+
+    def filter_df(self, params: Dict[str, Any]) -> pd.DataFrame:
+        return filter_rows(self, params)
+
 # ---------- Join & Aggregate ----------
+JoinRows = Callable[[int, int], pd.DataFrame]   # output rows [lo, hi) of a sized join
+
 class PandasJoiner:
-    def join(self, left: ExecResult, right: ExecResult, on: List[Tuple[str, str]], how: str = "left") -> ExecResult:
+    def join_frames(self, left_df: pd.DataFrame, right_df: pd.DataFrame,
+                    on: List[Tuple[str, str]], how: str = "left") -> Tuple[pd.DataFrame, Dict[str, Any]]:
         t0 = time.time()
-        left_df  = pd.DataFrame(left.rows)
-        right_df = pd.DataFrame(right.rows)
         if left_df.empty or right_df.empty:
             out = left_df if how in ("left","outer") else pd.DataFrame()
         else:
             left_on  = [l for (l, r) in on]
             right_on = [r for (l, r) in on]
             out = left_df.merge(right_df, how=how, left_on=left_on, right_on=right_on)
-        return ExecResult(
-            rows=out.to_dict(orient="records"),
-            meta={"op":"join","how":how,"on":on,"left_n":len(left.rows),"right_n":len(right.rows),
-                  "out_n":len(out), "elapsed_ms": round((time.time()-t0)*1000,2)}
-        )
+        return out, {"op":"join","how":how,"on":on,"left_n":len(left_df),"right_n":len(right_df),
+                     "out_n":len(out), "elapsed_ms": round((time.time()-t0)*1000,2)}
+
+    def join_indexed(self, left_df: pd.DataFrame, right_df: pd.DataFrame, jidx: JoinIndex,
+                     left_keys: List[str], right_keys: List[str], how: str = "left") -> pd.DataFrame:
+        """
+        merge() result rebuilt as a gather over precomputed row-id pairs.
+        Both frames must be row subsets of the tables jidx was built on (index = table row ids).
+        """
+        n, rows = self.indexed_rows(left_df, right_df, jidx, left_keys, right_keys, how)
+        return rows(0, n)
+
+    def indexed_rows(self, left_df: pd.DataFrame, right_df: pd.DataFrame, jidx: JoinIndex,
+                     left_keys: List[str], right_keys: List[str], how: str = "left") -> Tuple[int, JoinRows]:
+        """(output rows, rows(lo, hi)) for join_indexed: sized from the row pairs before any column is built."""
+        keep = np.zeros(jidx.n_right, dtype=bool)
+        keep[right_df.index.to_numpy()] = True
+        i, r = jidx.gather(left_df.index.to_numpy(), keep, how)
+        miss = np.flatnonzero(r < 0)[:1]
+
+        def rows(lo: int, hi: int) -> pd.DataFrame:
+            ii, rr = i[lo:hi], r[lo:hi]
+            pad = len(miss) > 0 and not (rr < 0).any()   # a miss anywhere makes right ints float: keep that
+            if pad:
+                ii, rr = np.append(ii, i[miss]), np.append(rr, -1)
+            out = self.assemble(left_df, right_df, ii, rr, left_keys, right_keys)
+            return out.iloc[:-1] if pad else out
+        return len(i), rows
+
+    def merge_rows(self, left_df: pd.DataFrame, right_df: pd.DataFrame, left_keys: List[str],
+                   right_keys: List[str], how: str = "left", small: int = 0) -> Tuple[Optional[int], JoinRows, bool]:
+        """
+        (output rows or None, rows(lo, hi), sliced) for left_df.merge(right_df). Per-left-row match counts
+        (from right key counts) size left/inner merges up front. A left merge keeps left order, so rows()
+        merges only the left rows a slice needs (sliced=True); other merges run whole on first use.
+        Merges bounded by `small` rows (left rows x the most frequent right key) skip sizing.
+        """
+        full: List[pd.DataFrame] = []
+
+        def whole(lo: int, hi: Optional[int]) -> pd.DataFrame:
+            if not full:
+                full.append(left_df.merge(right_df, how=how, left_on=left_keys, right_on=right_keys))
+            return full[0].iloc[lo:hi].reset_index(drop=True)
+
+        counts = None
+        if how in ("left", "inner") and len(left_df) and len(right_df):
+            try:
+                rc = right_df[right_keys].value_counts(dropna=False, sort=False).reset_index(name="__n__")
+                if len(left_df) * int(rc["__n__"].max()) <= small:
+                    return None, whole, False
+                rc.columns = [f"__k{j}__" for j in range(len(right_keys))] + ["__n__"]
+                counts = left_df[left_keys].merge(rc, how="left", left_on=left_keys, right_on=list(rc.columns[:-1]))
+                counts = counts["__n__"].fillna(0).to_numpy(dtype=np.int64)
+            except Exception:
+                counts = None
+        if counts is None or len(counts) != len(left_df) or how != "left":
+            sized = int(counts.sum()) if counts is not None and len(counts) == len(left_df) else None
+            return sized, whole, False
+        missing = counts == 0
+        ends = np.cumsum(np.maximum(counts, 1))           # unmatched left rows still produce one row
+        miss_before = np.concatenate([[0], np.cumsum(missing)])
+        miss = np.flatnonzero(missing)[:1]
+
+        def rows(lo: int, hi: int) -> pd.DataFrame:
+            if hi <= lo:
+                return left_df.iloc[:0].merge(right_df, how=how, left_on=left_keys, right_on=right_keys)
+            a = int(np.searchsorted(ends, lo, side="right"))
+            b = int(np.searchsorted(ends, hi - 1, side="right")) + 1
+            part = left_df.iloc[a:b]
+            pad = len(miss) > 0 and miss_before[b] == miss_before[a]
+            if pad:                                       # same dtypes as the whole merge (see indexed_rows)
+                part = pd.concat([part, left_df.iloc[miss]])
+            out = part.merge(right_df, how=how, left_on=left_keys, right_on=right_keys)
+            start = int(ends[a - 1]) if a else 0
+            return out.iloc[lo - start:hi - start].reset_index(drop=True)
+        return int(ends[-1]), rows, True
+
+    @staticmethod
+    def assemble(left_df: pd.DataFrame, right_df: pd.DataFrame, i: np.ndarray, r: np.ndarray,
+                 left_keys: List[str], right_keys: List[str]) -> pd.DataFrame:
+        """merge()-shaped frame for row pairs: left_df positions i, right_df labels r (-1 = no match)."""
+        same = {rk for lk, rk in zip(left_keys, right_keys) if lk == rk}   # merged into one column
+        rcols = [c for c in right_df.columns if c not in same]
+        overlap = set(left_df.columns) & set(rcols)
+        lpart = left_df.iloc[i].reset_index(drop=True)
+        rpart = right_df[rcols].reindex(r).reset_index(drop=True)           # -1 -> all-null row
+        if overlap:
+            lpart = lpart.rename(columns={c: f"{c}_x" for c in overlap})
+            rpart = rpart.rename(columns={c: f"{c}_y" for c in overlap})
+        return pd.concat([lpart, rpart], axis=1)
+
+    def join(self, left: ExecResult, right: ExecResult, on: List[Tuple[str, str]], how: str = "left") -> ExecResult:
+        out, meta = self.join_frames(pd.DataFrame(left.rows), pd.DataFrame(right.rows), on, how)
+        return ExecResult(rows=out.to_dict(orient="records"), meta=meta)
 
 class PandasAggregator:
-    def aggregate(self, res: ExecResult, by: List[str], metrics: List[Tuple[str, str]]) -> ExecResult:
+    def aggregate_frame(self, df: pd.DataFrame, by: List[str],
+                        metrics: List[Tuple[str, str]]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
         t0 = time.time()
-        df = pd.DataFrame(res.rows)
         if df.empty:
-            return ExecResult(rows=[], meta={"op":"aggregate","by":by,"metrics":metrics,"input_n":0})
+            return pd.DataFrame(), {"op":"aggregate","by":by,"metrics":metrics,"input_n":0}
         agg_dict = {col: agg for (col, agg) in metrics}
-        g = df.groupby(by, dropna=False).agg(agg_dict).reset_index() if by else df.agg(agg_dict).to_frame().T
-        return ExecResult(
-            rows=g.to_dict(orient="records"),
-            meta={"op":"aggregate","by":by,"metrics":metrics,"input_n":len(df),"out_n":len(g),
-                  "elapsed_ms": round((time.time()-t0)*1000,2)}
-        )
+        g = df.groupby(by, dropna=False, observed=True).agg(agg_dict).reset_index() if by else df.agg(agg_dict).to_frame().T
+        return g, {"op":"aggregate","by":by,"metrics":metrics,"input_n":len(df),"out_n":len(g),
+                   "elapsed_ms": round((time.time()-t0)*1000,2)}
+
+    def aggregate(self, res: ExecResult, by: List[str], metrics: List[Tuple[str, str]]) -> ExecResult:
+        g, meta = self.aggregate_frame(pd.DataFrame(res.rows), by, metrics)
+        return ExecResult(rows=g.to_dict(orient="records"), meta=meta)
 
 # ---------- Registry ----------
 class AdapterRegistry:
@@ -351,11 +843,16 @@ class AdapterRegistry:
             return cfg.get(name) or cfg.get(name.lower()) or cfg.get(name.upper())
 
         self.tables: Dict[str, TableAdapter] = {}
+        self._sql_engines: Dict[str, Any] = {}
         for src in ALLOWED_SOURCES:
             if src == "ALL": 
                 continue
-            p = _getp(src)
-            if p:
+            p, kind = csv_entry(_getp(src))
+            if kind not in ("pandas", *SQL_ADAPTERS):
+                raise RuntimeError(f"Unknown adapter {kind!r} for {src} in {self.cfg_path}")
+            if p and kind in SQL_ADAPTERS and sql_enabled():
+                self.tables[src] = SqlCsvAdapter(src, p, self.sql_engine(kind))
+            elif p:
                 self.tables[src] = PandasCsvAdapter(src, p)
 
         if not self.tables:
@@ -363,26 +860,121 @@ class AdapterRegistry:
 
         self.joiner = PandasJoiner()
         self.agg    = PandasAggregator()
+        self._join_indexes: Dict[Tuple[Any, ...], Optional[JoinIndex]] = {}
+        self.rollups = RollupStore()
+
+    def sql_engine(self, kind: str) -> Any:
+        """One embedded engine per kind, shared by its sources so pushed-down joins stay in one query."""
+        if kind not in self._sql_engines:
+            self._sql_engines[kind] = make_engine(kind)
+        return self._sql_engines[kind]
+
+    def refresh(self, sources: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Reload sources whose CSV changed. Join indexes over a reloaded source are dropped (rebuilt on
+        next use); its rollups are carried over incrementally when rows were only appended.
+        """
+        out: Dict[str, Any] = {}
+        if os.getenv("ATLAS_AUTO_RELOAD", "1") == "0":
+            return out
+        for src in (sources if sources is not None else list(self.tables)):
+            fn = getattr(self.tables.get(src), "refresh", None)
+            changed = fn() if fn is not None else None
+            if changed is None:
+                continue
+            old, new = changed
+            self._join_indexes = {k: v for k, v in self._join_indexes.items() if src not in (k[0], k[2])}
+            out[src] = {"rows": len(new.df), "rollups": self.rollups.on_reload(old, new)}
+        return out
+
+    def join_index(self, left_src: str, left_keys: List[str],
+                   right_src: str, right_keys: List[str]) -> Optional[JoinIndex]:
+        """Whole-table JoinIndex for a source pair, built on first use and kept with the loaded tables."""
+        if os.getenv("ATLAS_JOIN_INDEX", "1") == "0":
+            return None
+        key = (left_src, tuple(left_keys), right_src, tuple(right_keys))
+        if key in self._join_indexes:
+            return self._join_indexes[key]
+        ji = None
+        if left_src in self.tables and right_src in self.tables:
+            lt, rt = self.tables[left_src].get_table(), self.tables[right_src].get_table()
+            ok = all(c in lt.df.columns for c in left_keys) and all(c in rt.df.columns for c in right_keys) \
+                and all(join_keys_compatible(lt.df[l], rt.df[r]) for l, r in zip(left_keys, right_keys)) \
+                and all(isinstance(t.df.index, pd.RangeIndex) and t.df.index.start == 0 and t.df.index.step == 1
+                        for t in (lt, rt))
+            if ok:
+                ji = JoinIndex(lt.df, left_keys, rt.df, right_keys)
+        self._join_indexes[key] = ji
+        return ji
+
+    def warm_join_indexes(self) -> Dict[str, int]:
+        """Build the JOIN_INDEX_PAIRS indexes up front (e.g. at service start)."""
+        out: Dict[str, int] = {}
+        for ls, lk, rs, rk in JOIN_INDEX_PAIRS:
+            ji = self.join_index(ls, list(lk), rs, list(rk))
+            if ji is not None:
+                out[f"{ls}->{rs}"] = ji.n_pairs
+        return out
 
     def __repr__(self) -> str:
         return f"<AdapterRegistry tables={list(self.tables.keys())}>"
 
 # ---------- Executor ----------
+def _unprofiled(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """meta without per-request profiling output (what the result cache keeps)."""
+    out = {k: v for k, v in meta.items() if k != "profile"}
+    if any("profile" in l for l in out.get("lineage") or []):
+        out["lineage"] = [{k: v for k, v in l.items() if k != "profile"} for l in out["lineage"]]
+    return out
+
 class PlanExecutor:
     def __init__(self, registry: Optional[AdapterRegistry] = None):
         self.r = registry or AdapterRegistry()
 
     # --- type-aware equality (numeric/string tolerant, case-insensitive for text)
-    def _eq_mask(self, series: pd.Series, v: Any) -> pd.Series:
+    def _eq_mask(self, series: pd.Series, v: Any, folded: Optional[pd.Series] = None) -> pd.Series:
         if pd.api.types.is_numeric_dtype(series.dtype):
             vnum = pd.to_numeric(v, errors="coerce")
             if not pd.isna(vnum):
                 return series == vnum
             return series.astype(str) == str(v)
-        return series.astype(str).str.casefold() == str(v).casefold()
+        if folded is None:
+            folded = series.astype(str).str.casefold()
+        return folded == str(v).casefold()
+
+    # --- derive: legacy "<colA> <op> <colB>" on numeric columns keeps its null-as-zero semantics
+    @staticmethod
+    def _derive_text(e: Dict[str, Any], df: pd.DataFrame, source: Optional[str],
+                     table_of: Callable[[str], Any] = lambda c: None) -> str:
+        expr = (e.get("expr") or "").strip()
+        m = _LEGACY_DERIVE_RE.match(expr)
+        if not m:
+            return expr
+        a, op, b = m.group(1), m.group(2), m.group(3)
+        a_n, b_n = column_resolver(source, df.columns).cols([a, b])
+        if a_n not in df.columns or b_n not in df.columns or \
+           column_kind(df[a_n], table_of(a_n)) != "num" or column_kind(df[b_n], table_of(b_n)) != "num":
+            return expr
+        if op == "/":
+            return f"nullif(coalesce({a}, 0), 0) / nullif(coalesce({b}, 0), 0)"
+        return f"coalesce({a}, 0) {op} coalesce({b}, 0)"
+
+    # --- which typed view an ordered col-vs-scalar compare uses (mirrors _apply_filters' date→numeric→string)
+    @staticmethod
+    def _range_probe(table: TypedTable, col: str, val: Any) -> Tuple[Optional[str], Any]:
+        """(kind, typed scalar) for col <op> val; kind None means a lexicographic compare (no index)."""
+        b_dt = pd.to_datetime(pd.Series([val]), errors="coerce").iloc[0]
+        if table.has_datetime(col) and pd.notna(b_dt):
+            return "dt", b_dt
+        b_num = pd.to_numeric(pd.Series([val]), errors="coerce").iloc[0]
+        if table.has_numeric(col) and pd.notna(b_num):
+            return "num", b_num
+        return None, None
 
     # --- robust filter application with aliasing + type-aware ops
-    def _apply_filters(self, df: pd.DataFrame, where: List[Dict[str, Any]], source: Optional[str] = None) -> pd.DataFrame:
+    def _apply_filters(self, df: pd.DataFrame, where: List[Dict[str, Any]], source: Optional[str] = None,
+                       table: Optional[TypedTable] = None, stats: Optional[Dict[str, Any]] = None,
+                       limit: Optional[int] = None) -> pd.DataFrame:
         """
         Apply a list of filter predicates to df.
 
@@ -390,132 +982,430 @@ class PlanExecutor:
         • Support {"value":{"colref":"<other_col>"}} to compare column-to-column
         • Date-aware comparisons for both column↔column and column↔scalar predicates
         • Fall back to numeric, then string lexicographic compare when dates not applicable
+        • When df is a TypedTable's frame, reuse its pre-parsed date/numeric/casefolded columns
+        • eq/in on hash-indexed key columns narrow the candidate rows first (recorded in stats["index"])
+        • otherwise gt/ge/lt/le against a scalar resolve through sorted range indexes (stats["range_index"])
+        • `limit` (typed tables): remaining predicates scan row blocks and stop once `limit` rows passed;
+          the result is then just the first `limit` matches (stats["limit_scan"])
         """
         src = (source or getattr(df, "name", None) or "ONHAND")
-        low = {c.lower(): c for c in df.columns}
-
-        mask = pd.Series(True, index=df.index)
-        for f in (where or []):
-            raw = f.get("col")
-            col = _map_col(src, raw)
-            col = low.get(str(col).lower(), col)
-            if col not in df.columns:
-                raise KeyError(f"[{src}] Column '{raw}' not found after aliasing (wanted '{col}')")
-
-            s = df[col]
-            op = (f.get("op") or "eq").lower()
-            val = f.get("value")
-
-            # -------- equality / inequality (kept as-is; uses your existing tolerant matcher) --------
-            if op in ("eq", "==", "="):
-                m = self._eq_mask(s, val)
-
-            elif op in ("ne", "!="):
-                m = ~self._eq_mask(s, val)
-
-            # -------- set membership / substring (kept as-is) --------
-            elif op == "in":
-                vals = f.get("values") or (val if isinstance(val, list) else [val])
-                vals_norm = {str(v).casefold() for v in vals}
-                m = s.astype(str).str.casefold().isin(vals_norm)
-
-            elif op == "contains":
-                m = s.astype(str).str.contains(str(val), case=False, na=False)
-
-            # -------- ordered comparisons (enhanced) --------
-            elif op in ("gt", ">", "ge", ">=", "lt", "<", "le", "<="):
-                # Case A: RHS is a column reference -> column-to-column compare
-                if isinstance(val, dict) and "colref" in val:
-                    other_raw = val["colref"]
-                    other_col = _map_col(src, other_raw)
-                    other_col = low.get(str(other_col).lower(), other_col)
-                    if other_col not in df.columns:
-                        raise KeyError(f"[{src}] Column '{other_raw}' not found after aliasing (wanted '{other_col}')")
-
-                    s2 = df[other_col]
-
-                    # Try date compare first
-                    s_dt  = pd.to_datetime(s,  errors="coerce")
-                    s2_dt = pd.to_datetime(s2, errors="coerce")
-                    if s_dt.notna().any() or s2_dt.notna().any():
-                        a, b = s_dt, s2_dt
+        typed = table if (table is not None and table.covers(df)) else None
+        _resolve = column_resolver(src, df.columns).col
+
+        # -------- hash-index point lookups (typed tables only) --------
+        preds = list(where or [])
+        pos: Optional[np.ndarray] = None
+        if typed is not None and typed.hash_indexes:
+            rest, used = [], []
+            for f in preds:
+                op = (f.get("op") or "eq").lower()
+                hidx = typed.hash_indexes.get(_resolve(f.get("col")))
+                hit = None
+                if hidx is not None and op in ("eq", "==", "="):
+                    hit = hidx.lookup_eq(f.get("value"))
+                elif hidx is not None and op == "in":
+                    val = f.get("value")
+                    hit = hidx.lookup_in(f.get("values") or (val if isinstance(val, list) else [val]))
+                if hit is None:
+                    rest.append(f); continue
+                pos = hit if pos is None else np.intersect1d(pos, hit, assume_unique=True)
+                used.append(hidx.col)
+            if pos is not None:
+                df, preds = df.iloc[pos], rest
+                if stats is not None:
+                    stats["index"] = {"type": "hash", "cols": used, "candidates": int(len(pos))}
+
+        # -------- sorted range indexes: col <op> scalar by binary search, ANDed as bitmaps --------
+        # Skipped once a hash lookup has narrowed the rows: the survivors are cheaper to scan.
+        if typed is not None and typed.indexed and pos is None:
+            rest, used, bits = [], [], None
+            for f in preds:
+                op = _RANGE_OPS.get((f.get("op") or "eq").lower())
+                col, val = _resolve(f.get("col")), f.get("value")
+                ridx = None
+                if op and col in df.columns and not (isinstance(val, dict) and "colref" in val):
+                    kind, probe = self._range_probe(typed, col, val)
+                    if kind:
+                        ridx = typed.sorted_index(kind, col)
+                if ridx is None:
+                    rest.append(f); continue
+                b = ridx.bitmap(op, probe)
+                bits = b if bits is None else (bits & b)
+                if col not in used:
+                    used.append(col)
+            if bits is not None:
+                pos = np.flatnonzero(bits)
+                df, preds = df.iloc[pos], rest
+                if stats is not None:
+                    stats["range_index"] = {"cols": used, "candidates": int(len(pos))}
+
+        # Side columns are full-table; slice them to the candidate rows when an index narrowed df
+        _rows = lambda ser: ser if pos is None else ser.iloc[pos]
+        as_dt   = (lambda c: _rows(typed.as_datetime(c))) if typed else (lambda c: pd.to_datetime(df[c], errors="coerce"))
+        as_num  = (lambda c: _rows(typed.as_numeric(c)))  if typed else (lambda c: pd.to_numeric(df[c], errors="coerce"))
+        as_fold = (lambda c: _rows(typed.casefolded(c)))  if typed else (lambda c: df[c].astype(str).str.casefold())
+        # date/numeric/string mode is decided on the whole column, even when an index narrowed the rows
+        dt_any  = (lambda c, ser: typed.has_datetime(c)) if typed else (lambda c, ser: bool(ser.notna().any()))
+        num_any = (lambda c, ser: typed.has_numeric(c))  if typed else (lambda c, ser: bool(ser.notna().any()))
+        dicts   = typed.dicts if typed else {}
+        dict_used: List[str] = []
+        tri_used: List[Dict[str, Any]] = []
+        whole: Dict[int, Any] = {}   # block scans: per-predicate dict/trigram masks over every table row
+
+        def _by_dict(col, fn, key) -> pd.Series:
+            """Row-wise predicate fn evaluated on col's distinct values, mapped back through its codes."""
+            if col not in dict_used:
+                dict_used.append(col)
+            if not blocked:
+                return pd.Series(dicts[col].mask(fn, pos), index=df.index)
+            if key not in whole:
+                whole[key] = dicts[col].mask(fn)
+            return pd.Series(whole[key][pos], index=df.index)
+
+        # Limit pushdown: predicates run over growing row blocks until `limit` rows have passed.
+        # Side columns stay whole-table (typed only), so each block just moves df/pos along and
+        # keeps the full_df positions (rel) that passed; rows are taken once at the end.
+        full_df, full_pos, parts, found, rel = df, pos, [], 0, None
+        first = max(4 * limit, _COMPACT_MIN_ROWS) if limit else 0
+        blocked = bool(limit) and typed is not None and len(preds) > 0 and len(df) > first
+        blocks = _limit_blocks(len(df), first) if blocked else [(0, len(df))]
+        for lo, hi in blocks:
+            if hi - lo < len(full_df):
+                df = full_df.iloc[lo:hi]
+                pos = np.arange(lo, hi) if full_pos is None else full_pos[lo:hi]
+                rel = np.arange(lo, hi)
+            mask = pd.Series(True, index=df.index)
+            for n_done, f in enumerate(preds, start=1):
+                raw = f.get("col")
+                col = _resolve(raw)
+                if col not in df.columns:
+                    raise KeyError(f"[{src}] Column '{raw}' not found after aliasing (wanted '{col}')")
+
+                s = df[col]
+                op = (f.get("op") or "eq").lower()
+                val = f.get("value")
+
+                # -------- equality / inequality (kept as-is; uses your existing tolerant matcher) --------
+                if op in ("eq", "==", "=", "ne", "!="):
+                    if col in dicts:
+                        m = _by_dict(col, lambda v: self._eq_mask(v, val), n_done)
+                    else:
+                        m = self._eq_mask(s, val, as_fold(col) if typed else None)
+                    if op in ("ne", "!="):
+                        m = ~m
+
+                # -------- set membership / substring (kept as-is) --------
+                elif op == "in":
+                    vals = f.get("values") or (val if isinstance(val, list) else [val])
+                    vals_norm = {str(v).casefold() for v in vals}
+                    if col in dicts:
+                        m = _by_dict(col, lambda v: v.astype(str).str.casefold().isin(vals_norm), n_done)
+                    else:
+                        m = as_fold(col).isin(vals_norm)
+
+                elif op == "contains":
+                    tri = typed.trigram_index(col) if typed is not None and col not in dicts else None
+                    hit = tri.mask(val, pos) if tri is not None and not blocked else None
+                    if tri is not None and blocked:
+                        if n_done not in whole:   # verifying more candidates than a block has rows loses to scanning it
+                            cand = tri.candidates(val)
+                            whole[n_done] = tri.mask(val) if cand is not None and len(cand) <= first else None
+                        if whole[n_done] is not None:
+                            hit = (whole[n_done][0][pos], whole[n_done][1])
+                    if col in dicts:
+                        m = _by_dict(col, lambda v: v.astype(str).str.contains(str(val), case=False, na=False), n_done)
+                    elif hit is not None:
+                        m = pd.Series(hit[0], index=df.index)
+                        if not any(t["col"] == col for t in tri_used):
+                            tri_used.append({"col": col, "candidates": hit[1]})
                     else:
-                        # Try numeric compare
-                        a_num = pd.to_numeric(s,  errors="coerce")
-                        b_num = pd.to_numeric(s2, errors="coerce")
-                        if a_num.notna().any() or b_num.notna().any():
-                            a, b = a_num, b_num
+                        m = s.astype(str).str.contains(str(val), case=False, na=False)
+
+                # -------- ordered comparisons (enhanced) --------
+                elif op in ("gt", ">", "ge", ">=", "lt", "<", "le", "<="):
+                    # Case A: RHS is a column reference -> column-to-column compare
+                    if isinstance(val, dict) and "colref" in val:
+                        other_raw = val["colref"]
+                        other_col = _resolve(other_raw)
+                        if other_col not in df.columns:
+                            raise KeyError(f"[{src}] Column '{other_raw}' not found after aliasing (wanted '{other_col}')")
+
+                        s2 = df[other_col]
+
+                        # Try date compare first
+                        s_dt  = as_dt(col)
+                        s2_dt = as_dt(other_col)
+                        if dt_any(col, s_dt) or dt_any(other_col, s2_dt):
+                            a, b = s_dt, s2_dt
                         else:
-                            # Fallback: lexicographic on strings
-                            a, b = s.astype(str), s2.astype(str)
-
-                # Case B: RHS is a scalar -> column-to-scalar compare (date→numeric→string)
-                else:
-                    # Try date compare
-                    a_dt = pd.to_datetime(s, errors="coerce")
-                    b_dt = pd.to_datetime(pd.Series([val]), errors="coerce").iloc[0]
-                    if a_dt.notna().any() and pd.notna(b_dt):
-                        a, b = a_dt, b_dt
+                            # Try numeric compare
+                            a_num = as_num(col)
+                            b_num = as_num(other_col)
+                            if num_any(col, a_num) or num_any(other_col, b_num):
+                                a, b = a_num, b_num
+                            else:
+                                # Fallback: lexicographic on strings
+                                a, b = s.astype(str), s2.astype(str)
+
+                    # Case B: RHS is a scalar -> column-to-scalar compare (date→numeric→string)
                     else:
-                        # Try numeric
-                        a_num = pd.to_numeric(s, errors="coerce")
-                        b_num = pd.to_numeric(pd.Series([val]), errors="coerce").iloc[0]
-                        if a_num.notna().any() and pd.notna(b_num):
-                            a, b = a_num, b_num
+                        # Try date compare
+                        a_dt = as_dt(col)
+                        b_dt = pd.to_datetime(pd.Series([val]), errors="coerce").iloc[0]
+                        if dt_any(col, a_dt) and pd.notna(b_dt):
+                            a, b = a_dt, b_dt
                         else:
-                            # Fallback: lexicographic
-                            a, b = s.astype(str), str(val)
-
-                # Execute the ordered comparison with the resolved (a, b)
-                if op in ("gt", ">"):
-                    m = a > b
-                elif op in ("ge", ">="):
-                    m = a >= b
-                elif op in ("lt", "<"):
-                    m = a < b
-                else:  # ("le","<=")
-                    m = a <= b
-
-            else:
-                raise ValueError(f"Unsupported filter op '{op}' in {f}")
-
-            mask &= m.fillna(False)
+                            # Try numeric
+                            a_num = as_num(col)
+                            b_num = pd.to_numeric(pd.Series([val]), errors="coerce").iloc[0]
+                            if num_any(col, a_num) and pd.notna(b_num):
+                                a, b = a_num, b_num
+                            else:
+                                # Fallback: lexicographic
+                                a, b = s.astype(str), str(val)
+
+                    # Execute the ordered comparison with the resolved (a, b)
+                    if op in ("gt", ">"):
+                        m = a > b
+                    elif op in ("ge", ">="):
+                        m = a >= b
+                    elif op in ("lt", "<"):
+                        m = a < b
+                    else:  # ("le","<=")
+                        m = a <= b
 
-        return df[mask]
-
-
-    def run(self, plan) -> Dict[str, Any]:
+                else:
+                    raise ValueError(f"Unsupported filter op '{op}' in {f}")
+
+                mask &= m.fillna(False)
+
+                # Typed tables decide compare modes on whole columns, so once most rows have failed
+                # the remaining predicates can run on the survivors only (the optimizer puts selective ones first).
+                if typed is not None and n_done < len(preds) and len(mask) >= _COMPACT_MIN_ROWS:
+                    keep = mask.to_numpy(dtype=bool)
+                    if keep.sum() * 4 <= len(keep):
+                        sel = np.flatnonzero(keep)
+                        pos = sel if pos is None else pos[sel]
+                        rel = None if rel is None else rel[sel]
+                        df, mask = df.iloc[sel], mask.iloc[sel]
+            if not blocked:
+                parts.append(df[mask])
+                break
+            parts.append(rel[mask.to_numpy(dtype=bool)])
+            found += len(parts[-1])
+            if found >= limit:
+                break
+        if blocked and stats is not None:
+            stats["limit_scan"] = {"limit": int(limit), "rows_scanned": int(hi), "rows": len(full_df)}
+
+        if dict_used and stats is not None:
+            stats["dictionary"] = dict_used
+        if tri_used and stats is not None:
+            stats["trigram_index"] = tri_used
+        return full_df.iloc[np.concatenate(parts)[:limit]] if blocked else parts[0]
+
+
+    # --- aggregate over a filtered source answered from a materialized rollup
+    _ROLLUP_FILTER_OPS = {"eq", "==", "=", "in", "ne", "!="}   # row-wise on key values alone
+
+    def _aggregate_from_rollup(self, table: TypedTable, df: pd.DataFrame, where: List[Dict[str, Any]],
+                               by: List[str], metrics: List[Tuple[str, str]]):
+        """
+        Answer aggregate(by, metrics) over `df` (rows of `table` passing `where`, maybe fewer) from a
+        rollup. Predicates must be key-only, so they select whole groups; the row count of the selected
+        groups must equal len(df), which rules out rows dropped later (limits, distinct).
+        """
+        if not rollups_enabled() or df.empty or not by:
+            return None
         t0 = time.time()
+        aggs = {c: a for (c, a) in metrics}   # same last-wins collapse as aggregate_frame
+        fcols = []
+        for f in where:
+            if str(f.get("op") or "eq").lower() not in self._ROLLUP_FILTER_OPS or isinstance(f.get("value"), dict):
+                return None
+            fcols.append(column_resolver(table.source, table.df.columns).col(f.get("col")))
+        ru = self.r.rollups.match(table, by, aggs, fcols)
+        if ru is None:
+            return None
+        parts = self._apply_filters(ru.parts, where, table.source) if where else ru.parts
+        if int(parts["__n"].sum()) != len(df):
+            return None
+        g = ru.answer(parts, by, aggs)
+        return g, {"op":"aggregate","by":by,"metrics":metrics,"input_n":len(df),"out_n":len(g),
+                   "elapsed_ms": round((time.time()-t0)*1000,2)}, \
+               {"name": ru.d.name, "groups": len(parts), "coarser": list(by) != list(ru.d.by)}
+
+    # --- join right side: an independent branch of the plan DAG (no dependency on the left frame)
+    def _fetch_right(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Load the right table and apply right_filters; a filter error is returned, not raised."""
+        src = params.get("right_source")
+        table = self.r.tables[src].get_table()
+        stats: Dict[str, Any] = {}
+        try:
+            df = self._apply_filters(table.df, params.get("right_filters", []), src, table=table, stats=stats)
+            return {"table": table, "df": df, "stats": stats, "error": None}
+        except Exception as e:
+            return {"table": table, "df": None, "stats": stats, "error": e}
+
+    # --- data version of every source a plan reads (result-cache key component)
+    def _data_versions(self, plan) -> Dict[str, str]:
+        out: Dict[str, str] = {}
+        for src in plan_sources(plan):
+            adapter = self.r.tables.get(src)
+            out[src] = adapter.data_version() if adapter is not None else "unknown"
+        return out
+
+    @staticmethod
+    def _records(frame: Optional[pd.DataFrame], meta: Dict[str, Any]) -> Dict[str, Any]:
+        # Single records conversion at the API boundary (timed separately when profiling)
+        t1 = time.perf_counter()
+        rows = frame.to_dict("records") if frame is not None else []
+        if isinstance(meta.get("profile"), dict):
+            meta["profile"]["materialize_ms"] = round((time.perf_counter() - t1) * 1000, 3)
+        return {"rows": rows, "meta": meta}
+
+    def run(self, plan, profile: Any = None) -> Dict[str, Any]:
+        return self._records(*self.run_frame(plan, profile=profile))
+
+    def run_batch(self, plans: List[Any], profile: Any = None) -> List[Dict[str, Any]]:
+        """run() for several plans (e.g. one dashboard); first filters on a shared source share one scan."""
+        return [self._records(frame, meta) for frame, meta in self.run_frame_batch(plans, profile=profile)]
+
+    def run_frame_batch(self, plans: List[Any], profile: Any = None) -> List[Tuple[Optional[pd.DataFrame], Dict[str, Any]]]:
+        plans = list(plans)
+        if hasattr(self.r, "refresh"):
+            self.r.refresh(sorted({src for p in plans for src in plan_sources(p)}))
+        return [self.run_frame(p, scan=scan, profile=profile) for p, scan in zip(plans, shared_scans(self, plans))]
+
+    def run_frame(self, plan, scan: Optional[SharedScan] = None,
+                  profile: Any = None) -> Tuple[Optional[pd.DataFrame], Dict[str, Any]]:
+        """
+        Like run(), but hands back the final DataFrame so callers can page/stream it lazily.
+        profile: True / a ProfileHook to profile each step, False to skip, None to follow ATLAS_PROFILE.
+        """
+        t0 = time.time()
+        prof = resolve_profiler(profile)
+        reloaded = self.r.refresh(list(plan_sources(plan))) if hasattr(self.r, "refresh") else {}
+        cache = _RESULT_CACHE if (result_cache_enabled() and getattr(plan, "steps", None)) else None
+        key = plan_cache_key(plan, self._data_versions(plan)) if cache is not None else None
+        hit = cache.get(key) if cache is not None else None
+        if hit is not None:
+            frame, meta = hit
+            meta = {**meta, "elapsed_ms": round((time.time()-t0)*1000, 2),
+                    "cache": {"hit": True, "key": key, **cache.stats()}}
+            if prof is not None:
+                meta["profile"] = {"hook": prof.name, "result_cache": "hit"}
+            return frame, meta
+
+        spec = chunk_spec(plan, self.r) if scan is None else None
+        sql = sql_spec(plan, self.r) if spec is None and scan is None else None
+        if prof is not None:
+            prof.plan_start(plan)
+        try:
+            if spec:
+                frame, meta = run_chunked(self, plan, spec, t0, profile=prof)
+            elif sql:
+                frame, meta = run_sql(self, plan, sql, t0, profile=prof)
+            else:
+                frame, meta = self._run_frame(plan, t0, scan=scan, profile=prof)
+        except BaseException:
+            if prof is not None:
+                prof.plan_end({})
+            raise
+        if prof is not None and (summary := prof.plan_end(meta)) is not None:
+            meta["profile"] = summary
+        if reloaded:
+            meta["reloaded"] = reloaded
+        if cache is not None:
+            # only clean runs are reusable; a failed step may succeed once data changes
+            ok = not any(l.get("error") for l in meta.get("lineage") or [])
+            stored = ok and frame is not None and cache.put(key, frame, _unprofiled(meta))
+            meta["cache"] = {"hit": False, "key": key, "stored": bool(stored), **cache.stats()}
+        return frame, meta
+
+    def _run_frame(self, plan, t0: float, seed: Optional[Dict[str, Any]] = None,
+                   scan: Optional[SharedScan] = None,
+                   profile: Optional[ProfileHook] = None) -> Tuple[Optional[pd.DataFrame], Dict[str, Any]]:
+        """
+        Execute the plan's steps. `seed` resumes mid-plan from a frame produced elsewhere (chunked scans):
+        {"frame": df, "source": str, "lineage": [...], "start": 1-based index of the first step to run}.
+        `scan` answers the first filter from a batch's shared predicate bitmaps.
+        `profile` is called around every step; its step_end result lands in lineage[i]["profile"].
+        """
         steps = getattr(plan, "steps", [])
         if not steps:
-            return {"rows": [], "meta": {"warning":"No steps to execute",
-                                         "plan_intent": getattr(plan, 'intent', None),
-                                         "plan_rationale": getattr(plan, 'rationale', None)}}
+            return None, {"warning":"No steps to execute",
+                          "plan_intent": getattr(plan, 'intent', None),
+                          "plan_rationale": getattr(plan, 'rationale', None)}
         clipped = False
         if len(steps) > MAX_STEPS:
             steps = steps[:MAX_STEPS]; clipped = True
 
-        last: Optional[ExecResult] = None
+        # Columnar intermediate: each step hands a DataFrame to the next one and
+        # records are only materialized once, after the last step.
+        cur: Optional[pd.DataFrame] = None
+        cur_meta: Dict[str, Any] = {}
         lineage: List[Dict[str, Any]] = []
         current_source: Optional[str] = None
+        start = 1
+        if seed is not None:
+            cur, current_source = seed["frame"], seed["source"]
+            lineage, start = list(seed.get("lineage") or []), seed["start"]
+        # table whose row ids still index `cur` (filter output, then row-keeping ops); lets a
+        # join use that table's JoinIndex instead of hashing both sides again
+        cur_origin: Optional[TypedTable] = None
+        cur_where: List[Dict[str, Any]] = []      # predicates that produced cur from cur_origin
+        cur_derived: set = set()                  # columns derive wrote since then
+
+        # independent DAG branches (join right-side fetches) start now and are joined at their step
+        branches = Branches(t0)
+        budget = QueryBudget.from_env()
+        for node in plan_dag(plan):
+            if node["op"] == "fetch" and start <= node["step"] <= len(steps):
+                branches.submit(node["step"], lambda p=steps[node["step"] - 1].params: self._fetch_right(p))
+
+        # steps leave through break/continue in several places, so each one is closed out when the
+        # next starts (and once after the loop): pending = (hook state, lineage length at step start)
+        pending: Optional[Tuple[Any, int]] = None
+        def _close_step():
+            if pending is not None and len(lineage) > pending[1]:
+                entry = lineage[-1]
+                res = profile.step_end(pending[0], entry, None if entry.get("error") else cur)
+                if res is not None:
+                    entry["profile"] = res
 
         for idx, s in enumerate(steps, start=1):
+            if idx < start:
+                continue
+            if profile is not None:
+                _close_step()
+                pending = (profile.step_start(idx, s.op), len(lineage))
             if s.op not in ALLOWED_OPS:
                 lineage.append({"step": idx, "error": f"disallowed op {s.op}"}); break
             if getattr(s, "source", None) and s.source not in ALLOWED_SOURCES and s.op in {"filter","vector"}:
                 lineage.append({"step": idx, "error": f"unknown source {s.source}"}); break
 
             t1 = time.time()
+            step_extra: Dict[str, Any] = {}   # op-specific lineage fields (index use, ...)
+            origin_in = cur_origin
+            if s.op not in _ROW_ID_KEEPING:
+                cur_origin = None
 
             # ---- FILTER / VECTOR ----
             if s.op in {"filter","vector"}:
                 adapter = self.r.tables[s.source]
-                df0 = adapter.get_df()  # lazy-loads CSV
-                df1, _ = _canonicalize_df(s.source, df0)
+                table = adapter.get_table()  # lazy-loads CSV once, already canonical + typed
+                df1 = table.df
 
                 where = s.params.get("where") or []
+                filter_stats: Dict[str, Any] = {}
                 try:
-                    df_out = self._apply_filters(df1, where, s.source)
+                    if scan is not None and idx == 1 and scan.table is table:
+                        df_out = scan.filter(where, stats=filter_stats)
+                    else:
+                        limit = s.params.get("limit")
+                        push = int(limit) if limit and _limit_pushable(steps, idx) else None
+                        df_out = self._apply_filters(df1, where, s.source, table=table, stats=filter_stats, limit=push)
                 except Exception as e:
                     lineage.append({"step": idx, "op": s.op, "source": s.source,
                                     "params": s.params, "error": str(e),
@@ -524,7 +1414,7 @@ class PlanExecutor:
 
                 select_cols = s.params.get("select")
                 if select_cols:
-                    sel_norm = _normalize_cols_for_source(s.source, df_out.columns, select_cols)
+                    sel_norm = column_resolver(s.source, df_out.columns).cols(select_cols)
                     missing = [c for c in sel_norm if c not in df_out.columns]
                     if missing:
                         lineage.append({"step": idx, "op": s.op, "source": s.source,
@@ -536,22 +1426,22 @@ class PlanExecutor:
                 limit = s.params.get("limit")
                 if limit: df_out = df_out.head(int(limit))
 
-                res = ExecResult(rows=df_out.to_dict("records"),
-                                 meta={"op": s.op, "source": s.source, "where": where, "limit": limit})
+                out, out_meta = df_out, {"op": s.op, "source": s.source, "where": where, "limit": limit}
+                step_extra.update(filter_stats)
                 current_source = s.source
+                cur_origin, cur_where, cur_derived = table, where, set()
 
             # ---- AGGREGATE ----
             elif s.op == "aggregate":
-                if last is None:
+                if cur is None:
                     lineage.append({"step": idx, "error":"aggregate with no input"}); break
-                df = pd.DataFrame(last.rows)
-                df2, _ = _canonicalize_df(current_source, df)
-                tmp = ExecResult(rows=df2.to_dict("records"), meta=last.meta)
+                df2 = cur
 
                 by      = s.params.get("by", [])
                 metrics = s.params.get("metrics", [])
-                by_norm      = _normalize_cols_for_source(current_source, df2.columns, by)
-                metrics_norm = _normalize_metrics_for_source(current_source, df2.columns, metrics)
+                cr           = column_resolver(current_source, df2.columns)
+                by_norm      = cr.cols(by)
+                metrics_norm = cr.metrics(metrics)
 
                 missing = [c for c in by_norm if c not in df2.columns]
                 if missing:
@@ -560,75 +1450,127 @@ class PlanExecutor:
                     if c not in df2.columns:
                         lineage.append({"step": idx, "error": f"aggregate metric column missing after normalize: {c}"}); break
 
-                res = self.r.agg.aggregate(tmp, by_norm, metrics_norm)
+                rolled = None
+                if origin_in is not None and origin_in.source == current_source \
+                        and not cur_derived & ({*by_norm} | {c for (c, _) in metrics_norm}):
+                    rolled = self._aggregate_from_rollup(origin_in, df2, cur_where, by_norm, metrics_norm)
+                est = None
+                if rolled is None and (approx := approx_settings(s.params)) is not None:
+                    est, step_extra["approximate"] = maybe_approximate(approx_aggregate, df2, approx, by_norm, metrics_norm)
+                if rolled is not None:
+                    out, out_meta, step_extra["rollup"] = rolled
+                elif est is not None:
+                    out, out_meta = est
+                else:
+                    out, out_meta = self.r.agg.aggregate_frame(df2, by_norm, metrics_norm)
 
             # ---- JOIN ----
             elif s.op == "join":
-                if last is None:
+                if cur is None:
                     lineage.append({"step": idx, "error":"join with no left input"}); break
                 right_src   = s.params.get("right_source")
-                right_where = s.params.get("right_filters", [])
                 right_sel   = s.params.get("right_select")
                 right_lim   = s.params.get("right_limit", MAX_ROWS_STEP)
 
-                right_adapter = self.r.tables[right_src]
-                right = right_adapter.filter({"where": right_where, "select": right_sel, "limit": right_lim})
-
+                # Right side goes through the same typed/indexed filter path as a filter step (on a
+                # branch thread), then is projected to join keys + columns the rest of the plan can still see.
+                fetched = branches.result(idx)
+                step_extra["fetch"] = branches.timing(idx, t1)
+                right_all = fetched["table"].df
                 pairs = s.params.get("on_pairs")
-                left_df  = pd.DataFrame(last.rows)
-                right_df = pd.DataFrame(right.rows)
-                left_df2, _ = _canonicalize_df(current_source, left_df)
-                right_df2, _ = _canonicalize_df(right_src, right_df)
+                left_df2 = cur
 
-                left_keys, right_keys = [], []
-                for (l, r) in pairs:
-                    l2 = _normalize_cols_for_source(current_source, left_df2.columns,  [l])[0]
-                    r2 = _normalize_cols_for_source(right_src,      right_df2.columns, [r])[0]
-                    left_keys.append(l2); right_keys.append(r2)
+                lcr, rcr = column_resolver(current_source, left_df2.columns), column_resolver(right_src, right_all.columns)
+                left_keys  = [lcr.col(l) for (l, _) in pairs]
+                right_keys = [rcr.col(r) for (_, r) in pairs]
 
                 miss_l = [c for c in left_keys  if c not in left_df2.columns]
-                miss_r = [c for c in right_keys if c not in right_df2.columns]
+                miss_r = [c for c in right_keys if c not in right_all.columns]
                 if miss_l or miss_r:
                     lineage.append({"step": idx, "error": f"join keys missing after normalize: left={miss_l}, right={miss_r}"}); break
 
-                out_df = left_df2.merge(right_df2, how=s.params.get("how","left"),
-                                        left_on=left_keys, right_on=right_keys)
-                res = ExecResult(rows=out_df.to_dict("records"),
-                                 meta={"op":"join","how":s.params.get("how","left"),
-                                       "on": list(zip(left_keys, right_keys)),
-                                       "left_n": len(left_df2), "right_n": len(right_df2), "out_n": len(out_df)})
+                right_stats = fetched["stats"]
+                if fetched["error"] is not None:
+                    lineage.append({"step": idx, "op": "join", "source": right_src, "params": s.params,
+                                    "error": f"right filters: {fetched['error']}", "elapsed_ms": round((time.time()-t1)*1000, 2)})
+                    break
+                right_df2 = fetched["df"]
+
+                wanted = right_sel if right_sel else _columns_used_after(steps, idx)
+                if wanted is not None:
+                    right_df2 = right_df2[_right_keep(list(right_all.columns), right_keys, set(rcr.cols(wanted)),
+                                                      bool(right_sel), list(left_df2.columns))]
+                if right_lim: right_df2 = right_df2.head(int(right_lim))
+
+                how = s.params.get("how","left")
+                per_row = row_bytes(left_df2) + row_bytes(right_df2)
+                jidx = None
+                if origin_in is not None and how in ("left", "inner") and len(left_df2) and len(right_df2):
+                    jidx = self.r.join_index(origin_in.source, left_keys, right_src, right_keys)
+                if jidx is not None:
+                    n_out, rows = self.r.joiner.indexed_rows(left_df2, right_df2, jidx, left_keys, right_keys, how)
+                    sliced = True
+                    step_extra["join_index"] = {"left": origin_in.source, "right": right_src,
+                                                "keys": list(zip(left_keys, right_keys)), "pairs": jidx.n_pairs}
+                else:
+                    small = MAX_ROWS_STEP
+                    if budget.limit:
+                        small = min(small, int(budget.limit // max(per_row, 1.0)))
+                    n_out, rows, sliced = self.r.joiner.merge_rows(left_df2, right_df2, left_keys, right_keys, how, small)
+                # sized joins build at most MAX_ROWS_STEP rows, checked against the budget before they exist
+                try:
+                    if n_out is None:                      # unsized (right/outer) or known small: built whole
+                        out = rows(0, None)
+                        n_out = len(out)
+                    else:
+                        out = budget.produce(idx, min(n_out, MAX_ROWS_STEP), per_row, rows, sliced)
+                except BudgetExceeded as e:
+                    lineage.append({"step": idx, "op": "join", "source": right_src, "params": s.params,
+                                    "error": str(e), "elapsed_ms": round((time.time()-t1)*1000, 2)})
+                    break
+                out_meta = {"op":"join","how":s.params.get("how","left"),
+                            "on": list(zip(left_keys, right_keys)),
+                            "left_n": len(left_df2), "right_n": len(right_df2), "out_n": n_out}
+                if n_out > MAX_ROWS_STEP:
+                    out_meta["warning"] = f"rows clipped to {MAX_ROWS_STEP}"
+                step_extra["right"] = {"source": right_src, "rows": len(right_df2),
+                                       "cols": list(right_df2.columns), **right_stats}
                 current_source = "ALL"
 
             # ---- DERIVE ----
             elif s.op == "derive":
-                if last is None:
+                if cur is None:
                     lineage.append({"step": idx, "error": "derive with no input"}); break
-                df = pd.DataFrame(last.rows)
-                df2, _ = _canonicalize_df(current_source, df)
+                # shallow copy: new columns must not leak into the adapter's cached frame
+                df2 = cur.copy(deep=False)
                 exprs = s.params.get("expressions") or []
+                # source columns read through the origin table's parsed date/numeric views (no re-parse)
+                written = cur_derived | {e.get("as") for e in exprs}
+                def _table_of(c):
+                    ok = origin_in is not None and c not in written and c in origin_in.df.columns
+                    return origin_in if ok else None
                 try:
-                    for e in exprs:
-                        out_col = e.get("as")
-                        expr    = (e.get("expr") or "").strip()
-                        if not out_col or not expr:
-                            continue
-                        # VERY simple parser: support "<colA> - <colB>" / "<colA> + <colB>"
-                        m = re.match(r"^\s*([A-Za-z0-9_]+)\s*([+\-*/])\s*([A-Za-z0-9_]+)\s*$", expr)
-                        if not m:
-                            raise ValueError(f"unsupported derive expr: {expr!r}")
-                        a, op, b = m.group(1), m.group(2), m.group(3)
-                        # normalize input column names
-                        a_norm = _normalize_cols_for_source(current_source, df2.columns, [a])[0]
-                        b_norm = _normalize_cols_for_source(current_source, df2.columns, [b])[0]
-                        if a_norm not in df2.columns or b_norm not in df2.columns:
-                            raise KeyError(f"derive columns missing after normalize: {a_norm}, {b_norm}")
-                        sA = pd.to_numeric(df2[a_norm], errors="coerce").fillna(0)
-                        sB = pd.to_numeric(df2[b_norm], errors="coerce").fillna(0)
-                        if   op == "-": df2[out_col] = sA - sB
-                        elif op == "+": df2[out_col] = sA + sB
-                        elif op == "*": df2[out_col] = sA * sB
-                        elif op == "/": df2[out_col] = sA.replace(0, pd.NA) / sB.replace(0, pd.NA)
-                    res = ExecResult(rows=df2.to_dict("records"), meta={"op":"derive","n":len(df2)})
+                    # parse every expression up front (memoized), then evaluate column-at-a-time
+                    compiled = [(e.get("as"), compile_expr(self._derive_text(e, df2, current_source, _table_of)))
+                                for e in exprs if e.get("as") and (e.get("expr") or "").strip()]
+                    cols_np: Dict[str, np.ndarray] = {}
+                    for out_col, ce in compiled:
+                        cr = column_resolver(current_source, df2.columns)   # earlier outputs are columns too
+                        names = {c: cr.col(c) for c in ce.columns}
+                        missing = [n for n in names.values() if n not in df2.columns]
+                        if missing:
+                            raise KeyError(f"derive columns missing after normalize: {missing}")
+                        def _col(name, names=names):
+                            c = names[name]
+                            if c not in cols_np:
+                                cols_np[c] = column_values(df2[c], table=_table_of(c))
+                            return cols_np[c]
+                        df2[out_col] = ce.evaluate(_col, len(df2))
+                        cols_np.pop(out_col, None)
+                        df2 = budget.fit(idx, df2)
+                    step_extra["derived"] = [c for (c, _) in compiled]
+                    cur_derived |= set(step_extra["derived"])
+                    out, out_meta = df2, {"op":"derive","n":len(df2)}
                 except Exception as e:
                     lineage.append({"step": idx, "op": "derive", "source": getattr(s,"source",current_source),
                                     "params": s.params, "error": str(e),
@@ -641,7 +1583,7 @@ class PlanExecutor:
                 t_sort0 = time.time()
 
                 # ✅ Change #1: handle "sort with no input" as a no-op up front
-                if last is None:
+                if cur is None:
                     lineage.append({
                         "step": idx, "op": "sort",
                         "source": getattr(s, "source", current_source),
@@ -652,7 +1594,7 @@ class PlanExecutor:
                         "rows_after_step": 0,
                         "elapsed_ms": 0.0
                     })
-                    last = ExecResult(rows=[], meta={"op":"sort","by":None,"ascending":None,"limit":s.params.get("limit")})
+                    cur, cur_meta = pd.DataFrame(), {"op":"sort","by":None,"ascending":None,"limit":s.params.get("limit")}
                     continue
 
                 # ✅ Change #2: pre-init locals so 'except' can safely reference them
@@ -662,12 +1604,10 @@ class PlanExecutor:
                 ord_word = ""
 
                 try:
-                    # Load current rows and canonicalize ONHAND headers where needed
-                    df = pd.DataFrame(last.rows)
+                    df = cur
 
                     # NEW: if there are 0 rows, keep it a no-op (don’t fail the plan)
                     if df.empty:
-                        res = ExecResult(rows=[], meta={"op":"sort","by":None,"ascending":None,"limit":s.params.get("limit")})
                         lineage.append({
                             "step": idx, "op": "sort",
                             "source": getattr(s, "source", current_source),
@@ -678,10 +1618,10 @@ class PlanExecutor:
                             "rows_after_step": 0,
                             "elapsed_ms": 0.0
                         })
-                        last = res
+                        cur_meta = {"op":"sort","by":None,"ascending":None,"limit":s.params.get("limit")}
                         continue
 
-                    df2, _ = _canonicalize_df(current_source, df)
+                    df2 = df   # headers were canonicalized once at load time
 
                     # ---- SORT (LLM-first; regex fallback) ----
                     llm_sort_by = s.params.get("sort_by")
@@ -697,8 +1637,6 @@ class PlanExecutor:
                     else:
                         if not raw_by:
                             # treat as a no-op sort
-                            res = ExecResult(rows=df2.to_dict("records"),
-                                            meta={"op":"sort","by":None,"ascending":None,"limit":s.params.get("limit")})
                             lineage.append({
                                 "step": idx, "op": "sort",
                                 "source": getattr(s, "source", current_source),
@@ -709,7 +1647,7 @@ class PlanExecutor:
                                 "rows_after_step": len(df2),
                                 "elapsed_ms": 0.0
                             })
-                            last = res
+                            cur, cur_meta = df2, {"op":"sort","by":None,"ascending":None,"limit":s.params.get("limit")}
                             continue
                         raw_by_str = str(raw_by).strip()
                         # accept optional trailing 'order' e.g. "reserved_qty descending order"
@@ -720,13 +1658,8 @@ class PlanExecutor:
                         # drop stray trailing literal "order"
                         base_by  = _re.sub(r"\border\b$", "", base_by, flags=_re.IGNORECASE).strip()
 
-                    # Alias/canonicalize column
-                    _alias = COLUMN_ALIASES.get(current_source, {})
-                    k1 = base_by.lower()
-                    k2 = _re.sub(r'[\s\-_]+', '', k1)
-                    by_col = _alias.get(k1) or _alias.get(k2) or base_by
-                    # normalize against actual df2 columns (semantic if needed)
-                    by_col = _normalize_cols_for_source(current_source, df2.columns, [by_col])[0]
+                    # Alias/canonicalize against actual df2 columns (semantic if needed)
+                    by_col = column_resolver(current_source, df2.columns).sort_col(base_by)
                     if by_col not in df2.columns:
                         raise KeyError(f"sort column missing after normalize: wanted={base_by!r}, got={by_col!r}")
 
@@ -756,21 +1689,20 @@ class PlanExecutor:
                     col_ser = df2[by_col]
                     as_num  = pd.to_numeric(col_ser, errors="coerce")
 
-                    if as_num.notna().any():
+                    limit = s.params.get("limit")
+                    if as_num.notna().any() and limit:
+                        out = _take_topk(df2, as_num, int(limit), ascending)   # partial selection
+                    elif as_num.notna().any():
                         tmp = df2.assign(__k__=as_num)
                         out = tmp.sort_values(by="__k__", ascending=ascending, kind="mergesort").drop(columns="__k__")
                     else:
                         out = df2.sort_values(by=by_col, ascending=ascending, kind="mergesort")
 
-                    limit = s.params.get("limit")
                     if limit:
                         out = out.head(int(limit))
+                    out = budget.fit(idx, out)
 
                     # 4) Build result and lineage, then continue
-                    res = ExecResult(
-                        rows=out.to_dict(orient="records"),
-                        meta={"op":"sort","by":by_col,"ascending":ascending,"limit":limit}
-                    )
                     dt = time.time() - t_sort0
                     lineage.append({
                         "step": idx,
@@ -787,7 +1719,7 @@ class PlanExecutor:
                         "elapsed_ms": round(dt*1000, 2)
                     })
 
-                    last = res
+                    cur, cur_meta = out, {"op":"sort","by":by_col,"ascending":ascending,"limit":limit}
                     continue
 
                 except Exception as e:
@@ -800,7 +1732,7 @@ class PlanExecutor:
                         "by_resolved": by_col,                 # now always defined (None ok)
                         "order_in": order_param or ord_word or None,
                         "ascending_resolved": ascending,       # now always defined (None ok)
-                        "rows_after_step": len(last.rows) if last else 0,
+                        "rows_after_step": len(cur) if cur is not None else 0,
                         "elapsed_ms": round(dt*1000, 2),
                         "error": f"{type(e).__name__}: {e}"
                     })
@@ -814,15 +1746,13 @@ class PlanExecutor:
             # ---- TOPK ----
             elif s.op == "topk":
                 # params: {"by": "<col>" or ["<col>"], "k": int, "ascending": bool}
-                t0 = _now()
+                t_topk0 = _now()
 
-                if last is None:
+                if cur is None:
                     lineage.append({"step": idx, "error": "topk with no input"})
                     break
 
-                # Load current rows and canonicalize ONHAND headers where needed
-                df = pd.DataFrame(last.rows)
-                df2, _ = _canonicalize_df(current_source, df)
+                df2 = cur   # headers were canonicalized once at load time
 
                 params = s.params or {}
                 k   = int(params.get("k", 10))
@@ -836,28 +1766,27 @@ class PlanExecutor:
                 by_col = None
                 if by:
                     # Map to canonical/internal column name
-                    by_norm_list = _normalize_cols_for_source(current_source, df2.columns, [by])
-                    by_col = by_norm_list[0] if by_norm_list else None
+                    by_col = column_resolver(current_source, df2.columns).col(by)
                     if not by_col or by_col not in df2.columns:
                         raise KeyError(f"topk column missing after normalize: wanted={by!r}, got={by_col!r}")
 
-                    # --- numeric-aware, stable sort (mirrors 'sort' op) ---
+                    # --- numeric-aware, stable ordering (mirrors 'sort' op); numeric keys use partial selection ---
                     col_ser = df2[by_col]
                     as_num  = pd.to_numeric(col_ser, errors="coerce")
                     if as_num.notna().any():
-                        tmp = df2.assign(__k__=as_num)
-                        df2 = tmp.sort_values(by="__k__", ascending=asc, kind="mergesort").drop(columns="__k__")
+                        df2 = _take_topk(df2, as_num, k, asc)
                     else:
                         df2 = df2.sort_values(by=by_col, ascending=asc, kind="mergesort")
 
                 # take top K after (optional) sort
                 out = df2.head(k).reset_index(drop=True)
+                try:
+                    out = budget.fit(idx, out)
+                except BudgetExceeded as e:
+                    lineage.append({"step": idx, "op": "topk", "error": str(e), "elapsed_ms": _elapsed_ms(t_topk0)})
+                    break
 
                 # Build result and enriched lineage (like 'sort')
-                res = ExecResult(
-                    rows=out.to_dict(orient="records"),
-                    meta={"op": "topk", "by": by_col, "ascending": asc, "k": k}
-                )
                 lineage.append({
                     "step": idx,
                     "op": "topk",
@@ -867,49 +1796,73 @@ class PlanExecutor:
                     "ascending_resolved": bool(asc),
                     "k": int(k),
                     "rows_after_step": len(out),
-                    "elapsed_ms": _elapsed_ms(t0),
+                    "elapsed_ms": _elapsed_ms(t_topk0),
                 })
-                last = res
+                cur, cur_meta = out, {"op": "topk", "by": by_col, "ascending": asc, "k": k}
                 continue
 
 
 
             # ---- DISTINCT ----
             elif s.op == "distinct":
-                if last is None:
+                if cur is None:
                     lineage.append({"step": idx, "error": "distinct with no input"}); break
-                df = pd.DataFrame(last.rows)
-                df2, _ = _canonicalize_df(current_source, df)
+                df2 = cur
                 cols = s.params.get("cols")
+                cols_norm = None
                 if cols:
-                    cols_norm = _normalize_cols_for_source(current_source, df2.columns, cols)
+                    cols_norm = column_resolver(current_source, df2.columns).cols(cols)
                     missing = [c for c in cols_norm if c not in df2.columns]
                     if missing:
                         lineage.append({"step": idx, "error": f"distinct columns missing after normalize: {missing}"}); break
-                    out = df2.drop_duplicates(subset=cols_norm)
+                est = None
+                if (approx := approx_settings(s.params)) is not None:
+                    est, step_extra["approximate"] = maybe_approximate(approx_distinct, df2, approx, cols_norm)
+                if est is not None:
+                    out = est
                 else:
-                    out = df2.drop_duplicates()
-                res = ExecResult(rows=out.to_dict("records"),
-                                 meta={"op":"distinct","cols":cols or "ALL"})
+                    out = df2.drop_duplicates(subset=cols_norm)
+                out_meta = {"op":"distinct","cols":cols or "ALL"}
 
             else:
                 lineage.append({"step": idx, "error":"unsupported op"}); break
 
             dt = time.time() - t1
-            if len(res.rows) > MAX_ROWS_STEP:
-                res.rows = res.rows[:MAX_ROWS_STEP]
-                res.meta["warning"] = f"rows clipped to {MAX_ROWS_STEP}"
+            if len(out) > MAX_ROWS_STEP:
+                out = out.head(MAX_ROWS_STEP)
+                out_meta["warning"] = f"rows clipped to {MAX_ROWS_STEP}"
+            try:
+                out = budget.fit(idx, out)
+            except BudgetExceeded as e:
+                lineage.append({"step": idx, "op": s.op, "source": getattr(s, "source", current_source),
+                                "params": s.params, "error": str(e), "elapsed_ms": round(dt*1000,2)})
+                break
             lineage.append({"step": idx, "op": s.op, "source": getattr(s, "source", current_source),
-                            "params": s.params, "rows_after_step": len(res.rows), "elapsed_ms": round(dt*1000,2)})
-            last = res
-
-        return {
-            "rows": last.rows if last else [],
-            "meta": {
-                "plan_intent": getattr(plan, 'intent', None),
-                "plan_rationale": getattr(plan, 'rationale', None),
-                "lineage": lineage,
-                "clipped": clipped,
-                "elapsed_ms": round((time.time()-t0)*1000, 2)
-            }
+                            "params": s.params, "rows_after_step": len(out), "elapsed_ms": round(dt*1000,2),
+                            **step_extra})
+            cur, cur_meta = out, out_meta
+
+        if profile is not None:
+            _close_step()
+        skipped = branches.cancel()          # fetches for joins the chain never reached
+        for e in lineage:
+            if e.get("step") in budget.steps:
+                e["memory"] = budget.steps[e["step"]]
+        budget.close()
+        meta = {
+            "plan_intent": getattr(plan, 'intent', None),
+            "plan_rationale": getattr(plan, 'rationale', None),
+            "lineage": lineage,
+            "clipped": clipped,
+            "elapsed_ms": round((time.time()-t0)*1000, 2),
+            "memory": budget.summary(),
         }
+        if len(branches) and seed is None:
+            meta["dag"] = plan_dag(plan)
+            for node in meta["dag"]:
+                if node["op"] == "fetch" and node["step"] in skipped:
+                    node["skipped"] = True
+        if any("method" in (l.get("approximate") or {}) for l in lineage):
+            meta["approximate"] = True
+            meta["badges"] = ["APPROXIMATE"]
+        return cur, meta
@@ -0,0 +1,202 @@
+# atlas_plan_optimizer.py
+# Rule-based rewrite pass between route_query() and PlanExecutor.run()
+# - Drops no-op steps (sort without a column, empty derive, sort ahead of an order-insensitive aggregate)
+# - Drops a sort that a later sort on the same column overrides (stable sorts on one key compose)
+# - Fuses sort + topk into one sort-with-limit (the executor answers it by partial selection)
+# - Orders filter predicates by estimated selectivity (index-able, then cheap, then scans)
+# - Pushes a trailing head(k) into the first filter's limit when no later step needs the full set
+# Rewrites never change rows; each one is recorded so meta can show original vs optimized plans.
+# ATLAS_OPTIMIZER=0 disables the pass.
+
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import os, re, copy
+
+try:
+    from atlas_core.atlas_query_router import Step
+    from atlas_core.atlas_indexes import HASH_INDEX_COLS
+except ImportError:  # local package relative import
+    from .atlas_query_router import Step
+    from .atlas_indexes import HASH_INDEX_COLS
+
+# Aggregates whose result doesn't depend on input row order
+_ORDER_FREE_AGGS = {"count", "size", "sum", "min", "max", "mean", "median", "nunique"}
+# Steps that keep every row in place (a head(k) after them equals a head(k) before them)
+_ROW_PRESERVING = {"derive"}
+_ORDER_WORDS_RE = re.compile(r"\s+(ascending|descending|asc|desc)(\s+order)?\s*$", re.IGNORECASE)
+
+
+def optimizer_enabled() -> bool:
+    return os.getenv("ATLAS_OPTIMIZER", "1") != "0"
+
+
+def plan_to_dict(plan: Any) -> Dict[str, Any]:
+    """JSON-friendly view of a plan for meta/debug output."""
+    return {
+        "intent": getattr(plan, "intent", None),
+        "rationale": getattr(plan, "rationale", None),
+        "steps": [{"op": s.op, "source": getattr(s, "source", None), "params": dict(s.params or {})}
+                  for s in (getattr(plan, "steps", None) or [])],
+    }
+
+
+# ---------- Step helpers ----------
+def _derived_cols(s: Step) -> set:
+    """Casefolded columns a derive step writes."""
+    exprs = (s.params or {}).get("expressions") or []
+    return {str(e.get("as")).casefold() for e in exprs if isinstance(e, dict) and e.get("as")}
+
+def _sort_key(s: Step) -> Optional[str]:
+    """Casefolded column a sort step orders by (mirrors the executor's by/sort_by parsing)."""
+    p = s.params or {}
+    raw = p.get("sort_by") or p.get("by")
+    if isinstance(raw, list):
+        raw = raw[0] if raw else None
+    if not raw:
+        return None
+    base = _ORDER_WORDS_RE.sub("", str(raw).strip())
+    base = re.sub(r"\border\b$", "", base, flags=re.IGNORECASE).strip()
+    return base.casefold() or None
+
+def _topk_key(s: Step) -> Optional[str]:
+    by = (s.params or {}).get("by")
+    if isinstance(by, list):
+        by = by[0] if by else None
+    return str(by).strip().casefold() if by else None
+
+def _is_noop(s: Step) -> bool:
+    p = s.params or {}
+    if s.op == "sort":
+        return _sort_key(s) is None
+    if s.op == "derive":
+        return not any(e.get("as") and (e.get("expr") or "").strip() for e in (p.get("expressions") or []))
+    return False
+
+def _pred_rank(f: Dict[str, Any]) -> int:
+    """Lower = expected to keep fewer rows / cheaper to answer."""
+    op = (f.get("op") or "eq").lower()
+    col = str(f.get("col") or "").lower()
+    keyed = col in HASH_INDEX_COLS
+    if op in ("eq", "==", "="):
+        return 0 if keyed else 2
+    if op == "in":
+        return 1 if keyed else 3
+    if op in ("gt", ">", "ge", ">=", "lt", "<", "le", "<="):
+        return 5 if isinstance(f.get("value"), dict) else 4   # colref compares scan both columns
+    if op == "contains":
+        return 6
+    return 7   # ne and anything unknown: keeps most rows
+
+
+# ---------- Rewrite rules ----------
+def _drop_noops(steps: List[Step], notes: List[Dict[str, Any]]) -> List[Step]:
+    out: List[Step] = []
+    for i, s in enumerate(steps):
+        # the first step seeds the executor's input; never drop it
+        if i > 0 and _is_noop(s):
+            notes.append({"rule": "drop_noop", "op": s.op, "step": i + 1}); continue
+        out.append(s)
+    return out
+
+def _drop_shadowed_sorts(steps: List[Step], notes: List[Dict[str, Any]]) -> List[Step]:
+    out: List[Step] = []
+    for i, s in enumerate(steps):
+        if s.op == "aggregate" and out and out[-1].op == "sort":
+            aggs = {str(a).lower() for (_, a) in ((s.params or {}).get("metrics") or [])}
+            # a sort with a limit is a row cut, not just an order: the aggregate would see other rows
+            if aggs and aggs <= _ORDER_FREE_AGGS and len(out) > 1 and not (out[-1].params or {}).get("limit"):
+                notes.append({"rule": "drop_sort_before_aggregate", "by": _sort_key(out[-1])})
+                out.pop()
+        if s.op == "sort" and len(out) > 1:
+            # earlier sort on the same key, only row-preserving steps in between
+            # a derive that rewrites the key reorders ties: the earlier sort still decides them
+            j = len(out) - 1
+            while j > 0 and out[j].op in _ROW_PRESERVING and _sort_key(s) not in _derived_cols(out[j]):
+                j -= 1
+            if out[j].op == "sort" and _sort_key(out[j]) == _sort_key(s) and not (out[j].params or {}).get("limit"):
+                notes.append({"rule": "drop_shadowed_sort", "by": _sort_key(s)})
+                del out[j]
+        out.append(s)
+    return out
+
+def _fuse_sort_topk(steps: List[Step], notes: List[Dict[str, Any]]) -> List[Step]:
+    out: List[Step] = []
+    for s in steps:
+        prev = out[-1] if out else None
+        if s.op == "topk" and prev is not None and prev.op == "sort" and len(out) > 1:
+            k = int((s.params or {}).get("k", 10))
+            lim = (prev.params or {}).get("limit")
+            if lim:
+                k = min(int(lim), k)
+            tkey = _topk_key(s)
+            if k <= 0:
+                out.append(s); continue   # limit 0 means "no limit" to the executor: keep the topk
+            if tkey is None:
+                # head(k) of the sorted rows
+                params = {**(prev.params or {}), "limit": k}
+                out[-1] = Step("sort", prev.source, params)
+                notes.append({"rule": "fuse_sort_topk", "by": _sort_key(prev), "k": k}); continue
+            if tkey == _sort_key(prev):
+                # topk re-sorts on the same key: its direction wins
+                by = s.params["by"]
+                asc = bool(s.params.get("ascending", False))
+                out[-1] = Step("sort", prev.source, {"by": by if isinstance(by, list) else [by],
+                                                      "order": "asc" if asc else "desc",
+                                                      "ascending": asc, "limit": k})
+                notes.append({"rule": "fuse_sort_topk", "by": tkey, "k": k}); continue
+        out.append(s)
+    return out
+
+def _order_filters(steps: List[Step], notes: List[Dict[str, Any]]) -> List[Step]:
+    out: List[Step] = []
+    for i, s in enumerate(steps):
+        where = (s.params or {}).get("where") if s.op in ("filter", "vector") else None
+        if where and len(where) > 1:
+            ordered = sorted(where, key=_pred_rank)   # stable: ties keep the router's order
+            if ordered != list(where):
+                s = Step(s.op, s.source, {**s.params, "where": ordered})
+                notes.append({"rule": "order_filters", "step": i + 1,
+                              "cols": [f.get("col") for f in ordered]})
+        out.append(s)
+    return out
+
+def _push_limit(steps: List[Step], notes: List[Dict[str, Any]]) -> List[Step]:
+    """filter → (row-preserving)* → topk(no by): the filter only ever needs the first k rows."""
+    if len(steps) < 2 or steps[0].op not in ("filter", "vector"):
+        return steps
+    last = steps[-1]
+    if last.op != "topk" or _topk_key(last) is not None:
+        return steps
+    if any(s.op not in _ROW_PRESERVING for s in steps[1:-1]):
+        return steps
+    k = int((last.params or {}).get("k", 10))
+    if k <= 0:
+        return steps   # limit 0 means "no limit" to the executor
+    first = steps[0]
+    lim = (first.params or {}).get("limit")
+    new_lim = min(int(lim), k) if lim else k
+    notes.append({"rule": "push_limit", "limit": new_lim})
+    return [Step(first.op, first.source, {**(first.params or {}), "limit": new_lim})] + steps[1:-1]
+
+
+_RULES = (_drop_noops, _drop_shadowed_sorts, _fuse_sort_topk, _order_filters, _push_limit)
+
+def optimize_plan(plan: Any) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Return (optimized_plan, info). The input plan is never mutated.
+    info = {"enabled": bool, "rewrites": [{"rule": ..., ...}], "steps_in": n, "steps_out": m}
+    """
+    steps = list(getattr(plan, "steps", None) or [])
+    info: Dict[str, Any] = {"enabled": optimizer_enabled(), "rewrites": [],
+                            "steps_in": len(steps), "steps_out": len(steps)}
+    if not info["enabled"] or not steps:
+        return plan, info
+    out = [Step(s.op, s.source, copy.deepcopy(s.params or {})) for s in steps]
+    for rule in _RULES:
+        out = rule(out, info["rewrites"])
+    info["steps_out"] = len(out)
+    if not info["rewrites"]:
+        return plan, info
+    opt = copy.copy(plan)
+    opt.steps = out
+    return opt, info
@@ -0,0 +1,121 @@
+# atlas_profile.py
+# Per-step profiling hooks for PlanExecutor
+# - ProfileHook: plan_start / step_start / step_end / plan_end; step_end returns the dict stored
+#   under lineage[i]["profile"], plan_end returns meta["profile"]
+# - ResourceProfiler (default): wall + CPU time (the executing thread's), peak traced-memory delta
+#   (tracemalloc, only while a profiled plan runs), bytes of the step's output frame, and the
+#   index/cache paths the step hit (read off its lineage entry)
+# - Switchable per request: run(plan, profile=True | hook); ATLAS_PROFILE=1 profiles every plan
+
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+import os, threading, time, tracemalloc
+
+import pandas as pd
+
+try:
+    from atlas_core.atlas_result_cache import frame_nbytes
+except ImportError:  # local package relative import
+    from .atlas_result_cache import frame_nbytes
+
+# lineage keys that mean an index, rollup, shared scan or cache answered (part of) the step
+HIT_KEYS = ("index", "range_index", "dictionary", "trigram_index", "join_index", "rollup", "shared_scan")
+
+
+def step_hits(entry: Dict[str, Any]) -> List[str]:
+    hits = [k for k in HIT_KEYS if entry.get(k)]
+    right = entry.get("right") or {}
+    hits += [f"right.{k}" for k in HIT_KEYS if right.get(k)]
+    return hits
+
+
+class ProfileHook:
+    """No-op base; subclasses override what they measure."""
+    name = "hook"
+
+    def plan_start(self, plan: Any) -> None:
+        pass
+
+    def step_start(self, step: int, op: str) -> Any:
+        return None
+
+    def step_end(self, state: Any, entry: Dict[str, Any], frame: Optional[pd.DataFrame]) -> Optional[Dict[str, Any]]:
+        return None
+
+    def plan_end(self, meta: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return None
+
+
+# tracemalloc is process-wide: started by the first profiled plan, stopped by the last one
+_TRACE_LOCK = threading.Lock()
+_TRACE_USERS = 0
+_TRACE_OWNED = False
+
+def _trace_acquire() -> None:
+    global _TRACE_USERS, _TRACE_OWNED
+    with _TRACE_LOCK:
+        if _TRACE_USERS == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _TRACE_OWNED = True
+        _TRACE_USERS += 1
+
+def _trace_release() -> None:
+    global _TRACE_USERS, _TRACE_OWNED
+    with _TRACE_LOCK:
+        _TRACE_USERS = max(0, _TRACE_USERS - 1)
+        if _TRACE_USERS == 0 and _TRACE_OWNED:
+            tracemalloc.stop()
+            _TRACE_OWNED = False
+
+
+class ResourceProfiler(ProfileHook):
+    """
+    Wall/CPU/memory per step. Peak memory is the traced peak above the allocation level at step
+    start; concurrent profiled plans share tracemalloc's peak, so treat it as an upper bound.
+    """
+    name = "resource"
+
+    def __init__(self) -> None:
+        self.steps: List[Any] = []   # (step number, profile)
+        self._tracing = False
+
+    def plan_start(self, plan: Any) -> None:
+        _trace_acquire()
+        self._tracing = True
+        self._t0, self._c0 = time.perf_counter(), time.thread_time()
+
+    def step_start(self, step: int, op: str) -> Any:
+        base = 0
+        if self._tracing:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        return (time.perf_counter(), time.thread_time(), base)
+
+    def step_end(self, state: Any, entry: Dict[str, Any], frame: Optional[pd.DataFrame]) -> Dict[str, Any]:
+        w0, c0, base = state
+        prof = {"wall_ms": round((time.perf_counter() - w0) * 1000, 3),
+                "cpu_ms": round((time.thread_time() - c0) * 1000, 3),
+                "mem_peak_delta_bytes": (max(0, tracemalloc.get_traced_memory()[1] - base)
+                                         if self._tracing else None),
+                "bytes_out": frame_nbytes(frame) if not entry.get("error") else 0,
+                "hits": step_hits(entry)}
+        self.steps.append((entry.get("step"), prof))
+        return prof
+
+    def plan_end(self, meta: Dict[str, Any]) -> Dict[str, Any]:
+        if self._tracing:
+            _trace_release()
+            self._tracing = False
+        return {"hook": self.name, "steps": len(self.steps),
+                "wall_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+                "cpu_ms": round((time.thread_time() - self._c0) * 1000, 3),
+                "hot_step": max(self.steps, key=lambda sp: sp[1]["wall_ms"])[0] if self.steps else None}
+
+
+def resolve_profiler(profile: Any) -> Optional[ProfileHook]:
+    """profile=True -> ResourceProfiler, a ProfileHook -> itself, False -> off, None -> ATLAS_PROFILE."""
+    if isinstance(profile, ProfileHook):
+        return profile
+    if profile is None:
+        profile = os.getenv("ATLAS_PROFILE", "0") == "1"
+    return ResourceProfiler() if profile else None
@@ -0,0 +1,117 @@
+# atlas_result_cache.py
+# Plan-level result cache for PlanExecutor.run
+# - Key: sha1 of the canonical plan (intent/steps as sorted JSON) + the data version of every source it reads
+# - Value: the final DataFrame + executor meta (records are materialized per hit)
+# - LRU order, TTL expiry and a byte budget (DataFrame.memory_usage(deep=True))
+# - Env: ATLAS_RESULT_CACHE=0 disables; ATLAS_RESULT_CACHE_TTL (s, default 300),
+#        ATLAS_RESULT_CACHE_MB (default 256), ATLAS_RESULT_CACHE_SIZE (entries, default 256)
+
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import os, json, time, hashlib, threading
+
+import pandas as pd
+
+
+def result_cache_enabled() -> bool:
+    return os.getenv("ATLAS_RESULT_CACHE", "1") != "0"
+
+
+def _canonical(obj: Any) -> Any:
+    """JSON-stable form: tuples -> lists, dict keys sorted by json.dumps, odd scalars -> str."""
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(v) for v in obj]
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    return str(obj)
+
+def plan_fingerprint(plan: Any) -> Dict[str, Any]:
+    return {
+        "intent": getattr(plan, "intent", None),
+        "steps": [{"op": s.op, "source": getattr(s, "source", None), "params": _canonical(s.params or {})}
+                  for s in (getattr(plan, "steps", None) or [])],
+    }
+
+def plan_sources(plan: Any) -> Tuple[str, ...]:
+    """Every source a plan reads: filter/vector sources and join right sides."""
+    out = []
+    for s in getattr(plan, "steps", None) or []:
+        if s.op in ("filter", "vector") and getattr(s, "source", None):
+            out.append(s.source)
+        elif s.op == "join" and (s.params or {}).get("right_source"):
+            out.append(s.params["right_source"])
+    return tuple(sorted(set(out)))
+
+def plan_cache_key(plan: Any, versions: Dict[str, str]) -> str:
+    payload = json.dumps({"plan": plan_fingerprint(plan), "data": versions}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def frame_nbytes(df: Optional[pd.DataFrame]) -> int:
+    if df is None:
+        return 0
+    try:
+        return int(df.memory_usage(deep=True, index=True).sum())
+    except Exception:
+        return 0
+
+
+class ResultCache:
+    """Thread-safe LRU + TTL cache bounded by entry count and total bytes."""
+    def __init__(self, max_entries: int = 256, max_bytes: int = 256 << 20, ttl_s: float = 300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._d: "OrderedDict[str, Tuple[float, int, pd.DataFrame, Dict[str, Any]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        return cls(max_entries=int(os.getenv("ATLAS_RESULT_CACHE_SIZE", "256")),
+                   max_bytes=int(float(os.getenv("ATLAS_RESULT_CACHE_MB", "256")) * (1 << 20)),
+                   ttl_s=float(os.getenv("ATLAS_RESULT_CACHE_TTL", "300")))
+
+    def _drop(self, key: str) -> None:
+        _, nb, _, _ = self._d.pop(key)
+        self._bytes -= nb
+
+    def get(self, key: str) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        with self._lock:
+            ent = self._d.get(key)
+            if ent is not None and time.time() - ent[0] > self.ttl_s:
+                self._drop(key); self.evictions += 1
+                ent = None
+            if ent is None:
+                self.misses += 1
+                return None
+            self._d.move_to_end(key)
+            self.hits += 1
+            return ent[2], ent[3]
+
+    def put(self, key: str, df: pd.DataFrame, meta: Dict[str, Any]) -> bool:
+        nb = frame_nbytes(df)
+        if nb > self.max_bytes:
+            return False            # never let one result flush the whole cache
+        with self._lock:
+            if key in self._d:
+                self._drop(key)
+            self._d[key] = (time.time(), nb, df, meta)
+            self._bytes += nb
+            while self._d and (len(self._d) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._d))); self.evictions += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._d.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self._d), "bytes": self._bytes, "max_bytes": self.max_bytes}
@@ -0,0 +1,104 @@
+# atlas_result_sets.py
+# Server-side result sets for cursor pagination / streaming
+# - A finished plan's DataFrame is parked under a cursor id; pages are sliced from it on demand
+# - Records are produced lazily, one page/chunk at a time (never the whole result up front)
+# - LRU + idle TTL bound how many result sets stay alive
+# - Env: ATLAS_CURSOR_TTL (s, default 600), ATLAS_CURSOR_MAX (default 64), ATLAS_PAGE_SIZE (default page size)
+
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+import os, time, uuid, threading
+
+import pandas as pd
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 5000
+STREAM_CHUNK = 1000
+
+
+def default_page_size() -> Optional[int]:
+    """Page size applied when a request doesn't ask for one (unset/0 = return every row, as before)."""
+    v = int(os.getenv("ATLAS_PAGE_SIZE", "0") or 0)
+    return v or None
+
+def clamp_page_size(size: Optional[int]) -> int:
+    return max(1, min(int(size or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+
+
+def iter_records(df: Optional[pd.DataFrame], start: int = 0, stop: Optional[int] = None,
+                 chunk: int = STREAM_CHUNK) -> Iterator[Dict[str, Any]]:
+    """Yield row dicts from df[start:stop], converting one chunk at a time."""
+    if df is None:
+        return
+    stop = len(df) if stop is None else min(stop, len(df))
+    for lo in range(max(start, 0), stop, chunk):
+        yield from df.iloc[lo:min(lo + chunk, stop)].to_dict("records")
+
+
+@dataclass
+class ResultSet:
+    cursor: str
+    frame: pd.DataFrame
+    meta: Dict[str, Any] = field(default_factory=dict)
+    created: float = field(default_factory=time.time)
+    touched: float = field(default_factory=time.time)
+
+    @property
+    def total(self) -> int:
+        return len(self.frame)
+
+    def page(self, offset: int = 0, size: Optional[int] = None) -> Dict[str, Any]:
+        size = clamp_page_size(size)
+        offset = max(0, int(offset or 0))
+        rows = list(iter_records(self.frame, offset, offset + size))
+        nxt = offset + len(rows)
+        return {"rows": rows,
+                "page": {"cursor": self.cursor, "offset": offset, "page_size": size,
+                         "returned": len(rows), "total": self.total,
+                         "has_more": nxt < self.total, "next_offset": nxt if nxt < self.total else None}}
+
+
+class ResultSetStore:
+    """Thread-safe cursor -> ResultSet map with LRU + idle-TTL eviction."""
+    def __init__(self, max_sets: Optional[int] = None, ttl_s: Optional[float] = None):
+        self.max_sets = max_sets or int(os.getenv("ATLAS_CURSOR_MAX", "64"))
+        self.ttl_s = ttl_s if ttl_s is not None else float(os.getenv("ATLAS_CURSOR_TTL", "600"))
+        self._d: "OrderedDict[str, ResultSet]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        for cur in [c for c, rs in self._d.items() if now - rs.touched > self.ttl_s]:
+            del self._d[cur]
+
+    def open(self, frame: Optional[pd.DataFrame], meta: Optional[Dict[str, Any]] = None) -> ResultSet:
+        rs = ResultSet(uuid.uuid4().hex, frame if frame is not None else pd.DataFrame(), dict(meta or {}))
+        with self._lock:
+            self._expire(rs.created)
+            self._d[rs.cursor] = rs
+            while len(self._d) > self.max_sets:
+                self._d.popitem(last=False)
+        return rs
+
+    def get(self, cursor: str) -> Optional[ResultSet]:
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            rs = self._d.get(cursor)
+            if rs is not None:
+                rs.touched = now
+                self._d.move_to_end(cursor)
+            return rs
+
+    def close(self, cursor: str) -> bool:
+        with self._lock:
+            return self._d.pop(cursor, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._d.clear()
+
+    def cursors(self) -> List[str]:
+        with self._lock:
+            return list(self._d)
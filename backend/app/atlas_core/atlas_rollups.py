@@ -0,0 +1,179 @@
+# atlas_rollups.py
+# Materialized rollups for the stock aggregates (onhand by org/item, PO/SO counts by status/vendor/carrier)
+# - A rollup = one row of mergeable partials per group: row count, non-null count, sum/min/max (numeric)
+# - Declared per source (ROLLUP_DEFS or RollupStore.declare); built on first use from the typed table
+# - Incremental: when a source reloads with rows appended, only the new rows are grouped and folded in;
+#   any other change (edits, deletes, dtype shifts) rebuilds
+# - Answers aggregate(by, metrics) when by ⊆ rollup.by and metrics are sum/count/size/min/max/mean
+#   over measured columns, by regrouping the partials (the rollup itself or a coarser roll-up of it)
+# - ATLAS_ROLLUPS=0 disables
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os, threading
+
+import pandas as pd
+
+SIZE_COL = "__n"
+SERVABLE_AGGS = {"sum", "count", "size", "min", "max", "mean"}
+
+
+def rollups_enabled() -> bool:
+    return os.getenv("ATLAS_ROLLUPS", "1") != "0"
+
+
+@dataclass(frozen=True)
+class RollupDef:
+    source: str
+    by: Tuple[str, ...]
+    measures: Tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        return f"{self.source}[{','.join(self.by)}]"
+
+ROLLUP_DEFS: Tuple[RollupDef, ...] = (
+    RollupDef("ONHAND", ("organization_id", "item"), ("onhand_qty", "available_qty", "reserved_qty")),
+    RollupDef("PO", ("po_status", "vendor_name", "buyer_user_id"), ("po_number", "ordered_qty", "received_qty")),
+    RollupDef("SO", ("delivery_status", "carrier_name"), ("so_number", "shipped_quantity", "requested_quantity")),
+)
+
+
+def _pcol(col: str, part: str) -> str:
+    return f"{col}|{part}"
+
+# how each partial merges when groups are combined
+_MERGE = {"count": "sum", "sum": "sum", "min": "min", "max": "max"}
+
+
+class Rollup:
+    """Partials for one RollupDef over one table; `parts` has the by columns + `col|part` columns + __n."""
+    def __init__(self, d: RollupDef, df: pd.DataFrame):
+        self.d = d
+        self.numeric = tuple(c for c in d.measures if pd.api.types.is_numeric_dtype(df[c].dtype)
+                             and not pd.api.types.is_bool_dtype(df[c].dtype))
+        self.dtypes = {c: df[c].dtype for c in (*d.by, *d.measures)}
+        self.parts = self._partials(df)
+        self.rows = len(df)
+
+    def _partials(self, df: pd.DataFrame) -> pd.DataFrame:
+        g = df.groupby(list(self.d.by), dropna=False, observed=True, sort=True)
+        spec = {_pcol(c, "count"): (c, "count") for c in self.d.measures}
+        for c in self.numeric:
+            spec.update({_pcol(c, p): (c, p) for p in ("sum", "min", "max")})
+        parts = g.agg(**spec)
+        parts[SIZE_COL] = g.size()
+        return parts.reset_index()
+
+    @staticmethod
+    def _merge_fns(cols: Sequence[str]) -> Dict[str, str]:
+        return {c: ("sum" if c == SIZE_COL else _MERGE[c.rsplit("|", 1)[1]]) for c in cols}
+
+    def fold(self, new_rows: pd.DataFrame) -> None:
+        """Fold appended rows into the partials."""
+        if new_rows.empty:
+            return
+        both = pd.concat([self.parts, self._partials(new_rows)], ignore_index=True)
+        value_cols = [c for c in both.columns if c not in self.d.by]
+        self.parts = (both.groupby(list(self.d.by), dropna=False, observed=True, sort=True)
+                      .agg(self._merge_fns(value_cols)).reset_index())
+        self.rows += len(new_rows)
+
+    def serves(self, by: Sequence[str], aggs: Dict[str, str]) -> bool:
+        if not by or not set(by) <= set(self.d.by) or set(by) & set(aggs):
+            return False
+        for col, agg in aggs.items():
+            if agg not in SERVABLE_AGGS:
+                return False
+            if agg == "size":
+                continue
+            if col not in self.d.measures or (agg != "count" and col not in self.numeric):
+                return False
+        return True
+
+    def answer(self, parts: pd.DataFrame, by: Sequence[str], aggs: Dict[str, str]) -> pd.DataFrame:
+        """aggregate(by, aggs) over the rows behind `parts` (a row subset of self.parts)."""
+        need: List[str] = []
+        for col, agg in aggs.items():
+            if agg == "size":
+                need.append(SIZE_COL)
+            elif agg == "mean":
+                need += [_pcol(col, "sum"), _pcol(col, "count")]
+            else:
+                need.append(_pcol(col, agg))
+        need = list(dict.fromkeys(need))
+        g = parts.groupby(list(by), dropna=False, observed=True, sort=True).agg(self._merge_fns(need))
+        out = pd.DataFrame(index=g.index)
+        for col, agg in aggs.items():
+            if agg == "size":
+                out[col] = g[SIZE_COL]
+            elif agg == "mean":
+                out[col] = g[_pcol(col, "sum")] / g[_pcol(col, "count")].where(g[_pcol(col, "count")] > 0)
+            else:
+                out[col] = g[_pcol(col, agg)]
+        return out.reset_index()
+
+
+class RollupStore:
+    """Rollups per source, tied to the TypedTable they were built from."""
+    def __init__(self, defs: Sequence[RollupDef] = ROLLUP_DEFS):
+        self.defs: List[RollupDef] = list(defs)
+        self._built: Dict[str, Tuple[Any, List[Rollup]]] = {}   # source -> (table, rollups)
+        self._lock = threading.Lock()
+
+    def declare(self, source: str, by: Sequence[str], measures: Sequence[str]) -> RollupDef:
+        d = RollupDef(source, tuple(by), tuple(measures))
+        with self._lock:
+            if d not in self.defs:
+                self.defs.append(d)
+            self._built.pop(source, None)
+        return d
+
+    def _build(self, table: Any) -> List[Rollup]:
+        cols = set(table.df.columns)
+        return [Rollup(d, table.df) for d in self.defs
+                if d.source == table.source and set(d.by) <= cols and set(d.measures) <= cols]
+
+    def for_table(self, table: Any) -> List[Rollup]:
+        with self._lock:
+            ent = self._built.get(table.source)
+            if ent is None or ent[0] is not table:
+                ent = (table, self._build(table))
+                self._built[table.source] = ent
+            return ent[1]
+
+    def match(self, table: Any, by: Sequence[str], aggs: Dict[str, str],
+              filter_cols: Sequence[str] = ()) -> Optional[Rollup]:
+        """Smallest rollup that can answer the aggregate (and evaluate the filter columns on its keys)."""
+        ok = [r for r in self.for_table(table) if r.serves(by, aggs) and set(filter_cols) <= set(r.d.by)]
+        return min(ok, key=lambda r: len(r.parts)) if ok else None
+
+    def on_reload(self, old: Any, new: Any) -> Dict[str, str]:
+        """Carry rollups from `old` to `new`: fold appended rows when old is a prefix of new, else rebuild."""
+        with self._lock:
+            ent = self._built.get(new.source)
+            if ent is None or ent[0] is not old:
+                return {}
+            n_old, kept, notes = len(old.df), [], {}
+            for r in ent[1]:
+                cols = list(r.dtypes)
+                appended = (len(new.df) >= n_old and all(c in new.df.columns for c in cols)
+                            and all(new.df[c].dtype == r.dtypes[c] for c in cols)
+                            and new.df[cols].iloc[:n_old].reset_index(drop=True).equals(
+                                old.df[cols].reset_index(drop=True)))
+                if appended:
+                    r.fold(new.df[cols].iloc[n_old:])
+                    kept.append(r); notes[r.d.name] = f"folded {len(new.df) - n_old} rows"
+                else:
+                    notes[r.d.name] = "rebuilt"
+            built = {r.d for r in kept}
+            kept += [Rollup(d, new.df) for d in self.defs
+                     if d.source == new.source and d not in built
+                     and set(d.by) | set(d.measures) <= set(new.df.columns)]
+            self._built[new.source] = (new, kept)
+            return notes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._built.clear()
@@ -2,7 +2,7 @@
 from __future__ import annotations
 import os
 import time, uuid  # <-- add this
-from typing import Any, Dict
+from typing import Any, Dict, Iterator
 
 try:
     from atlas_core.atlas_query_router import route_query  # required
@@ -11,6 +11,9 @@ try:
     except Exception:
         clear_router_caches = None
     from atlas_core.atlas_plan_executor import PlanExecutor
+    from atlas_core.atlas_plan_optimizer import optimize_plan, plan_to_dict
+    from atlas_core.atlas_result_sets import ResultSetStore, iter_records, default_page_size
+    from atlas_core.atlas_approx import approximate_plan
     try:
         from atlas_core.atlas_plan_executor import clear_executor_caches  # optional
     except Exception:
@@ -22,6 +25,9 @@ except ImportError:  # pragma: no cover
     except Exception:
         clear_router_caches = None
     from .atlas_plan_executor import PlanExecutor
+    from .atlas_plan_optimizer import optimize_plan, plan_to_dict
+    from .atlas_result_sets import ResultSetStore, iter_records, default_page_size
+    from .atlas_approx import approximate_plan
     try:
         from .atlas_plan_executor import clear_executor_caches  # optional
     except Exception:
@@ -29,15 +35,69 @@ except ImportError:  # pragma: no cover
 
 
 _EXECUTOR = PlanExecutor()
+_RESULT_SETS = ResultSetStore()
+if os.getenv("ATLAS_WARM_INDEXES", "0") == "1":
+    _EXECUTOR.r.warm_join_indexes()   # load tables + build join indexes now, not on the first join
 
 def _effective_mode(mode: str | None) -> str:
     return (mode or os.getenv("ATLAS_ROUTER_MODE", "OPENAI_ONLY")).upper()
 
-def run_query(q: str, k: int = 4, mode: str | None = None) -> Dict[str, Any]:
+def _execute(plan, profile: bool = False, approximate: bool = False) -> Dict[str, Any]:
+    """
+    Optimize, run, and expose both plan shapes in meta. Rows stay columnar in out["frame"].
+    approximate=True lets aggregate/distinct steps estimate (atlas_approx.py) instead of computing exactly.
+    """
+    if approximate:
+        plan = approximate_plan(plan)
+    opt_plan, opt_info = optimize_plan(plan)
+    frame, meta = _EXECUTOR.run_frame(opt_plan, profile=True if profile else None)   # None: ATLAS_PROFILE
+    meta = dict(meta)
+    meta["plan_original"] = plan_to_dict(plan)
+    meta["plan_optimized"] = plan_to_dict(opt_plan)
+    meta["optimizer"] = opt_info
+    return {"frame": frame, "meta": meta}
+
+def _n_rows(out: Dict[str, Any]) -> int:
+    frame = out.get("frame")
+    return 0 if frame is None else len(frame)
+
+def _respond(out: Dict[str, Any], page_size: int | None) -> Dict[str, Any]:
+    """
+    Materialize the response: every row (no page_size), or the first page of a
+    server-side result set whose cursor is reported in meta["page"].
+    """
+    frame, meta = out.pop("frame", None), out.get("meta", {})
+    t1 = time.perf_counter()
+    if not page_size:
+        out["rows"] = list(iter_records(frame))
+    else:
+        first = _RESULT_SETS.open(frame, meta).page(0, page_size)
+        out["rows"] = first["rows"]
+        meta["page"] = first["page"]
+    if isinstance(meta.get("profile"), dict):
+        meta["profile"]["materialize_ms"] = round((time.perf_counter() - t1) * 1000, 3)
+    return out
+
+def fetch_page(cursor: str, offset: int = 0, page_size: int | None = None) -> Dict[str, Any] | None:
+    """Next page of a result set opened by run_query(page_size=...); None once the cursor expired."""
+    rs = _RESULT_SETS.get(cursor)
+    return rs.page(offset, page_size) if rs is not None else None
+
+def stream_rows(cursor: str, offset: int = 0) -> Iterator[Dict[str, Any]] | None:
+    """Lazy row iterator over a result set (chunked records conversion)."""
+    rs = _RESULT_SETS.get(cursor)
+    return iter_records(rs.frame, offset) if rs is not None else None
+
+def close_cursor(cursor: str) -> bool:
+    return _RESULT_SETS.close(cursor)
+
+def run_query(q: str, k: int = 4, mode: str | None = None, page_size: int | None = None,
+              profile: bool = False, approximate: bool = False) -> Dict[str, Any]:
     import os, uuid, time
 
     req_id = f"{int(time.time()*1000)}-{uuid.uuid4().hex[:8]}"
     eff_mode = _effective_mode(mode)
+    page_size = page_size if page_size is not None else default_page_size()
 
     # Optional: clear caches in debug for deterministic repros
     cache_cleared = False
@@ -52,9 +112,9 @@ def run_query(q: str, k: int = 4, mode: str | None = None) -> Dict[str, Any]:
 
     # ---- First pass (deterministic) ----
     plan = route_query(q, k=k, mode=eff_mode)
-    out = _EXECUTOR.run(plan)
+    out = _execute(plan, profile, approximate)
 
-    meta = dict(out.get("meta", {}))
+    meta = out["meta"]
     meta.setdefault("plan_intent", getattr(plan, "intent", None))
     meta.setdefault("plan_rationale", getattr(plan, "rationale", None))
     meta.setdefault("mode", eff_mode)
@@ -72,21 +132,16 @@ def run_query(q: str, k: int = 4, mode: str | None = None) -> Dict[str, Any]:
         "atlas_debug": os.getenv("ATLAS_DEBUG", "0"),
     }
 
-    rows = out.get("rows") or []
-    out["rows"] = rows
-    out["meta"] = meta
-
     # ---- Executor-level fallback on zero rows (guard with env) ----
     # Enable with: ATLAS_EXECUTOR_FALLBACK=1
-    if (os.getenv("ATLAS_EXECUTOR_FALLBACK", "0") == "1") and (len(rows) == 0):
+    if (os.getenv("ATLAS_EXECUTOR_FALLBACK", "0") == "1") and (_n_rows(out) == 0):
         try:
             fb_mode = "LOCAL_ONLY"
             fb_plan = route_query(q, k=k, mode=fb_mode)
-            fb_out = _EXECUTOR.run(fb_plan)
-            fb_rows = fb_out.get("rows") or []
+            fb_out = _execute(fb_plan, profile, approximate)
 
-            if fb_rows:
-                fb_meta = dict(fb_out.get("meta", {}))
+            if _n_rows(fb_out):
+                fb_meta = fb_out["meta"]
                 fb_meta.setdefault("plan_intent", getattr(fb_plan, "intent", None))
                 fb_meta.setdefault("plan_rationale", getattr(fb_plan, "rationale", None))
                 fb_meta["mode"] = f"{eff_mode}+FALLBACK_LOCAL"
@@ -104,16 +159,12 @@ def run_query(q: str, k: int = 4, mode: str | None = None) -> Dict[str, Any]:
                     "first_plan_intent": meta.get("plan_intent"),
                     "first_plan_rationale": meta.get("plan_rationale"),
                 }
-                fb_out["meta"] = fb_meta
-                return fb_out
+                return _respond(fb_out, page_size)
             else:
                 meta["warning"] = "deterministic_zero_rows (fallback produced 0 rows)"
-                out["meta"] = meta
-                return out
+                return _respond(out, page_size)
         except Exception as e:
             meta["warning"] = f"deterministic_zero_rows (fallback_error={type(e).__name__})"
-            out["meta"] = meta
-            return out
-
-    return out
+            return _respond(out, page_size)
 
+    return _respond(out, page_size)
@@ -0,0 +1,154 @@
+# atlas_snapshot.py
+# Columnar snapshot cache for the CSV sources
+# - One binary snapshot per CSV, keyed by the CSV's content hash (sha1)
+# - Arrow IPC/Feather via pyarrow (memory-mapped reads); without pyarrow the CSV is read directly
+#   (never pickle: the snapshot dir may be writable by other users, and unpickling runs code)
+# - Rebuilt only when the CSV content changes; size+mtime stamp avoids re-hashing unchanged files
+# - ATLAS_SNAPSHOTS=0 disables; ATLAS_SNAPSHOT_DIR overrides the location (default: <tmp>/atlas_snapshots)
+
+from __future__ import annotations
+from typing import Dict, Any, Optional, Tuple
+import os, json, time, hashlib, tempfile
+
+import pandas as pd
+
+try:  # Arrow IPC gives zero-copy, memory-mapped loads; no pyarrow means no snapshots
+    import pyarrow.feather as pa_feather
+except Exception:  # pragma: no cover
+    pa_feather = None
+
+SNAPSHOT_VERSION = 1
+_HASH_CHUNK = 1 << 20
+
+
+def snapshots_enabled() -> bool:
+    return os.getenv("ATLAS_SNAPSHOTS", "1") != "0"
+
+def snapshot_dir() -> str:
+    return os.getenv("ATLAS_SNAPSHOT_DIR") or os.path.join(tempfile.gettempdir(), "atlas_snapshots")
+
+def snapshot_format() -> Optional[str]:
+    return "feather" if pa_feather is not None else None
+
+
+def csv_content_hash(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _stamp(path: str) -> Dict[str, Any]:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def _manifest_path(csv_path: str, root: str) -> str:
+    key = hashlib.sha1(os.path.abspath(csv_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(root, f"{key}.manifest.json")
+
+def _snapshot_path(digest: str, root: str) -> str:
+    return os.path.join(root, f"{digest}.v{SNAPSHOT_VERSION}.feather")
+
+
+def _read_manifest(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def _content_digest(csv_path: str, manifest: Dict[str, Any]) -> str:
+    """Reuse the recorded hash while size+mtime are unchanged; hash the file otherwise."""
+    st = _stamp(csv_path)
+    if manifest.get("stamp") == st and manifest.get("sha1"):
+        return manifest["sha1"]
+    return csv_content_hash(csv_path)
+
+
+def _write_snapshot(df: pd.DataFrame, path: str) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    # Arrow needs string headers; uncompressed so reads can be memory-mapped
+    pa_feather.write_feather(df.rename(columns=str), tmp, compression="uncompressed")
+    os.replace(tmp, path)   # atomic: concurrent readers never see a partial file
+
+def _read_snapshot(path: str) -> pd.DataFrame:
+    return pa_feather.read_table(path, memory_map=True).to_pandas()
+
+
+def load_csv(csv_path: str, read_csv_kwargs: Optional[Dict[str, Any]] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Load a CSV through the snapshot cache.
+    Returns (df, info) where info records whether the snapshot was hit, rebuilt or bypassed.
+    Snapshot I/O failures never fail the load; they fall back to pd.read_csv.
+    """
+    t0 = time.time()
+    kwargs = read_csv_kwargs or {}
+    if not snapshots_enabled():
+        df = pd.read_csv(csv_path, **kwargs)
+        return df, {"snapshot": "disabled", "elapsed_ms": round((time.time()-t0)*1000, 2)}
+    if pa_feather is None:
+        df = pd.read_csv(csv_path, **kwargs)
+        return df, {"snapshot": "unavailable", "elapsed_ms": round((time.time()-t0)*1000, 2)}
+
+    root = snapshot_dir()
+    fmt  = snapshot_format()
+    man_path = _manifest_path(csv_path, root)
+    manifest = _read_manifest(man_path)
+    digest = _content_digest(csv_path, manifest)
+    snap = _snapshot_path(digest, root)
+
+    info_err: Optional[str] = None
+    if os.path.exists(snap):
+        try:
+            df = _read_snapshot(snap)
+            return df, {"snapshot": "hit", "format": fmt, "sha1": digest, "path": snap,
+                        "elapsed_ms": round((time.time()-t0)*1000, 2)}
+        except Exception as e:   # corrupt/partial snapshot: rebuild below
+            info_err = f"{type(e).__name__}: {e}"
+
+    df = pd.read_csv(csv_path, **kwargs)
+    status = "rebuilt"
+    try:
+        os.makedirs(root, exist_ok=True)
+        _write_snapshot(df, snap)
+        stale = manifest.get("snapshot")
+        with open(man_path, "w", encoding="utf-8") as f:
+            json.dump({"csv": os.path.abspath(csv_path), "stamp": _stamp(csv_path), "sha1": digest,
+                       "snapshot": snap, "format": fmt, "version": SNAPSHOT_VERSION}, f)
+        if stale and stale != snap and os.path.exists(stale):
+            os.remove(stale)
+    except Exception as e:
+        status = "write_failed"
+        info_err = info_err or f"{type(e).__name__}: {e}"
+
+    info = {"snapshot": status, "format": fmt, "sha1": digest, "path": snap,
+            "elapsed_ms": round((time.time()-t0)*1000, 2)}
+    if info_err:
+        info["error"] = info_err
+    return df, info
+
+
+def warm_snapshots(csv_map: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Build (or validate) snapshots for every mapped source, e.g. at image build time."""
+    out: Dict[str, Dict[str, Any]] = {}
+    seen: Dict[str, Dict[str, Any]] = {}
+    for src, path in csv_map.items():
+        if isinstance(path, dict):          # {"path": ..., "adapter": ...} entries
+            path = path.get("path")
+        if not path or not os.path.exists(path):
+            continue
+        if path not in seen:
+            _, seen[path] = load_csv(path)
+        out[src] = seen[path]
+    return out
+
+
+if __name__ == "__main__":
+    cfg = os.getenv("ATLAS_CSV_CFG")
+    if not cfg:
+        raise SystemExit("ATLAS_CSV_CFG env var not set; point it to csv_path.json")
+    with open(cfg, "r", encoding="utf-8") as f:
+        csv_map = json.load(f)
+    for src, info in warm_snapshots(csv_map).items():
+        print(f"{src:16s} {info['snapshot']:12s} {info.get('format')} {info['elapsed_ms']} ms")
@@ -0,0 +1,683 @@
+# atlas_sql.py
+# SQL pushdown to an embedded engine (SQLite from the stdlib; DuckDB when installed)
+# - csv_path.json picks the adapter per source: "PO": {"path": "...csv", "adapter": "sqlite"}
+#   (a plain path string stays on PandasCsvAdapter); ATLAS_SQL=0 maps every source back to pandas
+# - SqlCsvAdapter keeps the TypedTable (so every pandas step still works on it) and mirrors it into the
+#   registry's engine: one table per source keyed by row id, plus the typed views _apply_filters compares
+#   on (casefolded text, parsed numbers, parsed dates as epoch ns) as side tables built on first use
+# - The executor compiles the plan's leading filter -> join -> aggregate -> sort/topk/distinct steps into
+#   one WITH query. Rows come back as row ids and are gathered from the typed frames, so values and
+#   dtypes are the pandas path's; aggregate metrics come back as values
+# - Only what SQL reproduces exactly is compiled (filter modes decided on whole typed columns, regex-free
+#   contains, numeric sort keys, ...); the first step that isn't ends the prefix and the rest of the plan
+#   resumes in pandas on the gathered frame, as chunked runs do
+
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os, re, sqlite3, threading, time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb  # optional
+except Exception:  # pragma: no cover - optional dependency
+    duckdb = None
+
+SQL_ADAPTERS = ("sqlite", "duckdb")
+_EQ_OPS = {"eq", "==", "="}
+_NE_OPS = {"ne", "!="}
+_CMP_SQL = {"gt": ">", ">": ">", "ge": ">=", ">=": ">=", "lt": "<", "<": "<", "le": "<=", "<=": "<="}
+_AGG_SQL = {"count": "COUNT({x})", "size": "COUNT(*)", "nunique": "COUNT(DISTINCT {x})",
+            "sum": "COALESCE(SUM({x}), 0)", "mean": "AVG({x})", "min": "MIN({x})", "max": "MAX({x})"}
+_NUMERIC_AGGS = {"sum", "mean", "min", "max"}
+_REGEX_META = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+
+def sql_enabled() -> bool:
+    return os.getenv("ATLAS_SQL", "1") != "0"
+
+def csv_entry(value: Any) -> Tuple[Optional[str], str]:
+    """(path, adapter) for a csv_path.json value: "path.csv" or {"path": ..., "adapter": ...}."""
+    if isinstance(value, dict):
+        return value.get("path"), str(value.get("adapter") or "pandas").strip().lower()
+    return value, "pandas"
+
+def _ape():
+    try:
+        from atlas_core import atlas_plan_executor as ape
+    except ImportError:  # local package relative import
+        from . import atlas_plan_executor as ape
+    return ape
+
+
+# ---------- engines ----------
+def _is_num(dtype: Any) -> bool:
+    """Numeric and not bool: the dtypes sort keys and numeric aggregates are compiled for."""
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+def _sql_type(s: pd.Series) -> str:
+    if pd.api.types.is_bool_dtype(s.dtype) or pd.api.types.is_integer_dtype(s.dtype) \
+            or pd.api.types.is_datetime64_any_dtype(s.dtype):
+        return "INTEGER"
+    return "REAL" if pd.api.types.is_float_dtype(s.dtype) else "TEXT"
+
+def _sql_values(s: pd.Series) -> List[Any]:
+    """Column as Python values with None for missing (what the DB-API binds)."""
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        ns = s.to_numpy(dtype="datetime64[ns]").view(np.int64)
+        return [None if v == np.iinfo(np.int64).min else v for v in ns.tolist()]
+    if pd.api.types.is_float_dtype(s.dtype):
+        return [None if v != v else v for v in s.to_numpy(dtype=np.float64).tolist()]
+    if pd.api.types.is_integer_dtype(s.dtype) and not s.hasnans:
+        return s.to_numpy().tolist()
+    return s.astype(object).where(s.notna(), None).tolist()
+
+
+class SqliteEngine:
+    """In-memory SQLite database shared by a registry's sqlite-backed sources."""
+    name = "sqlite"
+    null_eq = "IS"          # null-safe equality that still probes an index (merge matches NaN keys)
+
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.lock = threading.RLock()
+
+    def load(self, table: str, cols: Dict[str, pd.Series], index: Sequence[str] = ()) -> None:
+        """(Re)create `table` as _rid (row position) + cols, with a secondary index per `index` column."""
+        names = list(cols)
+        n = len(next(iter(cols.values()))) if cols else 0
+        defs = ", ".join(["_rid INTEGER PRIMARY KEY"] + [f"{c} {_sql_type(cols[c])}" for c in names])
+        values = [_sql_values(cols[c]) for c in names]
+        marks = ", ".join("?" * (len(names) + 1))
+        with self.lock:
+            self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.execute(f"CREATE TABLE {table} ({defs})")
+            self.conn.executemany(f"INSERT INTO {table} VALUES ({marks})", zip(range(n), *values))
+            for c in index:
+                self.conn.execute(f"CREATE INDEX {table}_{c} ON {table}({c})")
+            self.conn.commit()
+
+    def index(self, table: str, cols: Sequence[str]) -> None:
+        with self.lock:
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_{'_'.join(cols)} ON {table}({', '.join(cols)})")
+
+    def drop(self, tables: Sequence[str]) -> None:
+        with self.lock:
+            for t in tables:
+                self.conn.execute(f"DROP TABLE IF EXISTS {t}")
+
+    def query(self, sql: str, args: Sequence[Any]) -> Tuple[List[str], List[tuple]]:
+        with self.lock:
+            cur = self.conn.execute(sql, list(args))
+            return [d[0] for d in cur.description], cur.fetchall()
+
+
+class DuckDbEngine(SqliteEngine):
+    """In-process DuckDB: tables are created straight from the typed frames (no row-by-row insert)."""
+    name = "duckdb"
+    null_eq = "IS NOT DISTINCT FROM"
+
+    def __init__(self):
+        if duckdb is None:
+            raise RuntimeError("adapter 'duckdb' needs the duckdb package (pip install duckdb)")
+        self.conn = duckdb.connect(":memory:")
+        self.lock = threading.RLock()
+
+    def load(self, table: str, cols: Dict[str, pd.Series], index: Sequence[str] = ()) -> None:
+        n = len(next(iter(cols.values()))) if cols else 0
+        frame = pd.DataFrame({"_rid": np.arange(n, dtype=np.int64)})
+        for c, s in cols.items():
+            plain = _sql_type(s) != "TEXT" and not pd.api.types.is_datetime64_any_dtype(s.dtype)
+            frame[c] = s.to_numpy() if plain else pd.Series(_sql_values(s), dtype=object)
+        with self.lock:
+            self.conn.register("_atlas_load", frame)
+            self.conn.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM _atlas_load")
+            self.conn.unregister("_atlas_load")
+
+    def index(self, table: str, cols: Sequence[str]) -> None:
+        pass                                        # columnar scans + hash joins: no secondary indexes
+
+
+def make_engine(kind: str):
+    return DuckDbEngine() if kind == "duckdb" else SqliteEngine()
+
+
+# ---------- mirrored tables ----------
+def _folded(table: Any, col: str) -> pd.Series:
+    """TypedTable.casefolded() values, without caching a folded copy of every column on the table."""
+    if col in table._folded or col in table.dicts:
+        return table.casefolded(col)
+    return table.df[col].astype(str).str.casefold()
+
+
+class SqlMirror:
+    """
+    A TypedTable loaded into an engine. Frame column i is c<i> of the base table; the typed views a
+    predicate compares on ("f" casefolded, "n" numeric, "d" datetime) are side tables <name>_<kind><i>
+    (_rid, v), built and indexed on first use.
+    """
+    def __init__(self, engine: Any, source: str, table: Any):
+        t0 = time.time()
+        self.engine, self.table = engine, table
+        self.name = f"atlas_{re.sub(r'[^A-Za-z0-9_]', '_', source).lower()}"
+        self.col = {c: f"c{i}" for i, c in enumerate(table.df.columns)}
+        self._views: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        cols = {q: (table.df[c].astype(object) if isinstance(table.df[c].dtype, pd.CategoricalDtype)
+                    else table.df[c]) for c, q in self.col.items()}
+        engine.load(self.name, cols)
+        self.load_ms = round((time.time() - t0) * 1000, 2)
+
+    def view(self, kind: str, col: str) -> str:
+        name = self._views.get((kind, col))
+        if name is None:
+            with self._lock:
+                name = self._views.get((kind, col))
+                if name is None:
+                    t = self.table
+                    values = _folded(t, col) if kind == "f" else \
+                        (t.as_numeric(col) if kind == "n" else t.as_datetime(col))
+                    name = f"{self.name}_{kind}{self.col[col][1:]}"
+                    self.engine.load(name, {"v": values}, index=["v"])
+                    self._views[(kind, col)] = name
+        return name
+
+    def index(self, cols: Sequence[str]) -> None:
+        """Composite index on raw columns (join probes), built once."""
+        key = ("idx", ",".join(cols))
+        if key not in self._views:
+            with self._lock:
+                self.engine.index(self.name, [self.col[c] for c in cols])
+                self._views[key] = ""
+
+    def drop(self) -> None:
+        self.engine.drop([self.name, *(v for v in self._views.values() if v)])
+
+
+class _Unsupported(Exception):
+    """No exact SQL form for a step or predicate: the pushed-down prefix ends before it."""
+
+
+# ---------- compiler ----------
+class _Compiler:
+    """
+    Builds the WITH query for a plan prefix. Row CTEs carry (l, r, o, ix): left/right table row ids,
+    current row order and the pandas index label. Group CTEs carry keys k<i>, metrics m<j>, o, ix and
+    rep = the o of the group's first input row (its key values are gathered from there).
+    """
+    def __init__(self, ape: Any, steps: List[Any]):
+        self.ape, self.steps = ape, steps
+        self.ctes: List[str] = []
+        self.args: List[Any] = []
+        self.counts: List[Tuple[str, str]] = []      # (label, cte) read back as row counts
+        self.entries: List[Dict[str, Any]] = []      # lineage per compiled step
+        self.left: Optional[SqlMirror] = None
+        self.right: Optional[SqlMirror] = None
+        self.left_cols: List[str] = []
+        self.scope: List[Tuple[str, str, str]] = []  # row mode: (frame column, "L"/"R", table column)
+        self.join: Optional[Dict[str, Any]] = None
+        self.groups: Optional[Dict[str, Any]] = None
+        self.source: Optional[str] = None
+
+    # -- helpers --
+    def _cte(self, body: str, count: Optional[str] = None) -> str:
+        name = f"s{len(self.ctes) + 1}"
+        self.ctes.append(f"{name} AS MATERIALIZED ({body})")
+        if count:
+            self.counts.append((count, name))
+        return name
+
+    def _last(self) -> str:
+        return f"s{len(self.ctes)}"
+
+    def names(self) -> List[str]:
+        if self.groups is not None:
+            return [n for (n, _, _) in self.groups["cols"]]
+        return [n for (n, _, _) in self.scope]
+
+    def _expr(self, name: str) -> Tuple[str, Any]:
+        """(sql expr, table dtype) of a row-mode frame column."""
+        m, c, side = self._column(name)
+        return f"{side}.{m.col[c]}", m.table.df[c].dtype
+
+    def _column(self, name: str) -> Tuple[SqlMirror, str, str]:
+        for (n, side, c) in self.scope:
+            if n == name:
+                return (self.left if side == "L" else self.right), c, side
+        raise _Unsupported(f"column {name!r} not in scope")
+
+    def _rows_from(self, p: str) -> str:
+        sql = f"{p} p JOIN {self.left.name} L ON L._rid = p.l"
+        if self.right is not None:
+            sql += f" LEFT JOIN {self.right.name} R ON R._rid = p.r"
+        return sql
+
+    def _bind(self, v: Any) -> str:
+        self.args.append(v.item() if isinstance(v, np.generic) else v)
+        return "?"
+
+    # -- predicates (mirrors PlanExecutor._apply_filters on a TypedTable) --
+    def _where(self, m: SqlMirror, alias: str, source: str, where: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """(view joins, condition) for a predicate list on one table."""
+        t = m.table
+        cr = self.ape.column_resolver(source, t.df.columns)
+        joins: Dict[str, str] = {}
+
+        def _resolve(raw):
+            col = cr.col(raw)
+            if col not in m.col:
+                raise _Unsupported(f"column {raw!r} missing")   # pandas records the KeyError
+            return col
+
+        def _view(kind, col):
+            a = f"{alias}{kind}{m.col[col][1:]}"
+            joins[a] = f" JOIN {m.view(kind, col)} {a} ON {a}._rid = {alias}._rid"
+            return f"{a}.v"
+
+        def _num(col):
+            return f"{alias}.{m.col[col]}" if pd.api.types.is_numeric_dtype(t.df[col].dtype) else _view("n", col)
+
+        def _naive(*cols):
+            if any(getattr(t.as_datetime(c).dtype, "tz", None) is not None for c in cols):
+                raise _Unsupported("tz-aware dates")
+
+        conds: List[str] = []
+        for f in where or []:
+            col = _resolve(f.get("col"))
+            op = (f.get("op") or "eq").lower()
+            val = f.get("value")
+            numeric = pd.api.types.is_numeric_dtype(t.df[col].dtype)
+            if isinstance(val, dict) and not (op in _CMP_SQL and "colref" in val):
+                raise _Unsupported("dict value")
+            if op in _EQ_OPS or op in _NE_OPS:
+                if numeric:
+                    vnum = None if isinstance(val, (list, tuple)) else pd.to_numeric(val, errors="coerce")
+                    if vnum is None or pd.isna(vnum):
+                        raise _Unsupported("non-numeric value on a numeric column")
+                    c = f"{alias}.{m.col[col]} = {self._bind(vnum)}"
+                else:
+                    c = f"{_view('f', col)} = {self._bind(str(val).casefold())}"
+                conds.append(c if op in _EQ_OPS else f"NOT COALESCE({c}, FALSE)")
+            elif op == "in":
+                vals = f.get("values") or (val if isinstance(val, list) else [val])
+                norm = sorted({str(v).casefold() for v in vals})
+                conds.append(f"{_view('f', col)} IN ({', '.join(self._bind(v) for v in norm)})" if norm else "FALSE")
+            elif op == "contains":
+                text = str(val)
+                if numeric or _REGEX_META.search(text) or not text.isascii():
+                    raise _Unsupported("contains needs a regex-free ASCII value on a text column")
+                conds.append(f"instr({_view('f', col)}, {self._bind(text.casefold())}) > 0")
+            elif op in _CMP_SQL:
+                sym = _CMP_SQL[op]
+                if isinstance(val, dict):
+                    other = _resolve(val["colref"])
+                    if t.has_datetime(col) or t.has_datetime(other):
+                        _naive(col, other)
+                        conds.append(f"{_view('d', col)} {sym} {_view('d', other)}")
+                    elif t.has_numeric(col) or t.has_numeric(other):
+                        conds.append(f"{_num(col)} {sym} {_num(other)}")
+                    else:
+                        raise _Unsupported("lexicographic compare")
+                    continue
+                b_dt = pd.to_datetime(pd.Series([val]), errors="coerce").iloc[0]
+                if t.has_datetime(col) and pd.notna(b_dt):
+                    _naive(col)
+                    if b_dt.tzinfo is not None:
+                        raise _Unsupported("tz-aware dates")
+                    conds.append(f"{_view('d', col)} {sym} {self._bind(int(pd.Timestamp(b_dt).value))}")
+                    continue
+                b_num = pd.to_numeric(pd.Series([val]), errors="coerce").iloc[0]
+                if t.has_numeric(col) and pd.notna(b_num):
+                    conds.append(f"{_num(col)} {sym} {self._bind(b_num)}")
+                    continue
+                raise _Unsupported("lexicographic compare")
+            else:
+                raise _Unsupported(f"op {op}")
+        return "".join(joins.values()), " AND ".join(f"({c})" for c in conds) or "TRUE"
+
+    # -- steps --
+    def filter(self, idx: int, s: Any, m: SqlMirror) -> None:
+        p = s.params or {}
+        cols = list(m.table.df.columns)
+        if p.get("select"):
+            cols = self.ape.column_resolver(s.source, m.table.df.columns).cols(p["select"])
+            if any(c not in m.col for c in cols):
+                raise _Unsupported("select column missing")
+        limit = p.get("limit")
+        cap = min(int(limit), self.ape.MAX_ROWS_STEP) if limit else self.ape.MAX_ROWS_STEP
+        joins, cond = self._where(m, "L", s.source, p.get("where") or [])
+        self.left, self.source, self.left_cols = m, s.source, cols
+        self.scope = [(c, "L", c) for c in cols]
+        self._cte(f"SELECT L._rid AS l, NULL AS r, L._rid AS o, L._rid AS ix FROM {m.name} L{joins} "
+                  f"WHERE {cond} ORDER BY L._rid LIMIT {cap}", count=str(idx))
+        self.entries.append({"step": idx, "op": s.op, "source": s.source, "params": s.params})
+
+    def join_step(self, idx: int, s: Any, m: SqlMirror) -> None:
+        if self.join is not None or self.groups is not None:
+            raise _Unsupported("one join per pushed-down prefix, before any aggregate")
+        p = s.params or {}
+        how = p.get("how", "left")
+        if how not in ("left", "inner"):
+            raise _Unsupported(f"how={how}")
+        right_src, rdf, names = p.get("right_source"), m.table.df, self.names()
+        lcr, rcr = self.ape.column_resolver(self.source, names), self.ape.column_resolver(right_src, rdf.columns)
+        pairs = p.get("on_pairs") or []
+        left_keys, right_keys = [lcr.col(l) for (l, _) in pairs], [rcr.col(r) for (_, r) in pairs]
+        if not left_keys or any(k not in names for k in left_keys) or any(k not in m.col for k in right_keys):
+            raise _Unsupported("join keys")
+        ldf = self.left.table.df
+        if any(pd.api.types.is_numeric_dtype(ldf[lk].dtype) != pd.api.types.is_numeric_dtype(rdf[rk].dtype)
+               for lk, rk in zip(left_keys, right_keys)):
+            raise _Unsupported("numeric vs text join keys")
+        # right side: same filters, projection and limit as the pandas fetch
+        rjoins, rcond = self._where(m, "R", right_src, p.get("right_filters") or [])
+        right_lim = p.get("right_limit", self.ape.MAX_ROWS_STEP)
+        lim = f" LIMIT {int(right_lim)}" if right_lim else ""
+        wanted = p.get("right_select") or self.ape._columns_used_after(self.steps, idx)
+        keep = self.ape._right_keep(list(rdf.columns), right_keys, None if wanted is None else set(rcr.cols(wanted)),
+                                    bool(p.get("right_select")), list(names))
+        prev = self._last()
+        rr = self._cte(f"SELECT R._rid AS r FROM {m.name} R{rjoins} WHERE {rcond} ORDER BY R._rid{lim}",
+                       count="right")
+        # probe the right table by its key index; rows outside the fetched set don't match
+        m.index(right_keys)
+        eq = m.engine.null_eq
+        on = " AND ".join(f"R.{m.col[rk]} {eq} L.{self.left.col[lk]}" for lk, rk in zip(left_keys, right_keys))
+        kind = "LEFT JOIN" if how == "left" else "JOIN"
+        self._cte(f"SELECT l, r, ix AS o, ix FROM (SELECT p.l AS l, R._rid AS r, "
+                  f"ROW_NUMBER() OVER (ORDER BY p.o, R._rid) - 1 AS ix FROM {prev} p JOIN {self.left.name} L "
+                  f"ON L._rid = p.l {kind} {m.name} R ON {on} AND +R._rid IN (SELECT r FROM {rr})) j "
+                  f"ORDER BY o LIMIT {self.ape.MAX_ROWS_STEP}", count=str(idx))
+        # frame layout of PandasJoiner.join_indexed / merge: same-named keys merged, overlaps _x/_y
+        same = {rk for lk, rk in zip(left_keys, right_keys) if lk == rk}
+        rcols = [c for c in keep if c not in same]
+        overlap = set(names) & set(rcols)
+        self.right = m
+        self.join = {"how": how, "left_keys": left_keys, "right_keys": right_keys, "keep": keep,
+                     "cte": self._last()}
+        self.scope = [((f"{n}_x" if n in overlap else n), side, c) for (n, side, c) in self.scope] + \
+                     [((f"{c}_y" if c in overlap else c), "R", c) for c in rcols]
+        self.source = "ALL"
+        self.entries.append({"step": idx, "op": "join", "source": getattr(s, "source", None), "params": s.params,
+                             "right": {"source": right_src, "rows": None, "cols": keep}})
+
+    def aggregate(self, idx: int, s: Any) -> None:
+        p = s.params or {}
+        if self.groups is not None or p.get("approximate"):
+            raise _Unsupported("aggregate over groups / approximate")
+        names = self.names()
+        cr = self.ape.column_resolver(self.source, names)
+        by, metrics = cr.cols(p.get("by", [])), cr.metrics(p.get("metrics", []))
+        aggs = {c: str(a).lower() for (c, a) in metrics}     # groupby().agg(dict): last agg per column wins
+        if not by or len(set(by)) != len(by) or any(c not in names for c in [*by, *aggs]) or set(aggs) & set(by):
+            raise _Unsupported("aggregate columns")
+        cols: List[Tuple[str, str, Any]] = []
+        sel: List[str] = []
+        for i, c in enumerate(by):
+            sel.append(f"{self._expr(c)[0]} AS k{i}")
+            cols.append((c, f"k{i}", None))
+        for j, (c, a) in enumerate(aggs.items()):
+            e, dtype = self._expr(c)
+            if a not in _AGG_SQL or (a in _NUMERIC_AGGS and not _is_num(dtype)):
+                raise _Unsupported(f"agg {a} on {c}")
+            sel.append(f"{_AGG_SQL[a].format(x=e)} AS m{j}")
+            cols.append((c, f"m{j}", a))
+        pre = self._last()
+        keys = ", ".join(f"k{i}" for i in range(len(by)))
+        order = ", ".join(f"k{i} ASC NULLS LAST" for i in range(len(by)))
+        self._cte(f"SELECT *, ix AS o FROM (SELECT g.*, ROW_NUMBER() OVER (ORDER BY {order}) - 1 AS ix FROM "
+                  f"(SELECT {', '.join(sel)}, MIN(p.o) AS rep FROM {self._rows_from(pre)} GROUP BY {keys}) g) a "
+                  f"ORDER BY o LIMIT {self.ape.MAX_ROWS_STEP}", count=str(idx))
+        self.groups = {"cols": cols, "pre": pre, "by": by}
+        self.entries.append({"step": idx, "op": "aggregate", "source": getattr(s, "source", None), "params": s.params})
+
+    def _sort_key(self, col: Optional[str]) -> str:
+        """
+        SQL expr of a sort/topk key. pandas sorts numerically when any row at hand parses as a number,
+        else as text; that is known up front for numeric dtypes and for text columns where no value
+        in the whole table parses (sorted as plain strings, categories only when in lexical order).
+        """
+        if col not in self.names():
+            raise _Unsupported("sort key missing")
+        expr = None
+        if self.groups is not None:
+            name, expr, agg = next(x for x in self.groups["cols"] if x[0] == col)
+            expr = f"p.{expr}"
+            if agg is not None:
+                return expr               # every compiled metric is numeric
+        m, c, side = self._column(col)
+        dtype = m.table.df[c].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            cats = [str(v) for v in dtype.categories]
+            text = not dtype.ordered and cats == sorted(cats) and pd.api.types.is_string_dtype(dtype.categories)
+        else:
+            text = pd.api.types.is_string_dtype(dtype) and not pd.api.types.is_object_dtype(dtype)
+        if not _is_num(dtype) and not (text and not m.table.has_numeric(c)):
+            raise _Unsupported("sort key decided per row (text that parses as numbers)")
+        return expr or f"{side}.{m.col[c]}"
+
+    def _ordered(self, key: Optional[str], ascending: bool, limit: Optional[int], reset: bool, idx: int) -> None:
+        prev = self._last()
+        order = f"{key} {'ASC' if ascending else 'DESC'} NULLS LAST, p.o" if key else "p.o"
+        ix = f"ROW_NUMBER() OVER (ORDER BY {order}) - 1" if reset else "p.ix"
+        lim = f" LIMIT {int(limit)}" if limit else ""
+        if self.groups is not None:
+            cols = ", ".join(f"p.{e}" for (_, e, _) in self.groups["cols"])
+            body = f"SELECT {cols}, p.rep, ROW_NUMBER() OVER (ORDER BY {order}) AS o, {ix} AS ix FROM {prev} p"
+        else:
+            body = (f"SELECT p.l, p.r, ROW_NUMBER() OVER (ORDER BY {order}) AS o, {ix} AS ix "
+                    f"FROM {self._rows_from(prev)}")
+        self._cte(f"{body} ORDER BY o{lim}", count=str(idx))
+
+    def sort(self, idx: int, s: Any) -> None:
+        """Column and direction resolved exactly like the pandas sort step (sort_by, embedded words, order)."""
+        p = s.params or {}
+        order_param = (p.get("sort_order") or p.get("order") or "").strip().lower()
+        raw = p.get("by")
+        raw = raw[0] if isinstance(raw, list) and raw else raw
+        if p.get("sort_by"):
+            base, word = str(p["sort_by"]).strip(), ""
+        elif not raw:
+            raise _Unsupported("sort without a column")    # pandas logs it as a no-op
+        else:
+            mt = re.match(r"^(.*?)(?:\s+(ascending|descending|asc|desc)(?:\s+order)?)?\s*$",
+                          str(raw).strip(), re.IGNORECASE)
+            word = (mt.group(2) or "").strip().lower()
+            base = re.sub(r"\border\b$", "", (mt.group(1) or "").strip(), flags=re.IGNORECASE).strip()
+        col = self.ape.column_resolver(self.source, self.names()).sort_col(base)
+        key = self._sort_key(col)
+        order, source = next(((o, src) for (w, src) in ((word, "embedded"), (order_param, "sort_order"))
+                               for o in ("desc", "asc") if w in (o, {"desc": "descending", "asc": "ascending"}[o])),
+                              (None, None))
+        asc = p.get("ascending", None)
+        if order is not None:
+            asc = order == "asc"
+        elif isinstance(asc, str):
+            asc = asc.strip().lower() in ("1", "true", "t", "yes", "y")
+        elif not isinstance(asc, bool):
+            asc = True
+        self._ordered(key, asc, p.get("limit"), False, idx)
+        self.entries.append({"step": idx, "op": "sort", "source": getattr(s, "source", None) or self.source,
+                             "params_in": s.params, "by_resolved": col, "order_final": "asc" if asc else "desc",
+                             "order_param_in": order_param or None, "embedded_order_in": word or None,
+                             "order_source": source, "ascending_resolved": asc})
+
+    def topk(self, idx: int, s: Any) -> None:
+        p = s.params or {}
+        k = int(p.get("k", 10))
+        by = p.get("by")
+        by = (by[0] if by else None) if isinstance(by, list) else by
+        asc = bool(p.get("ascending", False))
+        if k <= 0:
+            raise _Unsupported("k <= 0")
+        col = self.ape.column_resolver(self.source, self.names()).col(by) if by else None
+        self._ordered(self._sort_key(col) if by else None, asc, k, True, idx)
+        self.entries.append({"step": idx, "op": "topk", "source": getattr(s, "source", None) or self.source,
+                             "params_in": s.params, "by_resolved": col, "ascending_resolved": asc, "k": k})
+
+    def distinct(self, idx: int, s: Any) -> None:
+        p = s.params or {}
+        if p.get("approximate"):
+            raise _Unsupported("approximate distinct")
+        names = self.names()
+        subset = self.ape.column_resolver(self.source, names).cols(p["cols"]) if p.get("cols") else names
+        if any(c not in names for c in subset):
+            raise _Unsupported("distinct columns")
+        prev = self._last()
+        if self.groups is not None:
+            exprs = [f"p.{next(e for (n, e, _) in self.groups['cols'] if n == c)}" for c in subset]
+            first = f"SELECT MIN(p.o) FROM {prev} p GROUP BY {', '.join(exprs)}"
+        else:
+            exprs = [self._expr(c)[0] for c in subset]
+            first = f"SELECT MIN(p.o) FROM {self._rows_from(prev)} GROUP BY {', '.join(exprs)}"
+        self._cte(f"SELECT * FROM {prev} WHERE o IN ({first}) ORDER BY o LIMIT {self.ape.MAX_ROWS_STEP}",
+                  count=str(idx))
+        self.entries.append({"step": idx, "op": "distinct", "source": getattr(s, "source", None) or self.source,
+                             "params": s.params})
+
+    # -- whole prefix --
+    def compile(self, registry: Any) -> Optional[str]:
+        """Compile the longest supported prefix; returns why it stopped early (None when every step fit)."""
+        engine = None
+        for idx, s in enumerate(self.steps, start=1):
+            mark = (len(self.ctes), len(self.counts), len(self.args))
+            state = (self.scope, self.join, self.right, self.groups, self.source)
+            try:
+                if idx == 1:
+                    adapter = registry.tables.get(s.source) if s.op in ("filter", "vector") else None
+                    if getattr(adapter, "engine", None) is None:
+                        raise _Unsupported("first step is not a filter on a SQL-backed source")
+                    engine = adapter.engine
+                    self.filter(idx, s, adapter.mirror())
+                elif s.op == "join":
+                    adapter = registry.tables.get((s.params or {}).get("right_source"))
+                    if getattr(adapter, "engine", None) is not engine:
+                        raise _Unsupported("right source is not in the same engine")
+                    self.join_step(idx, s, adapter.mirror())
+                elif s.op in ("aggregate", "sort", "topk", "distinct"):
+                    getattr(self, s.op)(idx, s)
+                else:
+                    raise _Unsupported(f"{s.op} runs in pandas")
+            except _Unsupported as e:
+                del self.ctes[mark[0]:], self.counts[mark[1]:], self.args[mark[2]:]
+                self.scope, self.join, self.right, self.groups, self.source = state
+                return f"step {idx}: {e}"
+        return None
+
+    def sql(self) -> str:
+        counts = ", ".join(f"(SELECT COUNT(*) FROM {c}) AS n_{i}" for i, (_, c) in enumerate(self.counts))
+        if self.join is not None:
+            counts += f", (SELECT COUNT(*) FROM {self.join['cte']} WHERE r IS NULL) AS n_missing"
+        last = self._last()
+        if self.groups is None:
+            body = f"SELECT p.l, p.r, p.ix, {counts} FROM {last} p ORDER BY p.o"
+        else:
+            metrics = "".join(f"p.{e}, " for (_, e, agg) in self.groups["cols"] if agg is not None)
+            body = (f"SELECT {metrics}a.l, a.r, p.ix, {counts} FROM {last} p "
+                    f"JOIN {self.groups['pre']} a ON a.o = p.rep ORDER BY p.o")
+        return f"WITH {', '.join(self.ctes)} {body}"
+
+    # -- results back into frames --
+    def gather(self, l: np.ndarray, r: np.ndarray, missing: bool) -> pd.DataFrame:
+        """Frame rows for (left, right) row-id pairs, laid out like the pandas join (r = -1: no match)."""
+        left = self.left.table.df[self.left_cols]
+        if self.join is None:
+            return left.iloc[l]
+        j = self.join
+        right = self.right.table.df[j["keep"]]
+        pad = missing and not (r < 0).any()    # the join had unmatched rows: keep the dtypes NaN padding gave
+        if pad:
+            l, r = np.append(l, 0), np.append(r, -1)
+        out = self.ape.PandasJoiner.assemble(left, right, l, r, j["left_keys"], j["right_keys"])
+        return out.iloc[:-1] if pad else out
+
+
+def _steps(plan: Any) -> List[Any]:
+    return list(getattr(plan, "steps", None) or [])[:_ape().MAX_STEPS]
+
+
+def sql_spec(plan: Any, registry: Any) -> Optional[Dict[str, Any]]:
+    """{"source", "engine"} when the plan starts with a filter on a SQL-backed source, else None."""
+    steps = _steps(plan)
+    if not steps or steps[0].op not in ("filter", "vector") or not sql_enabled():
+        return None
+    engine = getattr(registry.tables.get(steps[0].source), "engine", None)
+    return {"source": steps[0].source, "engine": engine.name} if engine is not None else None
+
+
+def _pushdown(ex: Any, plan: Any) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(resume seed, sql stats) for the plan's pushed-down prefix; _Unsupported when SQL can't answer it."""
+    comp = _Compiler(_ape(), _steps(plan))
+    stopped = comp.compile(ex.r)
+    if not comp.entries:
+        raise _Unsupported(stopped)
+    engine = comp.left.engine
+    t1 = time.time()
+    cols, rows = engine.query(comp.sql(), comp.args)
+    query_ms = round((time.time() - t1) * 1000, 2)
+    if not rows:
+        raise _Unsupported("empty result")   # pandas gives empty steps their own shapes and lineage
+    first = dict(zip(cols, rows[0]))
+    counts = {label: int(first[f"n_{i}"]) for i, (label, _) in enumerate(comp.counts)}
+    if counts.get("right") == 0:
+        raise _Unsupported("empty right side")
+
+    t2 = time.time()
+    data = dict(zip(cols, zip(*rows)))
+    l = np.asarray(data["l"], dtype=np.int64)
+    r = np.asarray([-1 if v is None else v for v in data["r"]], dtype=np.int64)
+    ix = np.asarray(data["ix"], dtype=np.int64)
+    frame = comp.gather(l, r, bool(first.get("n_missing")))
+    if comp.groups is not None:
+        # keys from each group's first row (so their dtypes are the frame's), metrics from SQL
+        out = frame[comp.groups["by"]].reset_index(drop=True)
+        for (c, e, agg) in comp.groups["cols"]:
+            if agg in ("count", "size", "nunique"):
+                out[c] = np.asarray(data[e], dtype=np.int64)
+            elif agg == "mean":
+                out[c] = np.asarray(data[e], dtype=np.float64)
+            elif agg is not None:
+                out[c] = pd.Series(data[e], dtype=np.float64 if None in data[e] else None).astype(frame[c].dtype)
+        frame = out
+    frame.index = pd.RangeIndex(len(ix)) if np.array_equal(ix, np.arange(len(ix))) else pd.Index(ix)
+    gather_ms = round((time.time() - t2) * 1000, 2)
+
+    lineage = []
+    for e in comp.entries:
+        e = dict(e, rows_after_step=counts[str(e["step"])], elapsed_ms=0.0, pushdown=engine.name)
+        if e["op"] == "join":
+            e["right"] = dict(e["right"], rows=counts["right"])
+        lineage.append(e)
+    lineage[-1]["elapsed_ms"] = round(query_ms + gather_ms, 2)   # one query answers the whole prefix
+    stats = {"engine": engine.name, "steps": len(comp.entries), "query_ms": query_ms, "gather_ms": gather_ms}
+    if stopped:
+        stats["stopped"] = stopped
+    return {"frame": frame, "source": comp.source, "lineage": lineage, "start": len(comp.entries) + 1}, stats
+
+
+def run_sql(ex: Any, plan: Any, spec: Dict[str, Any], t0: float,
+            profile: Any = None) -> Tuple[Optional[pd.DataFrame], Dict[str, Any]]:
+    """Pushed-down prefix, then the remaining steps in pandas; anything SQL can't answer runs in pandas."""
+    try:
+        seed, stats = _pushdown(ex, plan)
+    except Exception as e:
+        frame, meta = ex._run_frame(plan, t0, profile=profile)
+        reason = str(e) if isinstance(e, _Unsupported) else f"{type(e).__name__}: {e}"
+        meta["sql"] = {"engine": spec["engine"], "fallback": reason}
+        return frame, meta
+    frame, meta = ex._run_frame(plan, t0, seed=seed, profile=profile)
+    meta["sql"] = stats
+    return frame, meta
+
+
+def filter_rows(adapter: Any, params: Dict[str, Any]) -> pd.DataFrame:
+    """TableAdapter.filter for a SQL-backed source: where/select/limit as one query over its mirror."""
+    step = type("Step", (), {"op": "filter", "source": adapter.source, "params": params})()
+    comp = _Compiler(_ape(), [step])
+    try:
+        comp.filter(1, step, adapter.mirror())
+    except _Unsupported as e:
+        raise ValueError(f"[{adapter.source}] filter has no SQL form: {e}") from None
+    _, rows = adapter.engine.query(comp.sql(), comp.args)
+    return comp.gather(np.asarray([row[0] for row in rows], dtype=np.int64), np.empty(0, dtype=np.int64), False)
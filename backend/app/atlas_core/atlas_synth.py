@@ -0,0 +1,359 @@
+# atlas_synth.py
+# Deterministic synthetic ERP data for benchmarks: PO / SO / ONHAND / IR / LPN / LPN_SERIALS / LPN_SERIALS_AGG
+# - Same headers (and order) as the bundled v_*_enriched.csv files, value formats included (ISO vs m/d/yyyy
+#   dates, "" delay column, enrichment columns, Context_Summary text)
+# - contract_columns=True appends the Contracts/*.json meta_map columns the bundled CSVs don't carry
+#   (e.g. PO supplier_name, quantity_ordered) as copies of their CSV counterparts
+# - Key domains are shared across sources so the standard joins match: ONHAND/PO on (organization_id, item),
+#   SO/LPN on delivery_number, LPN/LPN_SERIALS on lpn_number
+# - Rows come in fixed blocks, each from its own seeded stream: output depends only on (source, rows, seed),
+#   and files of 10M rows are written without holding them in memory
+# Usage (from backend/):  python app/atlas_core/atlas_synth.py --rows 1000000 --out /tmp/atlas_1m
+
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional, Sequence
+import argparse, json, os, zlib
+
+import numpy as np
+import pandas as pd
+
+SOURCES = ("PO", "SO", "ONHAND", "IR", "LPN", "LPN_SERIALS", "LPN_SERIALS_AGG")
+BLOCK_ROWS = 100_000
+
+HEADERS: Dict[str, List[str]] = {
+    "PO": ["po_number", "line_location_id", "line_num", "item", "uom", "organization_id", "ordered_qty",
+           "received_qty", "promised_date", "need_by_date", "last_receipt_date", "accepted_qty", "rejected_qty",
+           "buyer_user_id", "vendor_name", "po_status", "creation_date", "", "Process_Area", "Root_Cause_Tag",
+           "Context_Summary", "SLA_Flag"],
+    "SO": ["so_number", "delivery_id", "delivery_number", "item", "delivery_status", "tracking_number",
+           "carrier_name", "ship_from_location_id", "ship_to_location_id", "customer_or_site_name",
+           "requested_quantity", "shipped_quantity", "uom", "released_status", "ordered_by_user_id",
+           "priority_code", "authorization_status", "creation_date", "lpn_list", "", "Process_Area",
+           "Root_Cause_Tag", "Context_Summary", "SLA_Flag"],
+    "ONHAND": ["item", "organization_id", "onhand_qty", "reserved_qty", "available_qty", "subinventory_code",
+               "locator_code", "serial_number", "last_update_date", "", "Process_Area", "Root_Cause_Tag",
+               "Context_Summary", "SLA_Flag"],
+    "IR": ["requisition_number", "requisition_line_id", "item", "quantity", "uom", "destination_type_code",
+           "need_by_date", "organization_id", "po_number", "so_number", "requested_by_user_id", "req_status",
+           "priority_code", "creation_date", "route", "", "Process_Area", "Root_Cause_Tag", "Context_Summary",
+           "SLA_Flag"],
+    "LPN": ["lpn_number", "container_instance_id", "delivery_id", "delivery_number", "delivery_status",
+            "tracking_number", "carrier_name", "ship_from_location_id", "ship_to_location_id",
+            "customer_or_site_name", "delivery_detail_id", "item", "requested_quantity", "shipped_quantity", "uom",
+            "organization_id", "requested_by_user_id", "creation_date", "", "Process_Area", "Root_Cause_Tag",
+            "Context_Summary", "SLA_Flag"],
+    "LPN_SERIALS": ["lpn_number", "delivery_number", "delivery_detail_id", "serial_number", "asset_tag",
+                    "requested_by_user_id", "creation_date", "", "Process_Area", "Root_Cause_Tag",
+                    "Context_Summary", "SLA_Flag"],
+    "LPN_SERIALS_AGG": ["lpn_number", "delivery_number", "serials_csv", "serial_count", "asset_tags",
+                        "requested_by_user_id", "creation_date", "", "Process_Area", "Root_Cause_Tag",
+                        "Context_Summary", "SLA_Flag"],
+}
+
+# contract meta_map column -> CSV column it copies (contract_columns=True)
+CONTRACT_EXTRAS: Dict[str, Dict[str, str]] = {
+    "PO": {"supplier_name": "vendor_name", "item_number": "item", "quantity_ordered": "ordered_qty",
+           "quantity_received": "received_qty", "delivered_date": "last_receipt_date",
+           "ship_to_location": "organization_id"},
+    "SO": {"so_line_id": "delivery_id", "ship_from": "ship_from_location_id", "ship_to": "ship_to_location_id",
+           "item_number": "item", "ordered_qty": "requested_quantity", "shipped_qty": "shipped_quantity",
+           "promised_date": "creation_date", "shipped_date": "creation_date", "organization_id": "ship_from_location_id"},
+    "ONHAND": {"item_number": "item", "onhand_status": "subinventory_code"},
+}
+
+ORGS = np.array([101, 102, 103, 201, 301])
+UOMS = np.array(["CT", "BX", "PK", "EA"])
+VENDORS = np.array(["Wayne Industrial", "Globex Ltd", "Stark Logistics", "Initech", "Contoso Supply",
+                    "Acme Parts", "Umbrella"])
+PO_STATUSES = np.array(["APPROVED", "IN PROCESS", "REJECTED", "REQUIRES REAPPROVAL"])
+DELIVERY_STATUSES = np.array(["CL", "STAGED", "IN_TRANSIT", "OP", "SHIPPED"])
+STATUS_WORDS = {"CL": "CLOSED", "OP": "OPEN"}
+CARRIERS = np.array(["UPS", "USPS", "FedEx", "DHL", "XPO"])
+SITES = np.array(["KNOXVILLE_SITE", "NASHVILLE_DC", "MEMPHIS_DC", "FRANKLIN_SITE", "HENDERSONVILLE_SITE"])
+SUBINVENTORIES = np.array(["QA", "RM", "FG", "WIP", "STAGING"])
+PRIORITIES = np.array(["LOW", "STD", "URGENT"])
+DESTINATIONS = np.array(["INVENTORY", "SHOP FLOOR", "EXPENSE"])
+_ALNUM = np.frombuffer(b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ", dtype=np.uint8)
+_DAY0 = np.datetime64("2025-06-01")
+_DAYS = 150
+
+
+class Domains:
+    """Key domains sized from the row count, shared by every source of one dataset."""
+    def __init__(self, rows: int):
+        self.rows = max(1, int(rows))
+        self.items = max(300, self.rows // 20)
+        self.pos = max(240, self.rows * 10 // 23)
+        self.sos = max(150, self.rows // 3)
+        self.deliveries = max(200, self.rows * 10 // 23)
+        self.lpns = max(210, self.rows // 2)
+        self.reqs = max(530, self.rows // 2)
+        self.users = max(200, self.rows // 4)
+
+
+def _seeded(seed: int, source: str, block: int) -> np.random.Generator:
+    return np.random.default_rng([seed, zlib.crc32(source.encode()), block])
+
+def _ids(prefix: str, nums: np.ndarray, width: int) -> pd.Series:
+    return prefix + pd.Series(nums, dtype="int64").astype(str).str.zfill(width)
+
+def _code(nums: np.ndarray, width: int, salt: int) -> pd.Series:
+    """Stable pseudo-random base36 code per number (a bijection mod 36**width, so distinct in, distinct out)."""
+    x = (np.asarray(nums, dtype=np.int64) * 2_654_435_761 + salt) % (36 ** width)
+    digits = np.empty((len(x), width), dtype=np.uint8)
+    for j in range(width - 1, -1, -1):
+        digits[:, j] = _ALNUM[x % 36]
+        x //= 36
+    return pd.Series(digits.view(f"S{width}").ravel()).str.decode("ascii")
+
+def _number(nums: np.ndarray, width: int, salt: int) -> pd.Series:
+    """Stable pseudo-random zero-padded decimal per number (tracking numbers)."""
+    x = (np.asarray(nums, dtype=np.int64) * 2_654_435_761 + salt) % (10 ** width)
+    return pd.Series(x).astype(str).str.zfill(width)
+
+def _dates(rng: np.random.Generator, n: int, lo: int = 0, hi: int = _DAYS) -> np.ndarray:
+    return _DAY0 + rng.integers(lo, hi, n).astype("timedelta64[D]")
+
+def _iso(d: np.ndarray) -> pd.Series:
+    return pd.Series(np.datetime_as_string(d, unit="D"))
+
+def _mdy(d: np.ndarray) -> pd.Series:
+    ts = pd.DatetimeIndex(d)
+    return pd.Series(ts.month.astype(str) + "/" + ts.day.astype(str) + "/" + ts.year.astype(str))
+
+def _delay_text(delay: np.ndarray) -> pd.Series:
+    late = delay > 0
+    txt = pd.Series(np.where(late, "", "Delay: no delay."), dtype=object)
+    txt[late] = "Delay: " + pd.Series(delay[late]).astype(str).to_numpy() + " days. SLA: SLA_BREACH."
+    return txt
+
+
+# ---------- per-source blocks (start = global row number of the block's first row) ----------
+def _po(rng, dom: Domains, start: int, n: int) -> Dict[str, object]:
+    po = np.sort(rng.integers(1, dom.pos + 1, n))
+    item = rng.integers(1, dom.items + 1, n)
+    org = rng.choice(ORGS, n)
+    qty = rng.integers(1, 200, n)
+    rej = rng.integers(0, 5, n)
+    promised, need_by = _dates(rng, n, 30), _dates(rng, n)
+    receipt = need_by + rng.integers(-10, 40, n).astype("timedelta64[D]")
+    has_receipt = rng.random(n) < 0.8
+    delay = np.maximum(0, (receipt - need_by).astype(int)) * has_receipt
+    vendor, status = rng.choice(VENDORS, n), rng.choice(PO_STATUSES, n)
+    po_s, item_s = _ids("PO-", po, 7), _ids("ITEM-", item, 5)
+    org_s = pd.Series(org).astype(str)
+    return {
+        "po_number": po_s, "line_location_id": 600000 + start + np.arange(n), "line_num": rng.integers(1, 10, n),
+        "item": item_s, "uom": rng.choice(UOMS, n), "organization_id": org, "ordered_qty": qty,
+        "received_qty": np.maximum(0, qty + rng.integers(-5, 5, n)) * has_receipt,
+        "promised_date": _iso(promised), "need_by_date": _iso(need_by),
+        "last_receipt_date": _iso(receipt).where(has_receipt, ""),
+        "accepted_qty": np.maximum(0, qty - rej), "rejected_qty": rej,
+        "buyer_user_id": _code(rng.integers(0, dom.users, n), 6, 11), "vendor_name": vendor, "po_status": status,
+        "creation_date": _iso(_dates(rng, n)), "": delay.astype(float), "Process_Area": "Procurement",
+        "Root_Cause_Tag": "",
+        "Context_Summary": ("PO " + po_s + " for " + pd.Series(qty).astype(str) + " " + item_s + "s from "
+                            + pd.Series(vendor) + " to WH " + org_s + ". Status: " + pd.Series(status)
+                            + ". ETA: " + _iso(need_by) + ". " + _delay_text(delay)),
+        "SLA_Flag": np.where(delay > 0, "SLA_BREACH", ""),
+    }
+
+def _so(rng, dom: Domains, start: int, n: int) -> Dict[str, object]:
+    so = rng.integers(1, dom.sos + 1, n)
+    dlv = rng.integers(1, dom.deliveries + 1, n)
+    item = rng.integers(1, dom.items + 1, n)
+    req = rng.integers(1, 200, n)
+    shipped = np.maximum(0, req + rng.integers(-3, 3, n))
+    status, carrier = rng.choice(DELIVERY_STATUSES, n), rng.choice(CARRIERS, n)
+    from_org, to_idx = rng.choice(ORGS, n), rng.integers(0, len(SITES), n)
+    created = _dates(rng, n)
+    delay = np.where(np.isin(status, ["STAGED", "OP"]), rng.integers(0, 120, n), 0)
+    so_s, item_s = _ids("SO-", so, 7), _ids("ITEM-", item, 5)
+    return {
+        "so_number": so_s, "delivery_id": 12000 + dlv, "delivery_number": _ids("DEL-", dlv, 6), "item": item_s,
+        "delivery_status": status, "tracking_number": "1Z" + _number(dlv, 15, 3),
+        "carrier_name": carrier, "ship_from_location_id": from_org, "ship_to_location_id": ORGS[to_idx],
+        "customer_or_site_name": SITES[to_idx], "requested_quantity": req, "shipped_quantity": shipped,
+        "uom": rng.choice(UOMS, n), "released_status": rng.choice(np.array(["B", "R", "S"]), n),
+        "ordered_by_user_id": _code(so, 6, 17), "priority_code": rng.choice(PRIORITIES, n),
+        "authorization_status": rng.choice(PO_STATUSES[:3], n), "creation_date": _mdy(created),
+        "lpn_list": _ids("LPN-", rng.integers(1, dom.lpns + 1, n), 7), "": 0, "Process_Area": "Outbound Logistics",
+        "Root_Cause_Tag": "",
+        "Context_Summary": ("SO " + so_s + " for " + pd.Series(shipped).astype(str) + " " + item_s + "s via "
+                            + pd.Series(carrier) + " from WH " + pd.Series(from_org).astype(str) + " Status: "
+                            + pd.Series(status).replace(STATUS_WORDS) + ". Ship date: " + _iso(created) + ". "
+                            + _delay_text(delay)),
+        "SLA_Flag": np.where(delay > 0, "SLA_BREACH", ""),
+    }
+
+def _onhand(rng, dom: Domains, start: int, n: int) -> Dict[str, object]:
+    item = rng.integers(1, dom.items + 1, n)
+    onhand = rng.integers(0, 500, n)
+    reserved = np.minimum(onhand, rng.integers(0, 80, n) * (rng.random(n) < 0.4))
+    sub = rng.choice(SUBINVENTORIES, n)
+    serial = _code(start + np.arange(n), 8, 5).radd("SN").where(rng.random(n) < 0.4, "")
+    item_s = _ids("ITEM-", item, 5)
+    return {
+        "item": item_s, "organization_id": rng.choice(ORGS, n), "onhand_qty": onhand, "reserved_qty": reserved,
+        "available_qty": onhand - reserved, "subinventory_code": sub,
+        "locator_code": ("A0" + pd.Series(rng.integers(1, 6, n)).astype(str) + "-B0"
+                         + pd.Series(rng.integers(1, 5, n)).astype(str) + "-C0"
+                         + pd.Series(rng.integers(1, 3, n)).astype(str)),
+        "serial_number": serial, "last_update_date": _mdy(_dates(rng, n, 90)), "": 0, "Process_Area": "",
+        "Root_Cause_Tag": "",
+        "Context_Summary": ("ITEM " + item_s + " has " + pd.Series(onhand).astype(str) + " units in WH "
+                            + pd.Series(sub) + " . Available: " + pd.Series(onhand - reserved).astype(str)
+                            + "; Reserved: " + pd.Series(reserved).astype(str) + "."),
+        "SLA_Flag": "",
+    }
+
+def _ir(rng, dom: Domains, start: int, n: int) -> Dict[str, object]:
+    req = rng.integers(1, dom.reqs + 1, n)
+    item = rng.integers(1, dom.items + 1, n)
+    qty = rng.integers(1, 200, n)
+    org = rng.choice(ORGS, n)
+    external = rng.random(n) < 0.7
+    need_by = _dates(rng, n)
+    status, dest = rng.choice(PO_STATUSES, n), rng.choice(DESTINATIONS, n)
+    req_s, item_s = _ids("REQ-", req, 7), _ids("ITEM-", item, 5)
+    return {
+        "requisition_number": req_s, "requisition_line_id": 900000 + start + np.arange(n), "item": item_s,
+        "quantity": qty, "uom": rng.choice(UOMS, n), "destination_type_code": dest, "need_by_date": _iso(need_by),
+        "organization_id": org,
+        "po_number": _ids("PO-", rng.integers(1, dom.pos + 1, n), 7).where(external, ""),
+        "so_number": _ids("SO-", rng.integers(1, dom.sos + 1, n), 7).where(~external, ""),
+        "requested_by_user_id": _code(req, 6, 23), "req_status": status,
+        "priority_code": rng.choice(PRIORITIES, n), "creation_date": _iso(_dates(rng, n)),
+        "route": np.where(external, "EXTERNAL_PO", "INTERNAL_SO"), "": 0.0, "Process_Area": "Internal Requisition",
+        "Root_Cause_Tag": "",
+        "Context_Summary": ("REQ " + req_s + " for " + pd.Series(qty).astype(str) + " " + item_s + "s from WH "
+                            + pd.Series(org).astype(str) + " Status: " + pd.Series(status) + ". Need-by: "
+                            + _iso(need_by) + ". Delay: no delay. Destination: " + pd.Series(dest) + "."),
+        "SLA_Flag": "",
+    }
+
+def _lpn(rng, dom: Domains, start: int, n: int) -> Dict[str, object]:
+    lpn = rng.integers(1, dom.lpns + 1, n)
+    dlv = rng.integers(1, dom.deliveries + 1, n)
+    item = rng.integers(1, dom.items + 1, n)
+    req = rng.integers(1, 200, n)
+    shipped = np.maximum(0, req + rng.integers(-3, 3, n))
+    status, carrier = rng.choice(DELIVERY_STATUSES[:4], n), rng.choice(CARRIERS, n)
+    from_org, to_idx = rng.choice(ORGS, n), rng.integers(0, len(SITES), n)
+    created = _dates(rng, n)
+    delay = np.where(np.isin(status, ["STAGED", "OP"]), rng.integers(0, 120, n), 0)
+    lpn_s, item_s = _ids("LPN-", lpn, 7), _ids("ITEM-", item, 5)
+    return {
+        "lpn_number": lpn_s, "container_instance_id": 500000 + lpn, "delivery_id": 12000 + dlv,
+        "delivery_number": _ids("DEL-", dlv, 6), "delivery_status": status,
+        "tracking_number": "1Z" + _number(dlv, 15, 3), "carrier_name": carrier,
+        "ship_from_location_id": from_org, "ship_to_location_id": ORGS[to_idx],
+        "customer_or_site_name": SITES[to_idx], "delivery_detail_id": 700000 + start + np.arange(n), "item": item_s,
+        "requested_quantity": req, "shipped_quantity": shipped, "uom": rng.choice(UOMS, n),
+        "organization_id": rng.choice(ORGS, n), "requested_by_user_id": _code(lpn, 6, 29),
+        "creation_date": _iso(created), "": 0.0, "Process_Area": "Outbound Logistics", "Root_Cause_Tag": "",
+        "Context_Summary": ("LPN " + lpn_s + " for " + pd.Series(shipped).astype(str) + " " + item_s + "s via "
+                            + pd.Series(carrier) + " from WH " + pd.Series(from_org).astype(str) + " to customer "
+                            + pd.Series(SITES[to_idx]) + " (site " + pd.Series(ORGS[to_idx]).astype(str)
+                            + ") Status: " + pd.Series(status).replace(STATUS_WORDS) + ". Ship date: "
+                            + _iso(created) + ". " + _delay_text(delay)),
+        "SLA_Flag": np.where(delay > 0, "SLA_BREACH", ""),
+    }
+
+def _lpn_serials(rng, dom: Domains, start: int, n: int) -> Dict[str, object]:
+    lpn = np.sort(rng.integers(1, dom.lpns + 1, n))
+    dlv = 1 + (lpn * 7919) % dom.deliveries            # one delivery per LPN
+    rows = start + np.arange(n)
+    serial, lpn_s, dlv_s = _code(rows, 8, 5).radd("SN"), _ids("LPN-", lpn, 7), _ids("DEL-", dlv, 6)
+    created = _iso(_DAY0 + ((lpn * 31) % _DAYS).astype("timedelta64[D]"))
+    return {
+        "lpn_number": lpn_s, "delivery_number": dlv_s, "delivery_detail_id": 700000 + (rows // 3),
+        "serial_number": serial, "asset_tag": _code(rows, 6, 41).radd("AST-"),
+        "requested_by_user_id": _code(lpn, 6, 29), "creation_date": created, "": 0.0,
+        "Process_Area": "Outbound Logistics", "Root_Cause_Tag": "",
+        "Context_Summary": ("SERIAL " + serial + " in LPN " + lpn_s + " (delivery " + dlv_s + ") Created: "
+                            + created + ". Asset tag present."),
+        "SLA_Flag": "",
+    }
+
+def _lpn_serials_agg(rng, dom: Domains, start: int, n: int) -> Dict[str, object]:
+    rows = start + np.arange(n)
+    lpn = 1 + (rows * dom.lpns) // max(dom.rows, 1)   # ascending, ~rows/lpns entries per LPN
+    dlv = rng.integers(1, dom.deliveries + 1, n)
+    count = rng.integers(1, 6, n)
+    serials, tags = [], []
+    for j in range(5):                                  # up to 5 serials per row, joined with ","
+        has = count > j
+        serials.append(_code(rows * 5 + j, 8, 7).radd("SN").where(has, ""))
+        tags.append(_code(rows * 5 + j, 6, 43).radd("AST-").where(has, ""))
+    join = lambda parts: parts[0].str.cat(parts[1:], sep=",").str.rstrip(",")
+    lpn_s = _ids("LPN-", lpn, 7)
+    created = _iso(_dates(rng, n))
+    return {
+        "lpn_number": lpn_s, "delivery_number": _ids("DEL-", dlv, 6), "serials_csv": join(serials),
+        "serial_count": count, "asset_tags": join(tags), "requested_by_user_id": _code(lpn, 6, 29),
+        "creation_date": created, "": 0.0, "Process_Area": "Outbound Logistics", "Root_Cause_Tag": "",
+        "Context_Summary": ("LPN " + lpn_s + " contains " + pd.Series(count).astype(str)
+                            + " serialized items . Created: " + created + ". Asset tags present."),
+        "SLA_Flag": "",
+    }
+
+_BUILDERS = {"PO": _po, "SO": _so, "ONHAND": _onhand, "IR": _ir, "LPN": _lpn,
+             "LPN_SERIALS": _lpn_serials, "LPN_SERIALS_AGG": _lpn_serials_agg}
+
+
+# ---------- public API ----------
+def iter_blocks(source: str, rows: int, seed: int = 7, contract_columns: bool = True,
+                domain_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Blocks of up to BLOCK_ROWS rows; domain_rows sizes the shared key domains (default: rows)."""
+    if source not in _BUILDERS:
+        raise KeyError(f"unknown source {source!r}; expected one of {SOURCES}")
+    dom = Domains(domain_rows or rows)
+    extras = CONTRACT_EXTRAS.get(source, {}) if contract_columns else {}
+    for block, start in enumerate(range(0, rows, BLOCK_ROWS)):
+        n = min(BLOCK_ROWS, rows - start)
+        cols = _BUILDERS[source](_seeded(seed, source, block), dom, start, n)
+        df = pd.DataFrame({c: (v.to_numpy() if isinstance(v, pd.Series) else v)
+                           for c, v in cols.items()}, index=pd.RangeIndex(start, start + n))
+        df = df[HEADERS[source]]
+        for extra, base in extras.items():
+            df[extra] = df[base]
+        yield df
+
+def generate_frame(source: str, rows: int, seed: int = 7, contract_columns: bool = True,
+                   domain_rows: Optional[int] = None) -> pd.DataFrame:
+    return pd.concat(list(iter_blocks(source, rows, seed, contract_columns, domain_rows)))
+
+def generate(out_dir: str, rows: int, sources: Sequence[str] = SOURCES, seed: int = 7,
+             contract_columns: bool = True) -> Dict[str, str]:
+    """Write one CSV per source plus a csv_path.json (ATLAS_CSV_CFG) next to them; returns that map."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths: Dict[str, str] = {}
+    for src in sources:
+        path = os.path.join(out_dir, f"{src.lower()}.csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for i, block in enumerate(iter_blocks(src, rows, seed, contract_columns)):
+                block.to_csv(f, index=False, header=(i == 0))
+        paths[src] = path
+    if "LPN_SERIALS" in paths:
+        paths["LPN_SERIAL"] = paths["LPN_SERIALS"]
+    with open(os.path.join(out_dir, "csv_path.json"), "w", encoding="utf-8") as f:
+        json.dump(paths, f, indent=2)
+    return paths
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Write deterministic synthetic ERP CSVs")
+    ap.add_argument("--rows", type=int, default=10_000)
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--sources", default=",".join(SOURCES))
+    ap.add_argument("--no-contract-columns", action="store_true")
+    args = ap.parse_args()
+    paths = generate(args.out, args.rows, [s.strip() for s in args.sources.split(",") if s.strip()],
+                     args.seed, not args.no_contract_columns)
+    print(json.dumps(paths, indent=2))
+
+
+if __name__ == "__main__":
+    main()
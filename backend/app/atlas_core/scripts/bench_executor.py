@@ -0,0 +1,133 @@
+# scripts/bench_executor.py
+# PlanExecutor latency/throughput on synthetic data (atlas_synth.py) at several sizes.
+# Plan shapes are the ones the router emits: transactional lookup, grouped count, sort+topk, join+derive,
+# plus a free-text contains filter. The result cache is off so every repeat executes.
+# Usage (from backend/):
+#   python app/atlas_core/scripts/bench_executor.py --sizes 10000,100000,1000000 --json bench.json
+#   python app/atlas_core/scripts/bench_executor.py --sizes 10000 --compare bench.json   # flags regressions
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+HERE = Path(__file__).resolve()
+APP_DIR = HERE.parents[2]                 # .../app
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+os.environ.setdefault("ATLAS_RESULT_CACHE", "0")
+
+from atlas_core import atlas_synth                                   # noqa: E402
+from atlas_core.atlas_plan_executor import AdapterRegistry, PlanExecutor  # noqa: E402
+from atlas_core.atlas_query_router import Plan, Step                   # noqa: E402
+
+
+def plan_shapes():
+    """name -> plan; every synthetic source has `size` rows, so rows/s is size / p50."""
+    return {
+        "lookup": Plan("TRANSACTIONAL", "po lookup", [
+            Step("filter", "PO", {"where": [{"col": "po_number", "op": "eq", "value": "PO-0000042"}], "limit": 2000}),
+        ]),
+        "grouped_count": Plan("OPERATIONAL", "po by status", [
+            Step("filter", "PO", {"where": [], "limit": 50000}),
+            Step("aggregate", "PO", {"by": ["po_status"], "metrics": [["po_number", "count"]]}),
+            Step("sort", None, {"by": ["po_number"], "ascending": False}),
+        ]),
+        "sort_topk": Plan("OPERATIONAL", "top available", [
+            Step("filter", "ONHAND", {"where": [{"col": "organization_id", "op": "eq", "value": "101"}], "limit": 50000}),
+            Step("sort", None, {"by": ["available_qty"], "ascending": False}),
+            Step("topk", None, {"k": 10, "by": "available_qty"}),
+        ]),
+        "join_derive": Plan("MULTI", "stock vs open po", [
+            Step("filter", "ONHAND", {"where": [{"col": "subinventory_code", "op": "eq", "value": "FG"}], "limit": 50000}),
+            Step("join", None, {"how": "left", "right_source": "PO", "right_filters": [], "right_select": None,
+                                "right_limit": 50000, "on_pairs": [("organization_id", "organization_id"), ("item", "item")]}),
+            Step("derive", None, {"expressions": [{"as": "open_qty", "expr": "ordered_qty - received_qty"}]}),
+            Step("topk", None, {"k": 20, "by": "open_qty"}),
+        ]),
+        "contains": Plan("OPERATIONAL", "vendor search", [
+            Step("filter", "PO", {"where": [{"col": "Context_Summary", "op": "contains", "value": "SLA_BREACH"}], "limit": 50000}),
+        ]),
+    }
+
+
+def _pct(sorted_ms, q):
+    return sorted_ms[min(len(sorted_ms) - 1, int(round(q * (len(sorted_ms) - 1))))]
+
+
+def run_suite(size: int, data_dir: str, repeat: int, seed: int = 7):
+    """One record per plan shape: load_ms (first run), p50/p95 latency, scan rows/s."""
+    atlas_synth.generate(data_dir, size, seed=seed)
+    registry = AdapterRegistry(os.path.join(data_dir, "csv_path.json"))
+    ex = PlanExecutor(registry)
+    out = []
+    for name, plan in plan_shapes().items():
+        t0 = time.perf_counter()
+        first = ex.run(plan)
+        load_ms = (time.perf_counter() - t0) * 1000
+        errors = [l["error"] for l in first["meta"]["lineage"] if l.get("error")]
+        lat = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            res = ex.run(plan)
+            lat.append((time.perf_counter() - t0) * 1000)
+        lat.sort()
+        p50 = _pct(lat, 0.5)
+        out.append({"size": size, "shape": name, "rows_out": len(res["rows"]), "first_ms": round(load_ms, 2),
+                    "p50_ms": round(p50, 3), "p95_ms": round(_pct(lat, 0.95), 3),
+                    "rows_per_s": int(size / (p50 / 1000)) if p50 else None, "errors": errors})
+    return out
+
+
+def _regressions(records, baseline, tolerance):
+    base = {(r["size"], r["shape"]): r for r in baseline}
+    flagged = []
+    for r in records:
+        b = base.get((r["size"], r["shape"]))
+        if b and b.get("p50_ms") and r["p50_ms"] > b["p50_ms"] * (1 + tolerance):
+            flagged.append((r["size"], r["shape"], b["p50_ms"], r["p50_ms"]))
+    return flagged
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,100000")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--data-dir", default=None, help="keep generated CSVs here (one subdir per size)")
+    ap.add_argument("--json", default=None, help="write the records to this file")
+    ap.add_argument("--compare", default=None, help="baseline records (--json output) to check against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown vs baseline")
+    args = ap.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    records = []
+    print(f"{'size':>9s} {'shape':14s} {'rows_out':>8s} {'first_ms':>9s} {'p50_ms':>9s} {'p95_ms':>9s} {'rows/s':>12s}")
+    with tempfile.TemporaryDirectory() as work:
+        for size in sizes:
+            data_dir = os.path.join(args.data_dir or work, f"synth_{size}")
+            os.environ["ATLAS_SNAPSHOT_DIR"] = os.path.join(data_dir, "snapshots")
+            for r in run_suite(size, data_dir, args.repeat, args.seed):
+                records.append(r)
+                err = f"  ERROR {r['errors']}" if r["errors"] else ""
+                print(f"{r['size']:>9d} {r['shape']:14s} {r['rows_out']:>8d} {r['first_ms']:>9.1f} "
+                      f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['rows_per_s'] or 0:>12,d}{err}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            flagged = _regressions(records, json.load(f), args.tolerance)
+        for size, shape, was, now in flagged:
+            print(f"[REGRESSION] {shape} @ {size}: p50 {was:.2f} -> {now:.2f} ms")
+        if flagged:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# scripts/bench_snapshot.py
+# CSV vs columnar snapshot load times for every source in csv_path.json, at 1x/10x/100x row counts.
+# Usage (from backend/):  ATLAS_CSV_CFG=app/csv_path.json python app/atlas_core/scripts/bench_snapshot.py [--scales 1,10,100]
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+HERE = Path(__file__).resolve()
+APP_DIR = HERE.parents[2]                 # .../app
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from atlas_core import atlas_snapshot  # noqa: E402
+
+SOURCES = ["PO", "SO", "ONHAND", "IR", "LPN", "LPN_SERIAL", "LPN_SERIALS_AGG"]
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return round(best * 1000, 2)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scales", default="1,10,100")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    cfg = os.getenv("ATLAS_CSV_CFG")
+    if not cfg:
+        raise SystemExit("ATLAS_CSV_CFG env var not set; point it to csv_path.json")
+    with open(cfg, "r", encoding="utf-8") as f:
+        csv_map = json.load(f)
+
+    scales = [int(x) for x in args.scales.split(",") if x.strip()]
+    print(f"[BENCH] snapshot format: {atlas_snapshot.snapshot_format() or 'none (pyarrow missing)'}")
+    print(f"{'source':16s} {'scale':>5s} {'rows':>9s} {'csv_ms':>9s} {'snap_ms':>9s} {'speedup':>8s}")
+
+    with tempfile.TemporaryDirectory() as work:
+        os.environ["ATLAS_SNAPSHOT_DIR"] = os.path.join(work, "snapshots")
+        for src in SOURCES:
+            path = csv_map.get(src)
+            if isinstance(path, dict):      # {"path": ..., "adapter": ...} entries
+                path = path.get("path")
+            if not path or not os.path.exists(path):
+                print(f"{src:16s} (missing)")
+                continue
+            base = pd.read_csv(path)
+            for scale in scales:
+                scaled = os.path.join(work, f"{src}_x{scale}.csv")
+                pd.concat([base] * scale, ignore_index=True).to_csv(scaled, index=False)
+                atlas_snapshot.load_csv(scaled)      # build the snapshot once
+
+                csv_ms  = _best_of(lambda: pd.read_csv(scaled), args.repeat)
+                snap_ms = _best_of(lambda: atlas_snapshot.load_csv(scaled), args.repeat)
+                speedup = f"{csv_ms / snap_ms:.1f}x" if snap_ms else "-"
+                print(f"{src:16s} {scale:>5d} {len(base) * scale:>9d} {csv_ms:>9.2f} {snap_ms:>9.2f} {speedup:>8s}")
+
+
+if __name__ == "__main__":
+    main()
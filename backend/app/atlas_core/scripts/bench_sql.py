@@ -0,0 +1,125 @@
+# scripts/bench_sql.py
+# SQL pushdown (atlas_sql.py) vs the pandas path on synthetic data (atlas_synth.py).
+# The same CSVs are registered twice: plain paths (PandasCsvAdapter) and {"path", "adapter"} entries
+# (SqlCsvAdapter). first_ms includes loading, and for SQL the engine mirror; p50 is warm. Results are
+# checked equal, and "pushed" is how many leading steps ran in the engine.
+# Usage (from backend/):
+#   python app/atlas_core/scripts/bench_sql.py --sizes 10000,100000 [--engine duckdb]
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+HERE = Path(__file__).resolve()
+APP_DIR = HERE.parents[2]                 # .../app
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+os.environ.setdefault("ATLAS_RESULT_CACHE", "0")
+
+import pandas as pd                                                      # noqa: E402
+
+from atlas_core import atlas_synth                                       # noqa: E402
+from atlas_core.atlas_plan_executor import AdapterRegistry, PlanExecutor  # noqa: E402
+from atlas_core.atlas_query_router import Plan, Step                     # noqa: E402
+from atlas_core.scripts.bench_executor import plan_shapes, _pct           # noqa: E402
+
+
+def sql_shapes():
+    """bench_executor's shapes plus ones the engine answers end to end."""
+    shapes = plan_shapes()
+    shapes["join_aggregate"] = Plan("MULTI", "open po qty per org", [
+        Step("filter", "ONHAND", {"where": [{"col": "onhand_qty", "op": ">", "value": 0}], "limit": 50000}),
+        Step("join", None, {"how": "inner", "right_source": "PO", "right_filters": [{"col": "po_status", "op": "ne", "value": "CLOSED"}],
+                            "right_select": None, "right_limit": 50000, "on_pairs": [("organization_id", "organization_id"), ("item", "item")]}),
+        Step("aggregate", None, {"by": ["organization_id"], "metrics": [["ordered_qty", "sum"], ["po_number", "nunique"]]}),
+        Step("sort", None, {"by": ["ordered_qty"], "order": "desc"}),
+    ])
+    shapes["distinct_vendors"] = Plan("OPERATIONAL", "vendors with late po", [
+        Step("filter", "PO", {"where": [{"col": "promised_date", "op": "<", "value": "2025-08-01"}], "limit": 50000}),
+        Step("distinct", None, {"cols": ["vendor_name"]}),
+    ])
+    return shapes
+
+
+def _time(ex, plan, repeat):
+    t0 = time.perf_counter()
+    frame, meta = ex.run_frame(plan)
+    first = (time.perf_counter() - t0) * 1000
+    lat = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        frame, meta = ex.run_frame(plan)
+        lat.append((time.perf_counter() - t0) * 1000)
+    lat.sort()
+    return frame, meta, first, _pct(lat, 0.5)
+
+
+def _same(a, b) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    try:
+        pd.testing.assert_frame_equal(a, b, check_index_type="equiv")
+        return True
+    except AssertionError:
+        return False
+
+
+def run_suite(size: int, data_dir: str, repeat: int, engine: str, seed: int = 7):
+    paths = atlas_synth.generate(data_dir, size, seed=seed)
+    sql_cfg = os.path.join(data_dir, f"csv_{engine}.json")
+    with open(sql_cfg, "w", encoding="utf-8") as f:
+        json.dump({src: {"path": p, "adapter": engine} for src, p in paths.items()}, f, indent=2)
+    pandas_ex = PlanExecutor(AdapterRegistry(os.path.join(data_dir, "csv_path.json")))
+    sql_ex = PlanExecutor(AdapterRegistry(sql_cfg))
+    out = []
+    for name, plan in sql_shapes().items():
+        fp, _, first_p, p50_p = _time(pandas_ex, plan, repeat)
+        fs, meta, first_s, p50_s = _time(sql_ex, plan, repeat)
+        sql = meta.get("sql") or {}
+        out.append({"size": size, "shape": name, "rows_out": 0 if fp is None else len(fp),
+                    "pandas_first_ms": round(first_p, 2), "pandas_p50_ms": round(p50_p, 3),
+                    "sql_first_ms": round(first_s, 2), "sql_p50_ms": round(p50_s, 3),
+                    "pushed": sql.get("steps", 0), "fallback": sql.get("fallback"), "same": _same(fp, fs)})
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,100000")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--engine", default="sqlite", choices=["sqlite", "duckdb"])
+    ap.add_argument("--data-dir", default=None, help="keep generated CSVs here (one subdir per size)")
+    ap.add_argument("--json", default=None, help="write the records to this file")
+    args = ap.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    records = []
+    print(f"{'size':>9s} {'shape':16s} {'rows':>6s} {'pd_first':>9s} {'pd_p50':>8s} {'sql_first':>9s} "
+          f"{'sql_p50':>8s} {'speedup':>7s} {'pushed':>6s} same")
+    with tempfile.TemporaryDirectory() as work:
+        for size in sizes:
+            data_dir = os.path.join(args.data_dir or work, f"synth_{size}")
+            os.environ["ATLAS_SNAPSHOT_DIR"] = os.path.join(data_dir, "snapshots")
+            for r in run_suite(size, data_dir, args.repeat, args.engine, args.seed):
+                records.append(r)
+                speedup = f"{r['pandas_p50_ms'] / r['sql_p50_ms']:.2f}x" if r["sql_p50_ms"] else "-"
+                note = f"  ({r['fallback']})" if r["fallback"] else ""
+                print(f"{r['size']:>9d} {r['shape']:16s} {r['rows_out']:>6d} {r['pandas_first_ms']:>9.1f} "
+                      f"{r['pandas_p50_ms']:>8.2f} {r['sql_first_ms']:>9.1f} {r['sql_p50_ms']:>8.2f} "
+                      f"{speedup:>7s} {r['pushed']:>6d} {'yes' if r['same'] else 'NO'}{note}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2)
+    if any(not r["same"] for r in records):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -25,3 +25,44 @@ def _isolate_env_and_state(monkeypatch):
         if mod in list(globals()) or True:
             try: importlib.reload(importlib.import_module(mod))
             except Exception: pass
+
+
+@pytest.fixture(autouse=True)
+def _no_result_cache(monkeypatch):
+    # the plan result cache is process-wide: start each test empty and off (cache tests turn it back on)
+    from atlas_core.atlas_plan_executor import clear_executor_caches
+    clear_executor_caches()
+    monkeypatch.setenv("ATLAS_RESULT_CACHE", "0")
+    yield
+    clear_executor_caches()
+
+
+# Small on-disk CSV registry so executor tests don't depend on the bundled data files
+_ONHAND_CSV = """item,organization_id,onhand_qty,reserved_qty,available_qty,subinventory_code,last_update_date
+ITEM-00001,101,100,10,90,FG,2025-09-01
+ITEM-00002,101,50,0,50,FG,2025-09-02
+ITEM-00003,102,75,5,70,QA,2025-09-03
+ITEM-00001,102,20,0,20,FG,2025-09-04
+ITEM-00004,101,0,0,0,RM,2025-09-05
+"""
+
+_PO_CSV = """po_number,item,organization_id,ordered_qty,received_qty,promised_date,need_by_date,last_receipt_date,buyer_user_id,vendor_name,po_status
+PO-0000001,ITEM-00001,101,40,10,2025-10-01,2025-09-20,2025-10-03,B1,Acme Corp,OPEN
+PO-0000002,ITEM-00002,101,30,30,2025-09-15,2025-09-10,2025-09-14,B2,Wayne Industrial,CLOSED
+PO-0000003,ITEM-00003,102,25,0,2025-10-20,2025-10-15,,B1,Acme Corp,OPEN_PENDING
+PO-0000004,ITEM-00001,102,10,5,2025-11-01,2025-10-25,2025-11-05,B3,Stark Supply,REJECTED
+"""
+
+
+@pytest.fixture
+def csv_registry(tmp_path, monkeypatch):
+    import json
+    from atlas_core.atlas_plan_executor import AdapterRegistry
+
+    monkeypatch.setenv("ATLAS_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+
+    (tmp_path / "onhand.csv").write_text(_ONHAND_CSV)
+    (tmp_path / "po.csv").write_text(_PO_CSV)
+    cfg = tmp_path / "csv_path.json"
+    cfg.write_text(json.dumps({"ONHAND": str(tmp_path / "onhand.csv"), "PO": str(tmp_path / "po.csv")}))
+    return AdapterRegistry(str(cfg))
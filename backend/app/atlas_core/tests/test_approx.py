@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from atlas_core import atlas_approx as A
+from atlas_core.atlas_plan_executor import PlanExecutor
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def _frame(n=60_000, groups=12, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"grp": rng.integers(0, groups, n).astype(str),
+                         "qty": rng.gamma(2.0, 50.0, n).round(),
+                         "serial": rng.integers(0, n // 3, n).astype(str)})
+
+
+def test_sketches_track_exact_counts():
+    df = _frame()
+    hll = A.HyperLogLog(12).add(A.row_hashes(df[["serial"]]))
+    exact = df["serial"].nunique()
+    assert abs(hll.estimate()[0] - exact) <= 4 * hll.rel_error * exact
+
+    h = A.row_hashes(df[["grp"]])
+    cms = A.CountMinSketch(width=256, depth=4).add(h)
+    keys = df.drop_duplicates("grp")
+    est = cms.estimate(A.row_hashes(keys[["grp"]]))
+    true = df["grp"].value_counts()[keys["grp"]].to_numpy()
+    assert (est >= true).all() and (est - true <= cms.error_bound).all()
+
+
+def test_sampled_aggregate_bounds_cover_exact():
+    df = _frame()
+    cfg = A.approx_settings({"approximate": {"rate": 0.2, "confidence": 0.99}})
+    (out, meta), stats = A.approx_aggregate(df, cfg, ["grp"], [("qty", "sum")])
+    exact = df.groupby("grp")["qty"].sum()
+    assert list(out["grp"]) == list(exact.index)
+    assert ((out["qty_lo"] <= exact.to_numpy()) & (exact.to_numpy() <= out["qty_hi"])).mean() >= 0.9
+    assert stats["method"] == "stratified_sample" and stats["sampled_rows"] < len(df) * 0.3
+
+    (out, _), _ = A.approx_aggregate(df, cfg, ["grp"], [("serial", "nunique")])
+    exact = df.groupby("grp")["serial"].nunique().to_numpy()
+    assert (abs(out["serial"] - exact) <= 0.1 * exact).all()
+
+
+def test_small_strata_and_unsupported_aggs_run_exact():
+    df = _frame(groups=40_000)
+    cfg = A.approx_settings({"approximate": {"min_rows": 0}})
+    assert A.maybe_approximate(A.approx_aggregate, df, cfg, ["grp"], [("qty", "sum")])[0] is None
+    est, stats = A.maybe_approximate(A.approx_aggregate, _frame(), cfg, ["grp"], [("qty", "max")])
+    assert est is None and "max" in stats["exact"]
+
+    def broken(df, cfg, *args):
+        raise NotImplementedError("a real bug, not an unsupported shape")
+    with pytest.raises(NotImplementedError):                  # only the module's own signal means "run exact"
+        A.maybe_approximate(broken, _frame(), cfg)
+
+
+def test_executor_marks_meta_approximate(csv_registry, monkeypatch):
+    monkeypatch.setenv("ATLAS_APPROX_MIN_ROWS", "0")
+    agg = Step("aggregate", None, {"by": ["organization_id"], "metrics": [("ordered_qty", "sum")]})
+    plan = Plan("COMPARATIVE", "qty by org", [Step("filter", "PO", {"where": [], "limit": 50000}), agg])
+    ex = PlanExecutor(csv_registry)
+
+    exact = ex.run(plan)
+    assert "approximate" not in exact["meta"]
+
+    approx_plan = A.approximate_plan(plan)
+    assert "approximate" not in plan.steps[1].params
+    # groups this small would be sampled whole, so the step runs exact and says why
+    res = ex.run(approx_plan)
+    assert res["rows"] == exact["rows"] and "exact" in res["meta"]["lineage"][1]["approximate"]
+
+    approx_plan.steps[1].params.update(metrics=[("po_number", "count")],
+                                       approximate={"method": "sketch", "rate": 1.0})
+    res = ex.run(approx_plan)
+    assert res["meta"]["approximate"] is True and res["meta"]["badges"] == ["APPROXIMATE"]
+    assert res["meta"]["lineage"][1]["approximate"]["method"] == "count_min"
+    counts = ex.run(Plan("COMPARATIVE", "po by org", [plan.steps[0], Step("aggregate", None, {
+        "by": ["organization_id"], "metrics": [("po_number", "count")]})]))["rows"]
+    assert [(r["organization_id"], r["po_number"]) for r in res["rows"]] == \
+           [(r["organization_id"], r["po_number"]) for r in counts]
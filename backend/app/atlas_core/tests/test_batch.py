@@ -0,0 +1,33 @@
+import pandas as pd
+
+from atlas_core.atlas_plan_executor import PlanExecutor
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def _po(where, *rest):
+    return Plan("OPERATIONAL", "tile", [Step("filter", "PO", {"where": where, "limit": 50000}), *rest])
+
+
+def test_batch_shares_first_filter_scan(csv_registry, monkeypatch):
+    org = {"col": "organization_id", "op": "eq", "value": "101"}
+    plans = [
+        _po([org]),
+        _po([org, {"col": "ordered_qty", "op": ">", "value": 30}]),
+        _po([{"col": "vendor_name", "op": "contains", "value": "acme"}, org],
+            Step("aggregate", None, {"by": ["vendor_name"], "metrics": [("ordered_qty", "sum")]})),
+        _po([{"col": "nope", "op": "eq", "value": 1}]),
+        Plan("OPERATIONAL", "stock", [Step("filter", "ONHAND", {"where": [org], "limit": 50000})]),
+    ]
+    ex = PlanExecutor(csv_registry)
+    batch = ex.run_batch(plans)
+    for plan, got in zip(plans, batch):
+        exp = ex.run(plan)
+        pd.testing.assert_frame_equal(pd.DataFrame(got["rows"]), pd.DataFrame(exp["rows"]))
+        assert [l.get("error") for l in got["meta"]["lineage"]] == [l.get("error") for l in exp["meta"]["lineage"]]
+
+    shared = [b["meta"]["lineage"][0].get("shared_scan") for b in batch]
+    assert shared[0] == {"plans": 3, "predicates": 1, "reused": 0}
+    assert shared[1] == {"plans": 3, "predicates": 2, "reused": 1}
+    assert shared[2] == {"plans": 3, "predicates": 2, "reused": 1}
+    assert "error" in batch[3]["meta"]["lineage"][0] and shared[3] is None   # no predicate in common
+    assert shared[4] is None   # only plan on ONHAND: scanned on its own
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from atlas_core.atlas_budget import BudgetExceeded, QueryBudget, frame_bytes
+from atlas_core.atlas_plan_executor import PandasJoiner, PlanExecutor
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def test_spill_round_trips_and_unmaps_budget(tmp_path):
+    df = pd.DataFrame({"k": np.arange(5000), "q": np.linspace(0, 1, 5000), "s": ["a", "b"] * 2500})
+    budget = QueryBudget(limit=frame_bytes(df) // 2, spill_dir=str(tmp_path))
+    out = budget.fit(1, df)
+    pd.testing.assert_frame_equal(out, df)
+    assert budget.steps[1]["spilled"] == [{"rows": 5000, "bytes": 80000}]
+    assert budget.steps[1]["bytes"] < budget.limit and budget.summary()["spilled_bytes"] == 80000
+
+    blocks = []
+    built = budget.produce(2, 5000, frame_bytes(df) / len(df), lambda lo, hi: blocks.append(hi - lo) or df.iloc[lo:hi])
+    pd.testing.assert_frame_equal(built, df.reset_index(drop=True))
+    assert len(blocks) > 1 and sum(blocks) == 5000
+    budget.close()
+
+    with pytest.raises(BudgetExceeded):
+        QueryBudget(limit=1000, spill=False).fit(1, df)
+
+
+def test_budget_stops_query_without_spill(csv_registry, monkeypatch):
+    monkeypatch.setenv("ATLAS_QUERY_BUDGET_MB", "0.0001")
+    monkeypatch.setenv("ATLAS_SPILL", "0")
+    plan = Plan("MULTI", "po vs onhand", [
+        Step("filter", "ONHAND", {"where": [], "limit": 50000}),
+        Step("join", None, {"how": "left", "right_source": "PO", "right_filters": [], "right_select": None,
+                            "right_limit": 50000, "on_pairs": [("item", "item")]})])
+    frame, meta = PlanExecutor(csv_registry).run_frame(plan)
+    assert "memory budget exceeded" in meta["lineage"][-1]["error"]
+    assert meta["memory"]["exceeded_step"] == meta["lineage"][-1]["step"]
+
+    monkeypatch.setenv("ATLAS_QUERY_BUDGET_MB", "1024")
+    frame, meta = PlanExecutor(csv_registry).run_frame(plan)
+    assert [e["memory"]["budget"] for e in meta["lineage"]] == [1 << 30] * 2
+    assert meta["memory"]["peak"] == max(e["memory"]["bytes"] for e in meta["lineage"])
+
+
+def test_join_slices_match_whole_merge():
+    left = pd.DataFrame({"k": [3, 1, 2, 2, 9, 3], "a": range(6)})
+    right = pd.DataFrame({"k": [3, 2, 3, 1, 2], "b": list("vwxyz")})
+    full = left.merge(right, how="left", on="k")
+    n, rows, sliced = PandasJoiner().merge_rows(left, right, ["k"], ["k"], "left")
+    assert sliced and n == len(full) == 10
+    pd.testing.assert_frame_equal(pd.concat([rows(0, 3), rows(3, 7), rows(7, 10)], ignore_index=True), full)
+    pd.testing.assert_frame_equal(rows(5, 7), full.iloc[5:7].reset_index(drop=True))    # stops early
+
+    n, rows, sliced = PandasJoiner().merge_rows(left, right, ["k"], ["k"], "inner")
+    assert not sliced and n == 9                                           # sized, but built whole
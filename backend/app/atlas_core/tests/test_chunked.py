@@ -0,0 +1,67 @@
+import pandas as pd
+
+from atlas_core.atlas_plan_executor import PlanExecutor
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def _plans():
+    po = lambda where, limit=50000: Step("filter", "PO", {"where": where, "limit": limit})
+    return [
+        Plan("OPERATIONAL", "head", [po([{"col": "po_status", "op": "contains", "value": "open"}], limit=1)]),
+        Plan("OPERATIONAL", "ranges", [po([{"col": "ordered_qty", "op": ">=", "value": 25},
+                                           {"col": "last_receipt_date", "op": ">", "value": {"colref": "promised_date"}}])]),
+        Plan("OPERATIONAL", "by vendor", [po([]), Step("aggregate", None, {
+            "by": ["vendor_name"], "metrics": [("ordered_qty", "sum"), ("po_number", "count"), ("received_qty", "mean")]})]),
+        Plan("OPERATIONAL", "vendors", [po([]), Step("distinct", None, {"cols": ["vendor_name"]})]),
+        Plan("OPERATIONAL", "top open", [po([]), Step("derive", None, {"expressions": [
+            {"as": "open_qty", "expr": "ordered_qty - received_qty"}]}), Step("topk", None, {"k": 2, "by": "open_qty"})]),
+        Plan("OPERATIONAL", "latest", [po([]), Step("sort", None, {"by": ["promised_date"], "ascending": False, "limit": 3})]),
+    ]
+
+
+def test_chunked_plans_match_in_memory(csv_registry, monkeypatch):
+    monkeypatch.setenv("ATLAS_CHUNK_ROWS", "1")
+    for plan in _plans():
+        monkeypatch.setenv("ATLAS_CHUNKED", "0")
+        exp = PlanExecutor(csv_registry).run(plan)
+        monkeypatch.setenv("ATLAS_CHUNKED", "1")
+        got = PlanExecutor(csv_registry).run(plan)
+        stats = got["meta"]["chunked"]
+        assert "fallback" not in stats and stats["budget_bytes"] > 0 and stats["peak_bytes_est"] > 0
+        pd.testing.assert_frame_equal(pd.DataFrame(got["rows"]), pd.DataFrame(exp["rows"]))
+
+    # the filter's limit stops reading once met
+    out = PlanExecutor(csv_registry).run(_plans()[0])
+    assert out["meta"]["chunked"]["stopped_early"] and out["meta"]["chunked"]["chunks"] == 1
+    assert out["meta"]["lineage"][0]["chunked"]["rows_scanned"] == 1
+
+
+def test_chunked_auto_uses_memory_budget(csv_registry, monkeypatch):
+    plan = _plans()[2]
+    monkeypatch.setenv("ATLAS_MEMORY_BUDGET_MB", "0.0001")   # ~100 bytes: smaller than po.csv
+    assert PlanExecutor(csv_registry).run(plan)["meta"]["chunked"]["budget_bytes"] == 104
+    monkeypatch.setenv("ATLAS_MEMORY_BUDGET_MB", "64")
+    assert "chunked" not in PlanExecutor(csv_registry).run(plan)["meta"]
+
+
+def test_unfoldable_aggregate_falls_back_in_memory(csv_registry, monkeypatch):
+    monkeypatch.setenv("ATLAS_CHUNK_ROWS", "1")
+    plan = Plan("OPERATIONAL", "median qty", [Step("filter", "PO", {"where": [], "limit": 50000}),
+                                              Step("aggregate", None, {"by": ["vendor_name"], "metrics": [("ordered_qty", "median")]})])
+    monkeypatch.setenv("ATLAS_CHUNKED", "0")
+    exp = PlanExecutor(csv_registry).run(plan)
+    monkeypatch.setenv("ATLAS_CHUNKED", "1")
+    got = PlanExecutor(csv_registry).run(plan)
+    assert got["meta"]["chunked"]["fallback"].startswith("_Unsupported: aggregate ['median']")
+    assert got["rows"] == exp["rows"]
+
+
+def test_step_error_is_reported_not_rerun_in_memory(csv_registry, monkeypatch):
+    monkeypatch.setenv("ATLAS_CHUNK_ROWS", "1")
+    monkeypatch.setenv("ATLAS_CHUNKED", "1")
+    plan = Plan("OPERATIONAL", "bad column", [Step("filter", "PO", {"where": [
+        {"col": "no_such_col", "op": "eq", "value": 1}], "limit": 50000})])
+    out = PlanExecutor(csv_registry).run(plan)
+    assert "fallback" not in out["meta"]["chunked"] and out["meta"]["chunked"]["chunks"] == 1
+    assert "no_such_col" in out["meta"]["lineage"][0]["error"]
+    assert csv_registry.tables["PO"]._table is None          # the whole file was never loaded
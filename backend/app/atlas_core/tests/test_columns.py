@@ -0,0 +1,28 @@
+import pandas as pd
+
+from atlas_core.atlas_plan_executor import PlanExecutor, column_resolver
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def test_resolver_aliases_casing_and_semantics():
+    cols = pd.Index(["Item", "ORG_ID", "on_hand", "Qty_Available", "reserved"])
+    r = column_resolver("ONHAND", cols)
+    assert r is column_resolver("ONHAND", list(cols))     # compiled once per schema
+    assert r.cols(["sku", "item", "site", "onhand_qty", "available", "Reserved Quantity"]) == \
+        ["Item", "Item", "ORG_ID", "on_hand", "Qty_Available", "reserved"]
+    assert r.col("nope") == "nope" and r.col("on_hand_qty") == "on_hand_qty"   # unresolved: aliased name back
+    assert r.find("nope") is None
+    assert r.metrics([("onhand", "sum")]) == [("on_hand", "sum")]
+    assert column_resolver("ONHAND", ["available_qty"]).sort_col("Available-Qty") == "available_qty"
+    assert column_resolver(None, ["vendor_name"]).col("vendor") == "vendor"     # ALL: no aliases
+
+
+def test_steps_share_resolution(csv_registry, monkeypatch):
+    plan = Plan("OPERATIONAL", "po by vendor", [
+        Step("filter", "PO", {"where": [{"col": "STATUS", "op": "ne", "value": "CLOSED"}], "limit": 50000}),
+        Step("aggregate", None, {"by": ["Vendor"], "metrics": [["ordered_qty", "sum"]]}),
+        Step("sort", None, {"by": "Ordered_Qty desc"})])
+    frame, meta = PlanExecutor(csv_registry).run_frame(plan)
+    assert list(frame.columns) == ["vendor_name", "ordered_qty"]
+    assert frame["vendor_name"].tolist() == ["Acme Corp", "Stark Supply"]
+    assert meta["lineage"][2]["by_resolved"] == "ordered_qty" and meta["lineage"][2]["order_final"] == "desc"
@@ -0,0 +1,59 @@
+import pandas as pd
+
+from atlas_core.atlas_dag import plan_dag
+from atlas_core.atlas_plan_executor import PlanExecutor
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def _join_plan(right_filters):
+    return Plan("MULTI", "stock vs po", [
+        Step("filter", "ONHAND", {"where": [{"col": "organization_id", "op": "eq", "value": "101"}], "limit": 50000}),
+        Step("join", None, {"how": "left", "right_source": "PO", "right_filters": right_filters,
+                            "right_select": None, "right_limit": 50000,
+                            "on_pairs": [("organization_id", "organization_id"), ("item", "item")]}),
+        Step("sort", None, {"by": ["item"], "ascending": True}),
+    ])
+
+
+def test_plan_dag_marks_right_fetch_independent():
+    nodes = {n["id"]: n for n in plan_dag(_join_plan([]))}
+    assert nodes["s2.right"]["deps"] == [] and nodes["s2.right"]["source"] == "PO"
+    assert nodes["s2"]["deps"] == ["s1", "s2.right"] and nodes["s3"]["deps"] == ["s2"]
+
+
+def test_right_fetch_runs_on_branch_thread(csv_registry, monkeypatch):
+    ex = PlanExecutor(csv_registry)
+    out = ex.run(_join_plan([{"col": "po_status", "op": "ne", "value": "CLOSED"}]))
+    fetch = out["meta"]["lineage"][1]["fetch"]
+    assert fetch["parallel"] and fetch["thread"].startswith("atlas-branch")
+    assert 0 <= fetch["overlap_ms"] <= fetch["end_ms"] - fetch["start_ms"] + 0.01
+    assert [n["id"] for n in out["meta"]["dag"]] == ["s1", "s2.right", "s2", "s3"]
+
+    monkeypatch.setenv("ATLAS_PARALLEL", "0")
+    seq = ex.run(_join_plan([{"col": "po_status", "op": "ne", "value": "CLOSED"}]))
+    assert not seq["meta"]["lineage"][1]["fetch"]["parallel"]
+    pd.testing.assert_frame_equal(pd.DataFrame(out["rows"]), pd.DataFrame(seq["rows"]))
+
+    # a right-side filter error still surfaces at the join step
+    monkeypatch.setenv("ATLAS_PARALLEL", "1")
+    bad = ex.run(_join_plan([{"col": "nope", "op": "eq", "value": 1}]))
+    assert bad["meta"]["lineage"][-1]["error"].startswith("right filters:")
+
+
+def test_failed_chain_skips_unstarted_fetch(csv_registry, monkeypatch):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from atlas_core import atlas_dag
+
+    pool, gate = ThreadPoolExecutor(max_workers=1), threading.Event()
+    pool.submit(gate.wait)                                    # keeps the fetch queued until the chain is done
+    monkeypatch.setattr(atlas_dag, "branch_pool", lambda: pool)
+    ex, fetched = PlanExecutor(csv_registry), []
+    monkeypatch.setattr(ex, "_fetch_right", lambda p: fetched.append(p))
+
+    plan = _join_plan([])
+    plan.steps[0].params["where"] = [{"col": "nope", "op": "eq", "value": 1}]
+    out = ex.run(plan)
+    gate.set(); pool.shutdown(wait=True)
+    assert "error" in out["meta"]["lineage"][0] and fetched == []
+    assert {n["id"]: n for n in out["meta"]["dag"]}["s2.right"]["skipped"]
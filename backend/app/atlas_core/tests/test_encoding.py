@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from atlas_core.atlas_encoding import DictColumn
+from atlas_core.atlas_plan_executor import PlanExecutor, TypedTable
+
+
+def _po_frame(n=400):
+    rng = np.random.default_rng(3)
+    return pd.DataFrame({
+        "po_number": [f"PO-{i:07d}" for i in range(n)],
+        "vendor_name": pd.Series(rng.choice(["Acme Corp", "ACME corp", "Wayne Industrial", None], n), dtype="str"),
+        "uom": rng.choice(["EA", "Box", "kg"], n),
+        "ordered_qty": rng.integers(0, 100, n),
+    })
+
+
+def test_dict_column_chosen_by_cardinality():
+    df = _po_frame()
+    assert DictColumn.build("po_number", df["po_number"]) is None      # all distinct
+    assert DictColumn.build("ordered_qty", df["ordered_qty"]) is None  # numeric
+    enc = DictColumn.build("vendor_name", df["vendor_name"])
+    assert enc.cardinality == 3 and len(enc.values) == 4               # + null slot
+    got = enc.mask(lambda v: v.astype(str).str.casefold() == "acme corp")
+    np.testing.assert_array_equal(got, (df["vendor_name"].str.casefold() == "acme corp").fillna(False).to_numpy())
+
+
+def test_filters_on_encoded_columns_match_plain_table(csv_registry, monkeypatch):
+    df = _po_frame()
+    ex = PlanExecutor(csv_registry)
+    enc_t = TypedTable("PO", df.copy())
+    monkeypatch.setenv("ATLAS_DICT_ENCODING", "0")
+    plain_t = TypedTable("PO", df.copy())
+    assert set(enc_t.dicts) == {"vendor_name", "uom"} and not plain_t.dicts
+    for where in ([{"col": "vendor_name", "op": "eq", "value": "acme CORP"}],
+                  [{"col": "vendor_name", "op": "ne", "value": "acme corp"}, {"col": "ordered_qty", "op": ">", "value": 50}],
+                  [{"col": "uom", "op": "in", "values": ["ea", "KG"]}],
+                  [{"col": "vendor_name", "op": "contains", "value": "ind"}]):
+        stats = {}
+        got = ex._apply_filters(enc_t.df, where, "PO", table=enc_t, stats=stats)
+        exp = ex._apply_filters(plain_t.df, where, "PO", table=plain_t)
+        pd.testing.assert_frame_equal(got, exp)
+        assert stats["dictionary"] == [where[0]["col"]]
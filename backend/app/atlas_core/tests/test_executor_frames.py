@@ -0,0 +1,56 @@
+from atlas_core.atlas_plan_executor import PlanExecutor
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def test_multi_step_plan_returns_records(csv_registry):
+    plan = Plan("OPERATIONAL", "onhand totals", [
+        Step("filter", "ONHAND", {"where": [], "limit": 50000}),
+        Step("aggregate", None, {"by": ["organization_id"], "metrics": [("available_qty", "sum")]}),
+        Step("sort", None, {"by": ["available_qty"], "ascending": False}),
+        Step("topk", None, {"k": 1, "by": "available_qty"}),
+    ])
+    out = PlanExecutor(csv_registry).run(plan)
+    assert out["rows"] == [{"organization_id": 101, "available_qty": 140}]
+    assert [s["rows_after_step"] for s in out["meta"]["lineage"]] == [5, 2, 2, 1]
+
+
+def test_derive_does_not_leak_into_cached_table(csv_registry):
+    plan = Plan("MIXED", "po open qty", [
+        Step("filter", "PO", {"where": [], "limit": 50000}),
+        Step("derive", None, {"expressions": [{"as": "open_qty", "expr": "ordered_qty - received_qty"}]}),
+    ])
+    ex = PlanExecutor(csv_registry)
+    out = ex.run(plan)
+    assert [r["open_qty"] for r in out["rows"]] == [30, 0, 25, 5]
+    assert "open_qty" not in csv_registry.tables["PO"].get_df().columns
+
+
+def test_join_pushes_right_filters_and_projection(csv_registry):
+    plan = Plan("MIXED", "inventory vs open po", [
+        Step("filter", "ONHAND", {"where": [], "limit": 50000}),
+        Step("join", None, {"how": "inner", "right_source": "PO",
+                            "right_filters": [{"col": "po_status", "op": "eq", "value": "open"}],
+                            "right_select": None, "right_limit": 50000,
+                            "on_pairs": [("organization_id", "organization_id"), ("item", "item")]}),
+        Step("derive", None, {"expressions": [{"as": "open_qty", "expr": "ordered_qty - received_qty"}]}),
+        Step("aggregate", None, {"by": ["item"], "metrics": [("open_qty", "sum")]}),
+    ])
+    out = PlanExecutor(csv_registry).run(plan)
+    assert out["rows"] == [{"item": "ITEM-00001", "open_qty": 30}]
+    right = out["meta"]["lineage"][1]["right"]
+    assert right["rows"] == 1
+    assert right["cols"] == ["item", "organization_id", "ordered_qty", "received_qty"]
+
+
+def test_join_right_select_is_the_whole_projection(csv_registry):
+    plan = Plan("MIXED", "po numbers per item", [
+        Step("filter", "ONHAND", {"where": [], "limit": 50000}),
+        Step("join", None, {"how": "left", "right_source": "PO", "right_filters": [],
+                            "right_select": ["po_number", "ordered_qty"], "right_limit": 50000,
+                            "on_pairs": [("item", "item")]}),
+    ])
+    frame, meta = PlanExecutor(csv_registry).run_frame(plan)
+    # organization_id exists on both sides, but only the left's is kept: no _x/_y columns
+    assert list(frame.columns) == ["item", "organization_id", "onhand_qty", "reserved_qty", "available_qty",
+                                   "subinventory_code", "last_update_date", "po_number", "ordered_qty"]
+    assert meta["lineage"][1]["right"]["cols"] == ["po_number", "item", "ordered_qty"]
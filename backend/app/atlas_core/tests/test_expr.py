@@ -0,0 +1,65 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from atlas_core.atlas_expr import ExprError, column_values, compile_expr
+from atlas_core.atlas_plan_executor import PlanExecutor
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def _eval(text, df):
+    cols = {c: column_values(df[c]) for c in df.columns}
+    return compile_expr(text).evaluate(cols.__getitem__, len(df))
+
+
+def test_arithmetic_coalesce_and_conditionals():
+    df = pd.DataFrame({"a": [10, 4, 6], "b": [2.0, None, 0.0], "s": ["OPEN", "closed", None]})
+    assert _eval("(a - coalesce(b, 1)) * 2", df).tolist() == [16, 6, 12]
+    assert [None if math.isnan(x) else x for x in _eval("a / b", df)] == [5.0, None, None]
+    assert _eval("if(s = 'open' and a > 5, 'late', 'ok')", df).tolist() == ["late", "ok", "ok"]
+    assert _eval("-a + 1", df).dtype.kind == "i"
+    assert compile_expr("a + b") is compile_expr("a + b")      # parsed once, reused
+    with pytest.raises(ExprError):
+        compile_expr("a + (b")
+
+
+def test_date_differences_in_days():
+    df = pd.DataFrame({"promised_date": ["2025-10-01", "2025-10-05", None],
+                       "last_receipt_date": ["2025-10-03", "2025-10-04", "2025-10-09"]})
+    late = _eval("last_receipt_date - promised_date", df)
+    assert late[:2].tolist() == [2.0, -1.0] and np.isnan(late[2])
+    assert _eval("coalesce(promised_date, date('2025-10-08')) + 1 < last_receipt_date", df).tolist() == [True, False, False]
+
+
+def test_derive_step_computes_several_metrics(csv_registry):
+    plan = Plan("MIXED", "po delays", [
+        Step("filter", "PO", {"where": [], "limit": 50000}),
+        Step("derive", None, {"expressions": [
+            {"as": "open_qty", "expr": "ordered_qty - received_qty"},
+            {"as": "days_late", "expr": "coalesce(last_receipt_date - promised_date, 0)"},
+            {"as": "flag", "expr": "if(days_late > 0 and open_qty > 0, 'LATE', 'OK')"},
+        ]}),
+    ])
+    out = PlanExecutor(csv_registry).run(plan)
+    assert [(r["open_qty"], r["days_late"], r["flag"]) for r in out["rows"]] == [
+        (30, 2.0, "LATE"), (0, -1.0, "OK"), (25, 0.0, "OK"), (5, 4.0, "LATE")]
+    assert out["meta"]["lineage"][1]["derived"] == ["open_qty", "days_late", "flag"]
+
+
+def test_derive_reads_parsed_dates_from_table(csv_registry, monkeypatch):
+    plan = Plan("OPERATIONAL", "receipt delay", [
+        Step("filter", "PO", {"where": [{"col": "po_status", "op": "ne", "value": "CLOSED"}], "limit": 50000}),
+        Step("derive", None, {"expressions": [{"as": "delay_days", "expr": "last_receipt_date - promised_date"}]})])
+    ex = PlanExecutor(csv_registry)
+    expected, _ = ex.run_frame(plan)
+    table = csv_registry.tables["PO"].get_table()
+    assert column_values(table.df["promised_date"], table=table).dtype == np.dtype("datetime64[ns]")
+
+    def _no_parse(*a, **k):
+        raise AssertionError("derive re-parsed a source column")
+    monkeypatch.setattr(pd, "to_datetime", _no_parse)
+    frame, meta = ex.run_frame(plan)
+    assert "error" not in meta["lineage"][1]
+    pd.testing.assert_frame_equal(frame, expected)
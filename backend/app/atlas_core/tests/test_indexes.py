@@ -0,0 +1,109 @@
+import pandas as pd
+
+from atlas_core.atlas_indexes import HashIndex, SortedIndex
+from atlas_core.atlas_plan_executor import PlanExecutor
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def test_hash_index_matches_eq_semantics():
+    text = HashIndex("po_number", pd.Series(["po-1", "po-2", "po-1"]), numeric=False)
+    assert text.lookup_eq("PO-1").tolist() == [0, 2]
+    assert text.lookup_eq("PO-9").tolist() == []
+    org = HashIndex("organization_id", pd.Series([101, 102, 101]), numeric=True)
+    assert org.lookup_eq("101").tolist() == [0, 2]
+    assert org.lookup_eq("WH1") is None          # not answerable -> executor scans
+    assert org.lookup_in(["102", 101]).tolist() == [0, 1, 2]
+
+
+def test_point_lookup_uses_index_and_is_recorded(csv_registry):
+    plan = Plan("TRANSACTIONAL", "po lookup", [
+        Step("filter", "PO", {"where": [
+            {"col": "po_number", "op": "eq", "value": "po-0000001"},
+            {"col": "ordered_qty", "op": ">", "value": 5},
+        ], "limit": 2000}),
+    ])
+    out = PlanExecutor(csv_registry).run(plan)
+    assert [r["po_number"] for r in out["rows"]] == ["PO-0000001"]
+    step = out["meta"]["lineage"][0]
+    assert step["index"] == {"type": "hash", "cols": ["po_number"], "candidates": 1}
+
+
+def test_in_on_indexed_columns_keeps_row_order(csv_registry):
+    plan = Plan("OPERATIONAL", "onhand items", [
+        Step("filter", "ONHAND", {"where": [
+            {"col": "item", "op": "in", "values": ["ITEM-00001", "item-00003"]},
+            {"col": "site", "op": "eq", "value": "102"},
+        ], "limit": 50000}),
+    ])
+    out = PlanExecutor(csv_registry).run(plan)
+    assert [(r["item"], r["organization_id"]) for r in out["rows"]] == [("ITEM-00003", 102), ("ITEM-00001", 102)]
+    assert out["meta"]["lineage"][0]["index"]["cols"] == ["item", "organization_id"]
+
+
+def test_sorted_index_ranges_skip_nulls():
+    idx = SortedIndex("onhand_qty", pd.Series([5.0, None, 1.0, 5.0, 9.0]), kind="num")
+    assert sorted(idx.positions("ge", 5).tolist()) == [0, 3, 4]
+    assert idx.positions("lt", 5).tolist() == [2]
+    assert idx.bitmap("gt", 100).sum() == 0
+
+
+def test_date_range_uses_sorted_index(csv_registry):
+    plan = Plan("TRANSACTIONAL", "late pos", [
+        Step("filter", "PO", {"where": [
+            {"col": "need_by_date", "op": ">=", "value": "2025-10-01"},
+            {"col": "need_by_date", "op": "<", "value": "2025-10-20"},
+        ], "limit": 2000}),
+    ])
+    out = PlanExecutor(csv_registry).run(plan)
+    assert [r["po_number"] for r in out["rows"]] == ["PO-0000003"]
+    assert out["meta"]["lineage"][0]["range_index"] == {"cols": ["need_by_date"], "candidates": 1}
+
+
+def test_join_index_gather_matches_merge():
+    import numpy as np
+    from atlas_core.atlas_indexes import JoinIndex
+    rng = np.random.default_rng(7)
+    left = pd.DataFrame({"org": rng.integers(0, 4, 60), "item": rng.choice(["a", "b", None], 60), "lq": np.arange(60)})
+    right = pd.DataFrame({"org": rng.integers(0, 5, 40), "item": rng.choice(["a", "b", "c", None], 40), "rq": np.arange(40)})
+    ji = JoinIndex(left, ["org", "item"], right, ["org", "item"])
+    lsub, rsub = left.iloc[::3].sample(frac=1, random_state=1), right[right.rq % 2 == 0]
+    keep = np.zeros(len(right), dtype=bool); keep[rsub.index] = True
+    for how in ("left", "inner"):
+        i, r = ji.gather(lsub.index.to_numpy(), keep, how)
+        got = pd.DataFrame({"lq": lsub["lq"].to_numpy()[i], "rq": rsub["rq"].reindex(r).to_numpy()})
+        exp = lsub.merge(rsub, how=how, on=["org", "item"])[["lq", "rq"]]
+        pd.testing.assert_frame_equal(got, exp.reset_index(drop=True), check_dtype=False)
+
+
+def test_filter_join_uses_join_index(csv_registry, monkeypatch):
+    plan = Plan("OPERATIONAL", "onhand vs po", [
+        Step("filter", "ONHAND", {"where": [{"col": "subinventory_code", "op": "eq", "value": "FG"}], "limit": 50000}),
+        Step("join", None, {"how": "left", "right_source": "PO", "on_pairs": [("organization_id", "organization_id"), ("item", "item")],
+                            "right_filters": [{"col": "po_status", "op": "ne", "value": "CLOSED"}]}),
+    ])
+    out = PlanExecutor(csv_registry).run(plan)
+    assert out["meta"]["lineage"][1]["join_index"]["pairs"] == 4   # whole-table pairs
+    monkeypatch.setenv("ATLAS_JOIN_INDEX", "0")
+    plain = PlanExecutor(csv_registry).run(plan)
+    assert "join_index" not in plain["meta"]["lineage"][1]
+    pd.testing.assert_frame_equal(pd.DataFrame(out["rows"]), pd.DataFrame(plain["rows"]))
+    assert pd.DataFrame(out["rows"])["po_number"].tolist()[::2] == ["PO-0000001", "PO-0000004"]
+
+
+def test_trigram_index_candidates_are_verified():
+    from atlas_core.atlas_indexes import TrigramIndex
+    s = pd.Series(["Acme Corp", "ACME corporation", None, "Wayne Ind", "Kelvin acme", "acm e"], dtype="str")
+    tri = TrigramIndex("vendor_name", s)
+    for pat in ("acme", "CORP", "zzz", "kel", "me c"):
+        m, _ = tri.mask(pat)
+        assert m.tolist() == s.astype(str).str.contains(pat, case=False, na=False).tolist(), pat
+    assert tri.candidates("ac") is None and tri.candidates("ac.e") is None   # short / regex: caller scans
+
+
+def test_contains_filter_uses_trigram_index(csv_registry):
+    plan = Plan("TRANSACTIONAL", "po by vendor", [
+        Step("filter", "PO", {"where": [{"col": "vendor_name", "op": "contains", "value": "corp"}], "limit": 50}),
+    ])
+    out = PlanExecutor(csv_registry).run(plan)
+    assert [r["po_number"] for r in out["rows"]] == ["PO-0000001", "PO-0000003"]
+    assert out["meta"]["lineage"][0]["trigram_index"] == [{"col": "vendor_name", "candidates": 1}]
@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from atlas_core.atlas_plan_executor import AdapterRegistry, PlanExecutor
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def _big_registry(tmp_path, monkeypatch, n=30000):
+    monkeypatch.setenv("ATLAS_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    rng = np.random.default_rng(7)
+    pd.DataFrame({
+        "po_number": [f"PO-{i:07d}" for i in range(n)],
+        "vendor_name": rng.choice(["Acme Corp", "Stark Supply", "Wayne Parts"], n),
+        "po_status": rng.choice(["OPEN", "CLOSED", "APPROVED"], n),
+        "ordered_qty": rng.integers(1, 100, n),
+        "promised_date": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D"),
+    }).to_csv(tmp_path / "po.csv", index=False)
+    (tmp_path / "csv_path.json").write_text(json.dumps({"PO": str(tmp_path / "po.csv")}))
+    return AdapterRegistry(str(tmp_path / "csv_path.json"))
+
+
+def test_filter_limit_stops_scan_early(tmp_path, monkeypatch):
+    reg = _big_registry(tmp_path, monkeypatch)
+    where = [{"col": "vendor_name", "op": "eq", "value": "acme corp"}, {"col": "po_status", "op": "ne", "value": "CLOSED"},
+             {"col": "vendor_name", "op": "contains", "value": "corp"}]
+    plan = Plan("OPERATIONAL", "open pos for acme", [
+        Step("filter", "PO", {"where": where, "limit": 40}),
+        Step("derive", None, {"expressions": [{"as": "double_qty", "expr": "ordered_qty * 2"}]})])
+    frame, meta = PlanExecutor(reg).run_frame(plan)
+    scan = meta["lineage"][0]["limit_scan"]
+    assert scan["rows"] == 30000 and scan["rows_scanned"] < 30000 and len(frame) == 40
+
+    monkeypatch.setenv("ATLAS_LIMIT_PUSHDOWN", "0")
+    expected, meta = PlanExecutor(reg).run_frame(plan)
+    assert "limit_scan" not in meta["lineage"][0]
+    pd.testing.assert_frame_equal(frame, expected)
+
+
+def test_limit_not_pushed_past_sort_or_aggregate(tmp_path, monkeypatch):
+    reg = _big_registry(tmp_path, monkeypatch)
+    po = Step("filter", "PO", {"where": [{"col": "po_status", "op": "eq", "value": "OPEN"}], "limit": 40})
+    for later in (Step("sort", None, {"by": ["ordered_qty"], "ascending": False}),
+                  Step("aggregate", None, {"by": ["vendor_name"], "metrics": [["ordered_qty", "sum"]]})):
+        frame, meta = PlanExecutor(reg).run_frame(Plan("OPERATIONAL", "open pos", [po, later]))
+        assert "limit_scan" not in meta["lineage"][0] and meta["lineage"][0]["rows_after_step"] == 40
@@ -0,0 +1,85 @@
+from atlas_core import atlas_plan_executor as ape
+from atlas_core.atlas_plan_executor import PlanExecutor
+from atlas_core.atlas_plan_optimizer import optimize_plan, plan_to_dict
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def _ops(plan):
+    return [s.op for s in plan.steps]
+
+
+def test_sort_topk_fused_and_noops_dropped(csv_registry):
+    plan = Plan("OPERATIONAL", "onhand by org", [
+        Step("filter", "ONHAND", {"where": [], "limit": 50000}),
+        Step("sort", None, {"by": ["available_qty"], "ascending": True}),
+        Step("aggregate", None, {"by": ["organization_id"], "metrics": [("available_qty", "sum")]}),
+        Step("sort", None, {}),
+        Step("sort", None, {"by": ["available_qty"], "order": "desc", "ascending": False}),
+        Step("topk", None, {"k": 1, "by": "available_qty"}),
+    ])
+    opt, info = optimize_plan(plan)
+    assert _ops(opt) == ["filter", "aggregate", "sort"]
+    assert opt.steps[-1].params == {"by": ["available_qty"], "order": "desc", "ascending": False, "limit": 1}
+    assert [r["rule"] for r in info["rewrites"]] == ["drop_noop", "drop_sort_before_aggregate", "fuse_sort_topk"]
+    assert len(plan.steps) == 6                   # input plan untouched
+    ex = PlanExecutor(csv_registry)
+    assert ex.run(opt)["rows"] == ex.run(plan)["rows"] == [{"organization_id": 101, "available_qty": 140}]
+
+
+def test_filters_ordered_and_limit_pushed():
+    plan = Plan("TRANSACTIONAL", "po detail", [
+        Step("filter", "PO", {"where": [
+            {"col": "po_status", "op": "ne", "value": "CLOSED"},
+            {"col": "received_qty", "op": "<", "value": {"colref": "ordered_qty"}},
+            {"col": "item", "op": "eq", "value": "ITEM-00001"},
+        ], "limit": 5000}),
+        Step("derive", None, {"expressions": [{"as": "open_qty", "expr": "ordered_qty - received_qty"}]}),
+        Step("topk", None, {"k": 3}),
+    ])
+    opt, info = optimize_plan(plan)
+    assert [f["col"] for f in opt.steps[0].params["where"]] == ["item", "received_qty", "po_status"]
+    assert opt.steps[0].params["limit"] == 3 and _ops(opt) == ["filter", "derive"]
+    assert plan_to_dict(plan)["steps"][0]["params"]["limit"] == 5000
+
+
+def test_compacted_filter_matches_full_scan(csv_registry, monkeypatch):
+    where = [{"col": "vendor_name", "op": "contains", "value": "stark"},
+             {"col": "received_qty", "op": "<", "value": {"colref": "ordered_qty"}},
+             {"col": "po_status", "op": "ne", "value": "OPEN"}]
+    plan = Plan("TRANSACTIONAL", "po", [Step("filter", "PO", {"where": where, "limit": 50})])
+    full = PlanExecutor(csv_registry).run(plan)["rows"]
+    monkeypatch.setattr(ape, "_COMPACT_MIN_ROWS", 0)
+    assert PlanExecutor(csv_registry).run(plan)["rows"] == full
+    assert [r["po_number"] for r in full] == ["PO-0000004"]
+
+
+def test_row_cuts_survive_rewrites(csv_registry):
+    po = Step("filter", "PO", {"where": [], "limit": 50000})
+    ex = PlanExecutor(csv_registry)
+    # a sort with a limit keeps only its top rows: the aggregate after it must see just those
+    cut = Plan("OPERATIONAL", "top po by vendor", [po,
+        Step("sort", None, {"by": ["ordered_qty"], "order": "desc", "limit": 2}),
+        Step("aggregate", None, {"by": ["vendor_name"], "metrics": [("ordered_qty", "sum")]})])
+    opt, info = optimize_plan(cut)
+    assert _ops(opt) == _ops(cut) and ex.run(opt)["rows"] == ex.run(cut)["rows"]
+    # k=0 can't become limit 0 (the executor reads that as "no limit")
+    for plan in (Plan("OPERATIONAL", "none", [po, Step("topk", None, {"k": 0})]),
+                 Plan("OPERATIONAL", "none", [po, Step("sort", None, {"by": ["ordered_qty"]}), Step("topk", None, {"k": 0})])):
+        opt, info = optimize_plan(plan)
+        assert opt.steps[-1].op == "topk" and ex.run(opt)["rows"] == ex.run(plan)["rows"] == []
+
+
+def test_sort_kept_when_derive_rewrites_its_key(csv_registry):
+    desc = {"by": ["received_qty"], "order": "desc", "ascending": False}
+    plan = Plan("OPERATIONAL", "po by receipt", [
+        Step("filter", "PO", {"where": [], "limit": 50000}),
+        Step("sort", None, dict(desc)),
+        Step("derive", None, {"expressions": [{"as": "received_qty", "expr": "organization_id"}]}),
+        Step("sort", None, dict(desc)),
+    ])
+    opt, info = optimize_plan(plan)
+    assert _ops(opt) == _ops(plan) and not info["rewrites"]
+    ex = PlanExecutor(csv_registry)
+    rows = ex.run(opt)["rows"]
+    assert rows == ex.run(plan)["rows"]
+    assert [r["po_number"] for r in rows] == ["PO-0000004", "PO-0000003", "PO-0000002", "PO-0000001"]
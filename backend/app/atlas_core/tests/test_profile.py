@@ -0,0 +1,56 @@
+from atlas_core.atlas_plan_executor import PlanExecutor
+from atlas_core.atlas_profile import ProfileHook
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def _plan():
+    return Plan("OPERATIONAL", "po by vendor", [
+        Step("filter", "PO", {"where": [{"col": "po_number", "op": "eq", "value": "PO-0000001"}], "limit": 50000}),
+        Step("aggregate", None, {"by": ["vendor_name"], "metrics": [("ordered_qty", "sum")]}),
+        Step("sort", None, {"by": ["ordered_qty"], "ascending": False}),
+        Step("topk", None, {"k": 1, "by": "ordered_qty"}),
+    ])
+
+
+def test_profile_is_per_request(csv_registry, monkeypatch):
+    ex = PlanExecutor(csv_registry)
+    plain = ex.run(_plan())
+    assert "profile" not in plain["meta"] and not any("profile" in l for l in plain["meta"]["lineage"])
+
+    out = ex.run(_plan(), profile=True)
+    assert out["rows"] == plain["rows"]
+    steps = [l["profile"] for l in out["meta"]["lineage"]]
+    assert len(steps) == 4
+    for p in steps:
+        assert p["wall_ms"] >= 0 and p["cpu_ms"] >= 0 and p["mem_peak_delta_bytes"] >= 0 and p["bytes_out"] > 0
+    assert steps[0]["hits"] == ["index"]
+    summary = out["meta"]["profile"]
+    assert summary["hook"] == "resource" and summary["steps"] == 4 and summary["hot_step"] in (1, 2, 3, 4)
+    assert summary["materialize_ms"] >= 0
+
+
+def test_custom_hook_and_cached_results(csv_registry, monkeypatch):
+    monkeypatch.setenv("ATLAS_RESULT_CACHE", "1")
+    class Counting(ProfileHook):
+        name = "counting"
+        def __init__(self):
+            self.ops = []
+        def step_start(self, step, op):
+            return op
+        def step_end(self, state, entry, frame):
+            self.ops.append(state)
+            return {"rows": 0 if frame is None else len(frame)}
+        def plan_end(self, meta):
+            return {"hook": self.name, "ops": list(self.ops)}
+
+    ex = PlanExecutor(csv_registry)
+    hook = Counting()
+    out = ex.run(_plan(), profile=hook)
+    assert out["meta"]["profile"]["ops"] == ["filter", "aggregate", "sort", "topk"]
+    assert [l["profile"]["rows"] for l in out["meta"]["lineage"]] == [1, 1, 1, 1]
+
+    # a result-cache hit runs no steps and carries no stale step profiles
+    again = ex.run(_plan())
+    assert again["meta"]["cache"]["hit"] and not any("profile" in l for l in again["meta"]["lineage"])
+    hit = ex.run(_plan(), profile=True)["meta"]["profile"]
+    assert hit["hook"] == "resource" and hit["result_cache"] == "hit" and "steps" not in hit
@@ -0,0 +1,47 @@
+import os
+
+import pandas as pd
+
+from atlas_core import atlas_plan_executor as ape
+from atlas_core.atlas_plan_executor import PlanExecutor, clear_executor_caches
+from atlas_core.atlas_query_router import Plan, Step
+from atlas_core.atlas_result_cache import ResultCache
+
+
+def _totals_plan():
+    return Plan("OPERATIONAL", "totals by site", [
+        Step("filter", "ONHAND", {"where": [], "limit": 50000}),
+        Step("aggregate", None, {"by": ["organization_id"], "metrics": [("available_qty", "sum")]}),
+        Step("sort", None, {"by": ["available_qty"], "order": "desc"}),
+    ])
+
+
+def test_repeat_plan_hits_until_data_changes(csv_registry, monkeypatch):
+    monkeypatch.setenv("ATLAS_RESULT_CACHE", "1")
+    ex = PlanExecutor(csv_registry)
+    first = ex.run(_totals_plan())
+    second = ex.run(_totals_plan())
+    assert first["meta"]["cache"]["hit"] is False and first["meta"]["cache"]["stored"] is True
+    assert second["meta"]["cache"]["hit"] is True and second["meta"]["cache"]["hits"] == 1
+    assert second["rows"] == first["rows"]
+
+    path = csv_registry.tables["ONHAND"].path
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert ex.run(_totals_plan())["meta"]["cache"]["hit"] is False
+
+    clear_executor_caches()
+    assert ape._RESULT_CACHE.stats()["entries"] == 0
+
+
+def test_lru_ttl_and_byte_budget():
+    df = pd.DataFrame({"a": range(100)})
+    c = ResultCache(max_entries=2, max_bytes=10**6, ttl_s=60)
+    c.put("a", df, {}); c.put("b", df, {})
+    assert c.get("a") is not None          # a becomes most recent
+    c.put("c", df, {})
+    assert c.get("b") is None and c.get("a") is not None and c.stats()["evictions"] == 1
+    assert not ResultCache(max_bytes=10).put("big", df, {})
+    stale = ResultCache(ttl_s=-1)
+    stale.put("a", df, {})
+    assert stale.get("a") is None
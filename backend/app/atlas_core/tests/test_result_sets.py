@@ -0,0 +1,35 @@
+import pandas as pd
+
+from atlas_core import atlas_service
+from atlas_core.atlas_result_sets import ResultSetStore, iter_records
+
+
+def test_pages_walk_the_result_set():
+    store = ResultSetStore(max_sets=2, ttl_s=60)
+    rs = store.open(pd.DataFrame({"n": range(25)}), {"plan_intent": "OPERATIONAL"})
+    first = rs.page(0, 10)
+    assert [r["n"] for r in first["rows"]] == list(range(10))
+    assert first["page"]["total"] == 25 and first["page"]["next_offset"] == 10
+    last = store.get(rs.cursor).page(20, 10)
+    assert [r["n"] for r in last["rows"]] == [20, 21, 22, 23, 24]
+    assert last["page"]["has_more"] is False and last["page"]["next_offset"] is None
+    store.open(pd.DataFrame()); store.open(pd.DataFrame())
+    assert store.get(rs.cursor) is None            # LRU-evicted
+
+
+def test_iter_records_is_lazy_and_chunked():
+    df = pd.DataFrame({"n": range(7)})
+    it = iter_records(df, start=2, chunk=3)
+    assert next(it) == {"n": 2}
+    assert [r["n"] for r in it] == [3, 4, 5, 6]
+
+
+def test_service_first_page_and_fetch():
+    out = atlas_service._respond({"frame": pd.DataFrame({"n": range(5)}), "meta": {}}, page_size=2)
+    page = out["meta"]["page"]
+    assert [r["n"] for r in out["rows"]] == [0, 1] and page["total"] == 5
+    nxt = atlas_service.fetch_page(page["cursor"], page["next_offset"], 2)
+    assert [r["n"] for r in nxt["rows"]] == [2, 3]
+    assert [r["n"] for r in atlas_service.stream_rows(page["cursor"], 3)] == [3, 4]
+    assert atlas_service.close_cursor(page["cursor"])
+    assert atlas_service.fetch_page(page["cursor"]) is None
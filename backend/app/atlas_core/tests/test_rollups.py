@@ -0,0 +1,51 @@
+import pandas as pd
+
+from atlas_core.atlas_plan_executor import PlanExecutor
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def _agg_plan(where, by, metrics):
+    return Plan("OPERATIONAL", "onhand totals", [
+        Step("filter", "ONHAND", {"where": where, "limit": 50000}),
+        Step("aggregate", None, {"by": by, "metrics": metrics}),
+    ])
+
+
+def test_aggregate_answered_from_rollup(csv_registry, monkeypatch):
+    ex = PlanExecutor(csv_registry)
+    for where, by, metrics in [
+        ([], ["organization_id", "item"], [("onhand_qty", "sum"), ("available_qty", "sum")]),
+        ([{"col": "organization_id", "op": "eq", "value": "101"}], ["organization_id"],
+         [("onhand_qty", "mean"), ("available_qty", "max"), ("item", "size")]),
+    ]:
+        out = ex.run(_agg_plan(where, by, metrics))
+        assert out["meta"]["lineage"][1]["rollup"]["name"] == "ONHAND[organization_id,item]"
+        monkeypatch.setenv("ATLAS_ROLLUPS", "0")
+        raw = ex.run(_agg_plan(where, by, metrics))
+        monkeypatch.setenv("ATLAS_ROLLUPS", "1")
+        assert "rollup" not in raw["meta"]["lineage"][1]
+        pd.testing.assert_frame_equal(pd.DataFrame(out["rows"]), pd.DataFrame(raw["rows"]))
+
+    # a non-key predicate or a truncating limit falls back to grouping the rows
+    out = ex.run(_agg_plan([{"col": "subinventory_code", "op": "eq", "value": "FG"}], ["organization_id"],
+                           [("onhand_qty", "sum")]))
+    assert "rollup" not in out["meta"]["lineage"][1]
+
+
+def test_rollup_folds_appended_rows(csv_registry):
+    ex = PlanExecutor(csv_registry)
+    plan = _agg_plan([], ["organization_id"], [("onhand_qty", "sum")])
+    assert ex.run(plan)["rows"] == [{"organization_id": 101, "onhand_qty": 150}, {"organization_id": 102, "onhand_qty": 95}]
+    path = csv_registry.tables["ONHAND"].path
+    with open(path, "a") as f:
+        f.write("ITEM-00009,102,5,0,5,FG,2025-09-06\n")
+    out = ex.run(plan)
+    assert out["meta"]["reloaded"]["ONHAND"]["rollups"] == {"ONHAND[organization_id,item]": "folded 1 rows"}
+    assert out["rows"] == [{"organization_id": 101, "onhand_qty": 150}, {"organization_id": 102, "onhand_qty": 100}]
+    with open(path) as f:
+        text = f.read()
+    with open(path, "w") as f:
+        f.write(text.replace("ITEM-00002,101,50", "ITEM-00002,101,10"))
+    out = ex.run(plan)
+    assert out["meta"]["reloaded"]["ONHAND"]["rollups"] == {"ONHAND[organization_id,item]": "rebuilt"}
+    assert out["rows"][0] == {"organization_id": 101, "onhand_qty": 110}
@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from atlas_core import atlas_snapshot
+
+
+def test_snapshot_rebuilt_only_when_csv_changes(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setenv("ATLAS_SNAPSHOT_DIR", str(tmp_path / "snap"))
+    csv = tmp_path / "po.csv"
+    csv.write_text("po_number,ordered_qty\nPO-1,10\nPO-2,20\n")
+
+    df1, info1 = atlas_snapshot.load_csv(str(csv))
+    df2, info2 = atlas_snapshot.load_csv(str(csv))
+    assert (info1["snapshot"], info2["snapshot"]) == ("rebuilt", "hit")
+    assert df2.to_dict("records") == df1.to_dict("records")
+
+    csv.write_text("po_number,ordered_qty\nPO-1,10\nPO-2,20\nPO-3,30\n")
+    df3, info3 = atlas_snapshot.load_csv(str(csv))
+    assert info3["snapshot"] == "rebuilt" and info3["sha1"] != info1["sha1"]
+    assert len(df3) == 3
+    assert not os.path.exists(info1["path"])
+
+
+def test_snapshots_can_be_disabled(tmp_path, monkeypatch):
+    monkeypatch.setenv("ATLAS_SNAPSHOTS", "0")
+    csv = tmp_path / "so.csv"
+    csv.write_text("so_number\nSO-1\n")
+    _, info = atlas_snapshot.load_csv(str(csv))
+    assert info["snapshot"] == "disabled"
+
+
+
+def test_no_snapshot_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(atlas_snapshot, "pa_feather", None)
+    monkeypatch.setenv("ATLAS_SNAPSHOT_DIR", str(tmp_path / "snap"))
+    csv = tmp_path / "po.csv"
+    csv.write_text("po_number\nPO-1\n")
+    # nothing is pickled, and nothing planted in the snapshot dir is ever loaded
+    for _ in range(2):
+        df, info = atlas_snapshot.load_csv(str(csv))
+        assert info["snapshot"] == "unavailable" and df["po_number"].tolist() == ["PO-1"]
+    assert not (tmp_path / "snap").exists()
@@ -0,0 +1,77 @@
+import json
+
+import pandas as pd
+import pytest
+
+from atlas_core.atlas_plan_executor import AdapterRegistry, PandasCsvAdapter, PlanExecutor, SqlCsvAdapter
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def _sql_registry(tmp_path, adapter="sqlite"):
+    cfg = tmp_path / "csv_sql.json"
+    cfg.write_text(json.dumps({src: {"path": str(tmp_path / f"{src.lower()}.csv"), "adapter": adapter}
+                               for src in ("ONHAND", "PO")}))
+    return AdapterRegistry(str(cfg))
+
+
+def _plans():
+    fg = Step("filter", "ONHAND", {"where": [{"col": "subinventory_code", "op": "eq", "value": "fg"}], "limit": 50000})
+    join = Step("join", None, {"how": "left", "right_source": "PO", "right_filters": [], "right_select": None,
+                               "right_limit": 50000, "on_pairs": [("item", "item"), ("organization_id", "organization_id")]})
+    return {
+        "filter": Plan("OPERATIONAL", "fg onhand", [fg]),
+        "join_aggregate_sort": Plan("MULTI", "po qty by org", [
+            Step("filter", "ONHAND", {"where": [{"col": "onhand_qty", "op": ">", "value": 0}], "limit": 50000}), join,
+            Step("aggregate", None, {"by": ["organization_id"], "metrics": [["ordered_qty", "sum"], ["po_number", "count"]]}),
+            Step("sort", None, {"by": ["ordered_qty"], "order": "desc"})]),
+        "join_select": Plan("MULTI", "po numbers per item", [fg, Step("join", None, {
+            **join.params, "right_select": ["po_number", "ordered_qty"], "on_pairs": [("item", "item")]})]),
+        "topk": Plan("OPERATIONAL", "top po", [
+            Step("filter", "PO", {"where": [], "limit": 50000}),
+            Step("topk", None, {"by": "ordered_qty", "k": 2, "order": "desc"})]),
+        "distinct": Plan("OPERATIONAL", "vendors", [
+            Step("filter", "PO", {"where": [{"col": "po_status", "op": "ne", "value": "CLOSED"}], "limit": 50000}),
+            Step("distinct", None, {"cols": ["vendor_name"]})]),
+    }
+
+
+@pytest.mark.parametrize("shape", list(_plans()))
+def test_pushdown_matches_pandas(csv_registry, tmp_path, monkeypatch, shape):
+    plan = _plans()[shape]
+    expected, pmeta = PlanExecutor(csv_registry).run_frame(plan)
+    frame, meta = PlanExecutor(_sql_registry(tmp_path)).run_frame(plan)
+
+    assert meta["sql"]["engine"] == "sqlite" and meta["sql"]["steps"] == len(plan.steps)
+    pd.testing.assert_frame_equal(frame, expected, check_index_type="equiv")
+    assert [e["rows_after_step"] for e in meta["lineage"]] == [e["rows_after_step"] for e in pmeta["lineage"]]
+    assert all(e["pushdown"] == "sqlite" for e in meta["lineage"])
+
+
+def test_unsupported_steps_resume_in_pandas(csv_registry, tmp_path, monkeypatch):
+    plan = Plan("OPERATIONAL", "open qty", [
+        Step("filter", "PO", {"where": [{"col": "vendor_name", "op": "contains", "value": "^Acme"}], "limit": 50000}),
+        Step("derive", None, {"name": "open_qty", "expr": "ordered_qty - received_qty"})])
+    expected, _ = PlanExecutor(csv_registry).run_frame(plan)
+    frame, meta = PlanExecutor(_sql_registry(tmp_path)).run_frame(plan)
+    pd.testing.assert_frame_equal(frame, expected, check_index_type="equiv")
+    assert "fallback" in meta["sql"]
+
+    plan.steps[0].params["where"] = [{"col": "po_status", "op": "eq", "value": "OPEN"}]
+    expected, _ = PlanExecutor(csv_registry).run_frame(plan)
+    frame, meta = PlanExecutor(_sql_registry(tmp_path)).run_frame(plan)
+    pd.testing.assert_frame_equal(frame, expected, check_index_type="equiv")
+    assert meta["sql"]["steps"] == 1 and "derive" in meta["sql"]["stopped"]
+    assert "pushdown" not in meta["lineage"][1]
+
+
+def test_adapter_selection_and_filter(csv_registry, tmp_path, monkeypatch):
+    reg = _sql_registry(tmp_path)
+    assert isinstance(reg.tables["PO"], SqlCsvAdapter) and reg.tables["PO"].engine is reg.tables["ONHAND"].engine
+    rows = reg.tables["ONHAND"].filter({"where": [{"col": "organization_id", "op": "eq", "value": 101}],
+                                       "select": ["item", "onhand_qty"], "limit": 2}).rows
+    assert rows == [{"item": "ITEM-00001", "onhand_qty": 100}, {"item": "ITEM-00002", "onhand_qty": 50}]
+
+    monkeypatch.setenv("ATLAS_SQL", "0")
+    assert type(_sql_registry(tmp_path).tables["PO"]) is PandasCsvAdapter
+    with pytest.raises(RuntimeError):
+        _sql_registry(tmp_path, adapter="oracle")
@@ -0,0 +1,33 @@
+import pandas as pd
+
+from atlas_core.atlas_plan_executor import PlanExecutor, TypedTable
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def test_typed_table_canonicalizes_and_types_once():
+    raw = pd.DataFrame({
+        "PO": ["PO-1", "PO-2"], "Vendor": ["Acme", "Wayne"], "po_status": ["OPEN", "CLOSED"],
+        "ordered_qty": ["10", "20"], "promised_date": ["2025-10-01", "2025-11-01"],
+    })
+    t = TypedTable("PO", raw)
+    assert list(t.df.columns) == ["po_number", "vendor_name", "po_status", "ordered_qty", "promised_date"]
+    assert isinstance(t.df["po_status"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_numeric_dtype(t.df["ordered_qty"].dtype)
+    # display values stay as loaded; parsed dates live in a side column
+    assert t.df["promised_date"].tolist() == ["2025-10-01", "2025-11-01"]
+    assert "promised_date" in t.describe()["date_cols"]
+    assert t.casefolded("vendor_name").tolist() == ["acme", "wayne"]
+
+
+def test_filters_use_typed_columns(csv_registry):
+    plan = Plan("EXCEPTION", "late open po", [
+        Step("filter", "PO", {"where": [
+            {"col": "status", "op": "in", "values": ["open", "open_pending"]},
+            {"col": "promised_date", "op": ">", "value": "2025-09-30"},
+            {"col": "received_qty", "op": "<", "value": {"colref": "ordered_qty"}},
+        ], "limit": 5000}),
+        Step("aggregate", None, {"by": ["po_status"], "metrics": [("ordered_qty", "sum")]}),
+    ])
+    out = PlanExecutor(csv_registry).run(plan)
+    assert out["rows"] == [{"po_status": "OPEN", "ordered_qty": 40},
+                           {"po_status": "OPEN_PENDING", "ordered_qty": 25}]
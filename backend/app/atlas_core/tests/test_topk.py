@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from atlas_core.atlas_plan_executor import PlanExecutor, _take_topk
+from atlas_core.atlas_query_router import Plan, Step
+
+
+def test_partial_topk_matches_stable_sort():
+    rng = np.random.default_rng(7)
+    for dtype in ("int64", "float64", "Int64"):
+        vals = pd.Series(rng.integers(0, 20, 500)).astype(dtype)
+        if dtype != "int64":
+            vals[rng.integers(0, 500, 40)] = None
+        df = pd.DataFrame({"v": vals, "row": range(500)})
+        for asc in (True, False):
+            for k in (1, 5, 37, 460, 600):
+                want = df.assign(__k__=vals).sort_values("__k__", ascending=asc, kind="mergesort").head(k)
+                got = _take_topk(df, vals, k, asc)
+                assert got["row"].tolist() == want.drop(columns="__k__")["row"].tolist(), (dtype, asc, k)
+
+
+def test_topk_step_keeps_numeric_order_and_ties(csv_registry):
+    plan = Plan("OPERATIONAL", "top onhand", [
+        Step("filter", "ONHAND", {"where": [], "limit": 50000}),
+        Step("topk", None, {"k": 3, "by": "reserved_qty"}),
+    ])
+    rows = PlanExecutor(csv_registry).run(plan)["rows"]
+    assert [(r["item"], r["reserved_qty"]) for r in rows] == [("ITEM-00001", 10), ("ITEM-00003", 5), ("ITEM-00002", 0)]